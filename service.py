@@ -0,0 +1,16 @@
+import sys
+import asyncio
+import params
+from simulate import Simulator, SchedulingService, run_service_benchmark
+
+if __name__ == "__main__":
+    simulator = Simulator()
+    simulator.method = "cassini"
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        # replay a random trace against an in-process service
+        simulator.generate_random_jobs()
+        jobs = simulator.jobs
+        simulator.jobs = {}
+        asyncio.run(run_service_benchmark(jobs, SchedulingService(simulator)))
+    else:
+        asyncio.run(SchedulingService(simulator, port=8765).serve_forever())
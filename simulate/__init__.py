@@ -1,4 +1,14 @@
 from .network_traffic_management import TrafficManager
+from .job import Job
+from .job_queue import JobQueue, scheduling_policies
 from .gpu_manager import GPUManager
+from .placement_log import PlacementLog, PlacementLogReader
 from .network_elements import ClosTopology, Link
+from .rdma_operates import RdmaOperateStore
+from .link_timeline import LinkTimeline
+from .sharded_traffic_manager import PairShardedTrafficManager
+from .conflict_graph_renderer import ConflictGraphRenderer
 from .simulator import Simulator
+from .shadow import ShadowVerifier, ShadowDivergence
+from .sweep import run_sweep
+from .service import SchedulingService, replay_trace, run_service_benchmark
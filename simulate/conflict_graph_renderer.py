@@ -0,0 +1,255 @@
+import os
+import random
+import multiprocessing as mp
+import networkx as nx
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+def _render_frame(frame: dict):
+    """
+    Draw one frame from plain arrays, so it can run in a separate process
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+    node_xy = frame["node_xy"]
+    edge_segments = frame["edge_segments"]
+    edge_weights = frame["edge_weights"]
+    if len(edge_segments) > 0:
+        widths = 0.5 + 2.5 * edge_weights / edge_weights.max()
+        ax.add_collection(
+            LineCollection(edge_segments, linewidths=widths, alpha=0.4, colors="k")
+        )
+    if frame["edge_labels"]:
+        for (x, y), label in zip(edge_segments.mean(axis=1), edge_weights):
+            ax.text(x, y, str(int(label)), fontsize=8, ha="center", va="center")
+    if len(node_xy) > 0:
+        ax.scatter(node_xy[:, 0], node_xy[:, 1], s=frame["node_size"], zorder=2)
+    ax.set_xlim(-1.1, 1.1)
+    ax.set_ylim(-1.1, 1.1)
+    ax.set_title(frame["title"])
+    ax.set_axis_off()
+    fig.savefig(frame["file_path"], format="png")
+    plt.close(fig)
+
+
+def _render_worker(queue):
+    while True:
+        frame = queue.get()
+        if frame is None:
+            break
+        _render_frame(frame)
+
+
+class ConflictGraphRenderer:
+    """
+    Conflict graph rendering that scales to thousands of jobs.
+    Node positions are cached across windows so that frames are stable:
+    only new jobs are laid out (next to their neighbors) with a few
+    vectorized relaxation iterations while known jobs stay fixed, and
+    released jobs are forgotten.
+    Above max_edges only the heaviest edges are drawn, and edge labels are
+    replaced by line widths above max_labeled_edges.
+    Frames are drawn by a background process when background=True.
+    """
+
+    pos: Dict[str, Tuple[float, float]]
+
+    def __init__(
+        self,
+        file_dir: str = "save/conflict_graph",
+        max_edges: int = 5000,
+        max_labeled_edges: int = 50,
+        layout_iterations: int = 10,
+        repulsion_samples: int = 256,
+        background: bool = True,
+        seed: int = 10396953,
+    ):
+        self.file_dir = file_dir
+        self.max_edges = max_edges
+        self.max_labeled_edges = max_labeled_edges
+        self.layout_iterations = layout_iterations
+        self.repulsion_samples = repulsion_samples
+        self.background = background
+        self.random = random.Random(seed)
+        self.pos = {}  # cached {job_name: (x, y)}
+        self.frame_paths = []
+        self.queue = None
+        self.process = None
+
+    def update_layout(self, conflict_graph: nx.Graph) -> Dict[str, Tuple[float, float]]:
+        """
+        Place new nodes near the mean of their already placed neighbors, then
+        relax them towards their neighbors with cached nodes fixed, while
+        every node pushes them away as in spring_layout so that clusters do
+        not collapse onto a point.
+        Each iteration is O(edges + new nodes * repulsion_samples) with NumPy:
+        the repulsion is estimated from a random sample of the nodes.
+        """
+        nodes = list(conflict_graph.nodes)
+        is_new = np.array([node not in self.pos for node in nodes], dtype=bool)
+        if not is_new.any():
+            return self.pos
+        node_index = {node: i for i, node in enumerate(nodes)}
+        xy = np.array(
+            [
+                self.pos.get(
+                    node, (self.random.uniform(-1, 1), self.random.uniform(-1, 1))
+                )
+                for node in nodes
+            ],
+            dtype=float,
+        ).reshape(-1, 2)
+        edges = np.array(
+            [(node_index[u], node_index[v]) for u, v in conflict_graph.edges],
+            dtype=int,
+        ).reshape(-1, 2)
+        u, v = edges[:, 0], edges[:, 1]
+        degree = np.bincount(np.concatenate([u, v]), minlength=len(nodes))
+        has_neighbor = degree > 0
+
+        def neighbor_mean(xy, weight):
+            total = np.zeros_like(xy)
+            count = np.zeros(len(nodes))
+            np.add.at(total, u, xy[v] * weight[v, None])
+            np.add.at(total, v, xy[u] * weight[u, None])
+            np.add.at(count, u, weight[v])
+            np.add.at(count, v, weight[u])
+            mean = xy.copy()
+            placed = count > 0
+            mean[placed] = total[placed] / count[placed, None]
+            return mean, placed
+
+        # start new nodes at the mean of their cached neighbors
+        mean, placed = neighbor_mean(xy, (~is_new).astype(float))
+        start = is_new & placed
+        xy[start] = mean[start] + np.array(
+            [
+                [self.random.uniform(-0.05, 0.05) for _ in range(2)]
+                for _ in range(start.sum())
+            ]
+        ).reshape(-1, 2)
+        movable = is_new & has_neighbor
+        # optimal distance of nodes spread over the [-1, 1] square
+        k = 2 / np.sqrt(len(nodes))
+        for _ in range(self.layout_iterations):
+            mean, _ = neighbor_mean(xy, np.ones(len(nodes)))
+            if len(nodes) <= self.repulsion_samples:
+                sample = np.arange(len(nodes))
+            else:
+                sample = np.array(
+                    self.random.sample(range(len(nodes)), self.repulsion_samples)
+                )
+            delta = xy[movable, None, :] - xy[None, sample, :]
+            distance2 = (delta**2).sum(axis=2) + 1e-9  # a node does not push itself
+            push = (delta / distance2[:, :, None]).sum(axis=1)
+            push *= k**2 * len(nodes) / len(sample)
+            # at most k per iteration
+            length = np.linalg.norm(push, axis=1, keepdims=True)
+            push *= np.minimum(1, k / np.maximum(length, 1e-12))
+            xy[movable] = 0.5 * xy[movable] + 0.5 * mean[movable] + push
+        if is_new.all():
+            # first frame: fit into [-1, 1]
+            xy -= xy.mean(axis=0)
+            xy /= max(np.abs(xy).max(), 1e-9)
+        xy = np.clip(xy, -1, 1)
+        for i in np.flatnonzero(is_new):
+            self.pos[nodes[i]] = (float(xy[i, 0]), float(xy[i, 1]))
+        return self.pos
+
+    def forget(self, job_names: List[str]):
+        """
+        Drop the cached positions of released jobs
+        """
+        for job_name in job_names:
+            self.pos.pop(job_name, None)
+
+    def build_frame(self, conflict_graph: nx.Graph, title: str, file_path: str) -> dict:
+        pos = self.update_layout(conflict_graph)
+        edges = list(conflict_graph.edges(data="weight", default=1))
+        if len(edges) > self.max_edges:
+            # keep the heaviest edges
+            edges.sort(key=lambda edge: edge[2], reverse=True)
+            edges = edges[: self.max_edges]
+        node_xy = np.array([pos[node] for node in conflict_graph.nodes]).reshape(-1, 2)
+        edge_segments = np.array(
+            [(pos[u], pos[v]) for u, v, _ in edges], dtype=float
+        ).reshape(-1, 2, 2)
+        edge_weights = np.array([w for _, _, w in edges], dtype=float)
+        return {
+            "node_xy": node_xy,
+            "edge_segments": edge_segments,
+            "edge_weights": edge_weights,
+            "edge_labels": len(edges) <= self.max_labeled_edges,
+            "node_size": 40 if len(node_xy) <= 500 else 5,
+            "title": title,
+            "file_path": file_path,
+        }
+
+    def draw(self, conflict_graph: nx.Graph, title: str, frame_name: str) -> str:
+        """
+        Render one frame and return its path
+        """
+        if not os.path.exists(self.file_dir):
+            os.makedirs(self.file_dir)
+        file_path = os.path.join(self.file_dir, f"{frame_name}.png")
+        frame = self.build_frame(conflict_graph, title, file_path)
+        if self.background:
+            if self.process is None:
+                self.queue = mp.Queue(maxsize=8)
+                self.process = mp.Process(
+                    target=_render_worker, args=(self.queue,), daemon=True
+                )
+                self.process.start()
+            self.queue.put(frame)
+        else:
+            _render_frame(frame)
+        self.frame_paths.append(file_path)
+        return file_path
+
+    def close(self):
+        """
+        Wait for pending frames to be written
+        """
+        if self.process is not None:
+            self.queue.put(None)
+            self.process.join()
+            self.process = None
+            self.queue = None
+
+    def save_timelapse(
+        self, file_path: Optional[str] = None, frame_duration: int = 200
+    ):
+        """
+        Combine all frames drawn so far into an animated GIF.
+        Frames are streamed into the file one at a time, each with a palette
+        of its own, so a full run never holds more than one frame open.
+        """
+        from PIL import Image, GifImagePlugin  # installed with matplotlib
+
+        self.close()
+        if not self.frame_paths:
+            return None
+        if file_path is None:
+            file_path = os.path.join(self.file_dir, "timelapse.gif")
+        with open(file_path, "wb") as file:
+            for i, frame_path in enumerate(self.frame_paths):
+                with Image.open(frame_path) as image:
+                    frame = image.convert("RGB").convert(
+                        "P", palette=Image.Palette.ADAPTIVE
+                    )
+                if i == 0:
+                    header, _ = GifImagePlugin.getheader(frame, info={"loop": 0})
+                    file.writelines(header)
+                file.writelines(
+                    GifImagePlugin.getdata(
+                        frame, duration=frame_duration, include_color_table=True
+                    )
+                )
+            file.write(b";")  # trailer
+        return file_path
@@ -12,10 +12,14 @@ class GPUManager:
         self.gpu_usage = [None] * num_gpu  # List to keep track of each GPU's job_name
         self.job_deployed_time = {}
         self.job_released_time = {}
+        self.placement_log = None  # PlacementLog of assign/release events if set
 
     def gpu_occupation_rate(self) -> float:
         return sum(1 for job in self.gpu_usage if job is not None) / len(self.gpu_usage)
 
+    def num_free_gpu(self) -> int:
+        return self.gpu_usage.count(None)
+
     def assign_gpu_to_job(
         self, job_name: str, job_gpu_num: int, deploy_time: int
     ) -> bool:
@@ -26,24 +30,28 @@ class GPUManager:
         if num_gpu_available < job_gpu_num:
             return False
         else:
-            assigned_count = 0
-            for id, job_name in enumerate(self.gpu_usage):
-                if job_name is None:
-                    self.gpu_usage[id] = assign_job_name
-                    assigned_count += 1
-                if assigned_count == job_gpu_num:
+            assigned_ids = []
+            for id, occupying_job_name in enumerate(self.gpu_usage):
+                if occupying_job_name is None:
+                    self.gpu_usage[id] = job_name
+                    assigned_ids.append(id)
+                if len(assigned_ids) == job_gpu_num:
                     break
             self.job_deployed_time[job_name] = deploy_time
+            if self.placement_log is not None:
+                self.placement_log.assign(deploy_time, job_name, assigned_ids)
             return True
 
     def release_gpu(self, job_name: str, time: int):
         """
         Release job
         """
-        for id, job_name in enumerate(self.gpu_usage):
-            if job_name == job_name:
+        for id, occupying_job_name in enumerate(self.gpu_usage):
+            if occupying_job_name == job_name:
                 self.gpu_usage[id] = None
         self.job_released_time[job_name] = time
+        if self.placement_log is not None:
+            self.placement_log.release(time, job_name)
 
     def get_job_gpu_list(self, job_name: str) -> List[int]:
         """
@@ -51,7 +59,7 @@ class GPUManager:
         """
         job_gpu_list = [
             f"GPU-{id}"
-            for id, occupying_job_name in enumerate(self.gpu_manager.gpu_usage)
+            for id, occupying_job_name in enumerate(self.gpu_usage)
             if occupying_job_name == job_name
         ]  # GPUs occupied by job_name
         return job_gpu_list
@@ -0,0 +1,37 @@
+import sys
+
+
+class Job:
+    """
+    One entry of the job trace.
+    Slotted and with an interned model_type, since traces hold up to 100k jobs.
+    """
+
+    __slots__ = ("arrival_time", "duration", "size", "model_type")
+    arrival_time: int
+    duration: int
+    size: int
+    model_type: str
+
+    def __init__(self, arrival_time: int, duration: int, size: int, model_type: str):
+        self.arrival_time = arrival_time
+        self.duration = duration
+        self.size = size
+        self.model_type = sys.intern(model_type)
+
+    def __getitem__(self, key: str):
+        # dict-style access, as the json input used to be stored
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        return isinstance(other, Job) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Job({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, job: dict) -> "Job":
+        return cls(job["arrival_time"], job["duration"], job["size"], job["model_type"])
@@ -0,0 +1,76 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+class JobIntervalIndex:
+    """
+    Index over job lifetimes [start_time, end_time).
+    Two lists sorted by start and by end time answer "jobs ending before t"
+    and "jobs active in [t0, t1)" with a bisect, each job having exactly one
+    entry in both. These are plain Python lists: add, update and remove
+    shift list entries (O(n) memmoves, cheap for the thousands of running
+    jobs of a trace), and active() filters the smaller slice, which is O(n)
+    when most jobs end after the window and started before it.
+    """
+
+    job_time_period: Dict[str, Tuple[int, int]]
+    starts: List[Tuple[int, str]]  # sorted (start_time, job_name)
+    ends: List[Tuple[int, str]]  # sorted (end_time, job_name)
+
+    def __init__(self):
+        self.job_time_period = {}
+        self.starts = []
+        self.ends = []
+
+    def __len__(self) -> int:
+        return len(self.job_time_period)
+
+    def __contains__(self, job_name: str) -> bool:
+        return job_name in self.job_time_period
+
+    def add(self, job_name: str, start_time: int, end_time: int):
+        self.job_time_period[job_name] = (start_time, end_time)
+        insort(self.starts, (start_time, job_name))
+        insort(self.ends, (end_time, job_name))
+
+    def remove(self, job_name: str):
+        start_time, end_time = self.job_time_period.pop(job_name)
+        del self.starts[bisect_left(self.starts, (start_time, job_name))]
+        del self.ends[bisect_left(self.ends, (end_time, job_name))]
+
+    def update(self, job_name: str, start_time: int, end_time: int):
+        self.remove(job_name)
+        self.add(job_name, start_time, end_time)
+
+    def ending_before(self, time: int) -> List[str]:
+        """
+        Jobs with end_time <= time, by end time. Nothing is removed, the
+        caller removes the jobs it releases.
+        """
+        num_ended = bisect_left(self.ends, (time + 1, ""))
+        return [job_name for _, job_name in self.ends[:num_ended]]
+
+    def by_end(self) -> Iterator[Tuple[int, str]]:
+        """
+        (end_time, job_name) of all jobs by end time
+        """
+        return iter(self.ends)
+
+    def active(self, start: int, end: int) -> Set[str]:
+        """
+        Jobs whose lifetime intersects [start, end): started before end and
+        ending after start. The smaller of the two sorted slices is filtered.
+        """
+        num_started = bisect_left(self.starts, (end, ""))
+        first_running = bisect_left(self.ends, (start + 1, ""))
+        if num_started <= len(self.ends) - first_running:
+            return {
+                job_name
+                for _, job_name in self.starts[:num_started]
+                if self.job_time_period[job_name][1] > start
+            }
+        return {
+            job_name
+            for _, job_name in self.ends[first_running:]
+            if self.job_time_period[job_name][0] < end
+        }
@@ -0,0 +1,185 @@
+import heapq
+from bisect import bisect_right, insort
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+scheduling_policies = ["fifo", "easy_backfill", "smallest_first"]
+
+
+class JobQueue:
+    """
+    Arrived jobs waiting for GPUs, indexed by size bucket.
+    Each bucket keeps its jobs in arrival order and in a (duration, arrival)
+    heap, and the non-empty bucket sizes are kept sorted, so the buckets that
+    fit into a number of free GPUs are found with a bisect instead of a scan.
+    Jobs are removed lazily from the structures they are not popped from.
+
+    Policies:
+        "fifo": deploy in arrival order, stop at the first job that does not fit
+        "smallest_first": always deploy the smallest waiting job
+        "easy_backfill": FIFO, plus EASY backfilling: when the first job does
+            not fit, it gets a reservation at the earliest time enough GPUs are
+            released, and later jobs may start now if they do not delay it
+    """
+
+    policy: str
+    entries: Dict[
+        str, Tuple[int, int, int, int]
+    ]  # {job_name: (order, size, duration, arrival_time)}
+    buckets: Dict[int, Deque[str]]  # {size: job names in arrival order}
+    duration_heaps: Dict[
+        int, List[Tuple[int, int, str]]
+    ]  # {size: [(duration, order, job_name)]}
+    bucket_sizes: List[int]  # sorted sizes of non-empty buckets
+
+    def __init__(self, policy: str = "fifo"):
+        assert policy in scheduling_policies, f"unknown scheduling policy {policy}"
+        self.policy = policy
+        self.entries = {}
+        self.buckets = {}
+        self.duration_heaps = {}
+        self.bucket_sizes = []
+        self.num_pushed = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, job_name: str) -> bool:
+        return job_name in self.entries
+
+    def push(self, job_name: str, size: int, duration: int, arrival_time: int):
+        """
+        Jobs must be pushed in arrival order
+        """
+        order = self.num_pushed
+        self.num_pushed += 1
+        self.entries[job_name] = (order, size, duration, arrival_time)
+        if size not in self.buckets:
+            self.buckets[size] = deque()
+            self.duration_heaps[size] = []
+        if not self.buckets[size]:
+            insort(self.bucket_sizes, size)
+        self.buckets[size].append(job_name)
+        heapq.heappush(self.duration_heaps[size], (duration, order, job_name))
+
+    def remove(self, job_name: str):
+        _, size, _, _ = self.entries.pop(job_name)
+        bucket = self.buckets[size]
+        # drop the job and lazily removed ones from the bucket head
+        while bucket and bucket[0] not in self.entries:
+            bucket.popleft()
+        heap = self.duration_heaps[size]
+        while heap and heap[0][2] not in self.entries:
+            heapq.heappop(heap)
+        if not bucket:
+            self.buckets[size] = deque()  # release lazily removed entries
+            self.duration_heaps[size] = []
+            self.bucket_sizes.remove(size)
+
+    def oldest(self, size: int) -> str:
+        return self.buckets[size][0]
+
+    def shortest(self, size: int) -> str:
+        return self.duration_heaps[size][0][2]
+
+    def head(self) -> Optional[str]:
+        """
+        Earliest arrived job
+        """
+        if not self.entries:
+            return None
+        return min(
+            (self.oldest(size) for size in self.bucket_sizes),
+            key=lambda job_name: self.entries[job_name][0],
+        )
+
+    def select(
+        self,
+        num_free_gpu: int,
+        current_time: int,
+        release_events: Iterable[Tuple[int, int]] = (),
+    ) -> Optional[str]:
+        """
+        Remove and return the next job to deploy with num_free_gpu free GPUs,
+        or None if the policy deploys nothing more in this window.
+        release_events: (end_time, size) of running jobs by end time, only
+        read by "easy_backfill" when the first job does not fit
+        """
+        if not self.entries:
+            return None
+        if self.policy == "smallest_first":
+            job_name = self.oldest(self.bucket_sizes[0])
+        else:
+            job_name = self.head()
+        if self.entries[job_name][1] <= num_free_gpu:
+            self.remove(job_name)
+            return job_name
+        if self.policy == "easy_backfill":
+            job_name = self.backfill(
+                job_name, num_free_gpu, current_time, release_events
+            )
+            if job_name is not None:
+                self.remove(job_name)
+                return job_name
+        return None
+
+    def backfill(
+        self,
+        head_job: str,
+        num_free_gpu: int,
+        current_time: int,
+        release_events: Iterable[Tuple[int, int]],
+    ) -> Optional[str]:
+        """
+        Earliest arrived job that fits now without delaying the reservation
+        of head_job: it fits into the GPUs left over at the reservation, or
+        ends by then. Each bucket is scanned in arrival order and the scan
+        stops at its first such job, or at jobs arrived after the best
+        candidate so far. Buckets whose shortest job cannot end in time are
+        skipped without a scan.
+        """
+        shadow_time, extra_gpu = self.reservation(
+            self.entries[head_job][1], num_free_gpu, release_events
+        )
+        candidate, candidate_order = None, self.num_pushed
+        for size in self.bucket_sizes[: bisect_right(self.bucket_sizes, num_free_gpu)]:
+            if size <= extra_gpu:
+                job_name = self.oldest(size)
+                if self.entries[job_name][0] < candidate_order:
+                    candidate, candidate_order = job_name, self.entries[job_name][0]
+                continue
+            if current_time + self.duration_heaps[size][0][0] > shadow_time:
+                continue
+            for job_name in self.buckets[size]:
+                entry = self.entries.get(job_name)
+                if entry is None:
+                    continue  # removed lazily
+                order, _, duration, arrival_time = entry
+                if order >= candidate_order:
+                    break
+                if max(arrival_time, current_time) + duration <= shadow_time:
+                    candidate, candidate_order = job_name, order
+                    break
+        return candidate
+
+    @staticmethod
+    def reservation(
+        size: int, num_free_gpu: int, release_events: Iterable[Tuple[int, int]]
+    ) -> Tuple[float, int]:
+        """
+        Earliest time at which size GPUs are free (inf if never), and the
+        number of GPUs left over at that time, with every job ending then.
+        release_events must be ordered by end time, they are read up to the
+        reservation only.
+        """
+        shadow_time = None
+        for end_time, released_size in release_events:
+            if shadow_time is not None and end_time > shadow_time:
+                break
+            num_free_gpu += released_size
+            if shadow_time is None and num_free_gpu >= size:
+                shadow_time = end_time
+        if shadow_time is None:
+            # larger than the cluster, never deployable
+            return float("inf"), 0
+        return shadow_time, num_free_gpu - size
@@ -0,0 +1,261 @@
+import os
+import heapq
+import numpy as np
+from array import array
+from simulate.network_elements import Link
+from typing import Dict, List, Optional, Tuple
+
+
+class LinkRuns:
+    """
+    Run-length-encoded timeline of a single link.
+    Run i covers [starts[i], ends[i]) with num_jobs[i] jobs on the link and
+    contention[i] total pair overlap over the run; idle[i] is the time within
+    the run without flows on the link, left by merging non-adjacent runs.
+    """
+
+    __slots__ = ("starts", "ends", "num_jobs", "contention", "idle")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.num_jobs = array("q")
+        self.contention = array("q")
+        self.idle = array("q")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, start: int, end: int, num_jobs: int, contention: int) -> bool:
+        """
+        Extend the last run if the window continues it with the same occupancy
+        and contention per time unit, return whether a new run was added
+        """
+        if (
+            self.starts
+            and self.ends[-1] == start
+            and self.num_jobs[-1] == num_jobs
+            and self.contention[-1] * (end - start)
+            == contention * (self.ends[-1] - self.starts[-1])
+        ):
+            self.ends[-1] = end
+            self.contention[-1] += contention
+            return False
+        self.starts.append(start)
+        self.ends.append(end)
+        self.num_jobs.append(num_jobs)
+        self.contention.append(contention)
+        self.idle.append(0)
+        return True
+
+    def coarsen(self) -> int:
+        """
+        Merge pairs of consecutive runs: max occupancy, total contention,
+        and the gap between them added to the idle time. Return the number of runs removed.
+        """
+        num_runs = len(self)
+        if num_runs < 2:
+            return 0
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        ends = np.frombuffer(self.ends, dtype=np.int64)
+        num_jobs = np.frombuffer(self.num_jobs, dtype=np.int64)
+        contention = np.frombuffer(self.contention, dtype=np.int64)
+        idle = np.frombuffer(self.idle, dtype=np.int64)
+        first = np.arange(0, num_runs, 2)
+        last = np.minimum(first + 1, num_runs - 1)
+        self.starts = array("q", starts[first].tobytes())
+        self.ends = array("q", ends[last].tobytes())
+        self.num_jobs = array(
+            "q", np.maximum(num_jobs[first], num_jobs[last]).tobytes()
+        )
+        self.contention = array(
+            "q",
+            np.add.reduceat(contention, first).astype(np.int64).tobytes(),
+        )
+        gaps = np.where(last > first, starts[last] - ends[first], 0)
+        self.idle = array(
+            "q",
+            (np.add.reduceat(idle, first) + gaps).astype(np.int64).tobytes(),
+        )
+        return num_runs - len(first)
+
+
+class LinkTimeline:
+    """
+    Per-link occupancy (number of jobs) and contention (sum of pair overlaps)
+    of every window over the whole run, run-length encoded.
+    Windows without flows on a link are not stored.
+    When more than max_runs runs are held, every link is coarsened by merging
+    consecutive runs, which keeps total contention, peak occupancy and time
+    with flows exact.
+    """
+
+    runs: Dict[Link, LinkRuns]
+
+    def __init__(self, max_runs: int = 1000000):
+        self.max_runs = max_runs
+        self.runs = {}
+        self.num_runs = 0
+        self.num_coarsened = 0
+
+    def record(
+        self,
+        start: int,
+        end: int,
+        link_num_jobs: Dict[Link, int],
+        link_conflicts: Dict[Link, int],
+    ):
+        """
+        Record window [start, end)
+        """
+        for link, num_jobs in link_num_jobs.items():
+            if link not in self.runs:
+                self.runs[link] = LinkRuns()
+            self.num_runs += self.runs[link].append(
+                start, end, num_jobs, link_conflicts.get(link, 0)
+            )
+        while self.num_runs > self.max_runs:
+            removed = sum(link_runs.coarsen() for link_runs in self.runs.values())
+            self.num_runs -= removed
+            self.num_coarsened += 1
+            if removed == 0:
+                break
+
+    def link_summary(self, link: Link) -> Tuple[int, int, int]:
+        """
+        Return (total contention, max number of jobs, time with flows)
+        """
+        link_runs = self.runs[link]
+        starts = np.frombuffer(link_runs.starts, dtype=np.int64)
+        ends = np.frombuffer(link_runs.ends, dtype=np.int64)
+        idle = np.frombuffer(link_runs.idle, dtype=np.int64)
+        return (
+            int(np.sum(np.frombuffer(link_runs.contention, dtype=np.int64))),
+            int(np.max(np.frombuffer(link_runs.num_jobs, dtype=np.int64))),
+            int(np.sum(ends - starts - idle)),
+        )
+
+    def hotspot_links(
+        self, k: int = 10, by: str = "contention"
+    ) -> List[Tuple[Link, int, int, int]]:
+        """
+        Top-k links as (link, total contention, max number of jobs, time with flows)
+        by: "contention" or "num_jobs"
+        """
+        key_index = {"contention": 1, "num_jobs": 2}[by]
+        summaries = (
+            (link, *self.link_summary(link))
+            for link, link_runs in self.runs.items()
+            if len(link_runs) > 0
+        )
+        return heapq.nlargest(k, summaries, key=lambda summary: summary[key_index])
+
+    def hotspot_windows(self, k: int = 10) -> List[Tuple[Link, int, int, int, int]]:
+        """
+        Top-k runs by contention per time unit with flows,
+        as (link, start, end, number of jobs, contention)
+        """
+        candidates = []
+        for link, link_runs in self.runs.items():
+            if len(link_runs) == 0:
+                continue
+            starts = np.frombuffer(link_runs.starts, dtype=np.int64)
+            ends = np.frombuffer(link_runs.ends, dtype=np.int64)
+            contention = np.frombuffer(link_runs.contention, dtype=np.int64)
+            idle = np.frombuffer(link_runs.idle, dtype=np.int64)
+            rates = contention / (ends - starts - idle)
+            # only the top-k of each link can be in the overall top-k
+            for i in np.argsort(-rates, kind="stable")[:k].tolist():
+                candidates.append(
+                    (
+                        rates[i],
+                        (
+                            link,
+                            int(starts[i]),
+                            int(ends[i]),
+                            link_runs.num_jobs[i],
+                            link_runs.contention[i],
+                        ),
+                    )
+                )
+        return [run for _, run in heapq.nlargest(k, candidates, key=lambda c: c[0])]
+
+    def heatmap(
+        self, links: List[Link], num_bins: int = 200
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Contention of links (rows) over num_bins equal time bins (columns),
+        each run spread uniformly over its duration. Return (matrix, bin edges).
+        """
+        all_starts = [self.runs[link].starts[0] for link in links if self.runs[link]]
+        all_ends = [self.runs[link].ends[-1] for link in links if self.runs[link]]
+        if not all_starts:
+            return np.zeros((len(links), num_bins)), np.zeros(num_bins + 1)
+        edges = np.linspace(min(all_starts), max(all_ends), num_bins + 1)
+        matrix = np.zeros((len(links), num_bins))
+        for row, link in enumerate(links):
+            link_runs = self.runs[link]
+            starts = np.frombuffer(link_runs.starts, dtype=np.int64)
+            ends = np.frombuffer(link_runs.ends, dtype=np.int64)
+            contention = np.frombuffer(link_runs.contention, dtype=np.int64)
+            # cumulative contention at the bin edges, linear within runs
+            cumulative = np.concatenate([[0], np.cumsum(contention)])
+            points = np.stack([starts, ends], axis=1).ravel()
+            values = np.stack([cumulative[:-1], cumulative[1:]], axis=1).ravel()
+            matrix[row] = np.diff(np.interp(edges, points, values))
+        return matrix, edges
+
+    def save_heatmap(
+        self, file_path: str, k: int = 50, num_bins: int = 200
+    ) -> Optional[str]:
+        """
+        Plot the contention heatmap of the top-k links to file_path (.png),
+        and save the matrix next to it (.npz)
+        """
+        links = [link for link, *_ in self.hotspot_links(k)]
+        if not links:
+            return None
+        matrix, edges = self.heatmap(links, num_bins)
+        file_dir = os.path.dirname(file_path)
+        if file_dir and not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+        np.savez(
+            os.path.splitext(file_path)[0] + ".npz",
+            contention=matrix,
+            bin_edges=edges,
+            links=np.array([str(link) for link in links]),
+        )
+
+        # matplotlib is only needed for plotting, so import it on first use
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(12, max(3, 0.2 * len(links))))
+        image = ax.imshow(
+            matrix,
+            aspect="auto",
+            interpolation="nearest",
+            extent=(edges[0], edges[-1], len(links), 0),
+        )
+        ax.set_yticks(np.arange(len(links)) + 0.5)
+        ax.set_yticklabels([str(link) for link in links], fontsize=6)
+        ax.set_xlabel("time")
+        ax.set_title(f"Link contention (top {len(links)} links)")
+        fig.colorbar(image, ax=ax)
+        fig.tight_layout()
+        fig.savefig(file_path, format="png")
+        plt.close(fig)
+        return file_path
+
+    def report(self, k: int = 5):
+        print(
+            f"[INFO] Link timeline: {len(self.runs)} links, {self.num_runs} runs"
+            f" ({self.num_coarsened} coarsenings)."
+        )
+        for link, contention, max_jobs, busy_time in self.hotspot_links(k):
+            print(
+                f"[INFO] Hotspot {link}: contention {contention}, "
+                f"max {max_jobs} jobs, {busy_time} time with flows."
+            )
@@ -1,8 +1,10 @@
 import math
-from typing import List, Set, Tuple
+import numpy as np
+from typing import Dict, List, Set, Tuple
 
 
 class Link:
+    __slots__ = ("start", "end")
     start: str
     end: str
 
@@ -37,6 +39,15 @@ class ClosTopology:
         self.num_tors = num_tors
         self.servers_per_tor = servers_per_tor
         self.gpus_per_server = gpus_per_server
+        # {(group size, placement signature): inter-ToR links of a ring}
+        self.ring_link_cache: Dict[Tuple[int, bytes], List[Link]] = {}
+        self.routing = "hash"  # "hash" or "least_loaded"
+        # spine of each server under "least_loaded" routing, -1 for the hash
+        self.server_spine = np.full(num_tors * servers_per_tor, -1, dtype=np.int64)
+        # number of jobs on each ToR-spine link under "least_loaded" routing
+        self.link_load = np.zeros((num_tors, num_spines), dtype=np.int64)
+        self.job_route_links: Dict[str, np.ndarray] = {}  # {job_name: link ids}
+        self.job_route_servers: Dict[str, np.ndarray] = {}  # {job_name: server ids}
 
     def get_gpu_route(self, gpu_a: str, gpu_b: str) -> List[Link]:
         """
@@ -52,7 +63,9 @@ class ClosTopology:
         if tor_a == tor_b:
             return route
         else:
-            spine = ((2**31 - 1) * server_a) % self.num_spines  # hash
+            spine = int(self.server_spine[server_a])
+            if spine < 0:
+                spine = ((2**31 - 1) * server_a) % self.num_spines  # hash
             route.append(Link(f"ToR-{tor_a}", f"Spine-{spine}"))
             route.append(Link(f"Spine-{spine}", f"ToR-{tor_b}"))
         return route
@@ -105,16 +118,133 @@ class ClosTopology:
                 link_set = link_set.union(set(route))
             return link_set
 
+        comm_links = []
+        for gpu_group in self.dp_allreduce_gpu_groups(job_gpu_list):
+            comm_links += list(hd_comm_link_set(gpu_group))
+        return comm_links
+
+    def dp_allreduce_gpu_groups(self, job_gpu_list: List[str]) -> List[List[str]]:
+        """
+        Split the GPUs of a job into AllReduce groups, one GPU per DP way
+        """
         max_dp_ways = 4
         job_gpu_num = len(job_gpu_list)
         dp_ways = min(job_gpu_num // self.gpus_per_server, max_dp_ways)
         gpu_num_per_dp_way = job_gpu_num // dp_ways
-        dp_allreduce_gpu_groups = [
-            job_gpu_list[i::gpu_num_per_dp_way] for i in range(gpu_num_per_dp_way)
-        ]
+        return [job_gpu_list[i::gpu_num_per_dp_way] for i in range(gpu_num_per_dp_way)]
+
+    def gpu_spines(self, gpu_ids: np.ndarray) -> np.ndarray:
+        """
+        Spine chosen by get_gpu_route for flows leaving each GPU
+        """
+        servers = gpu_ids // self.gpus_per_server
+        spines = ((2**31 - 1) * servers) % self.num_spines
+        assigned_spines = self.server_spine[servers]
+        return np.where(assigned_spines >= 0, assigned_spines, spines)
+
+    def job_comm_pairs(
+        self, job_gpu_list: List[str], all_reduce_implement: str = "hd"
+    ) -> List[Tuple[str, str]]:
+        comm_pairs = []
+        for gpu_group in self.dp_allreduce_gpu_groups(job_gpu_list):
+            if all_reduce_implement == "ring":
+                comm_pairs += self.ring_comm_pairs(gpu_group)
+            else:
+                comm_pairs += self.hd_comm_pairs(gpu_group)
+        return comm_pairs
+
+    def assign_job_spines(
+        self, job_name: str, job_gpu_list: List[str], all_reduce_implement: str = "hd"
+    ) -> np.ndarray:
+        """
+        Load-aware ECMP: route the inter-ToR flows of each server of the job
+        through the spine whose links to the ToRs involved carry the fewest
+        jobs. Links already used by the job are free, ties go to the hash spine.
+        Return ids (tor * num_spines + spine) of the links used by the job.
+        """
+        comm_pairs = self.job_comm_pairs(job_gpu_list, all_reduce_implement)
+        src_ids = np.array([int(src[4:]) for src, _ in comm_pairs], dtype=np.int64)
+        dst_ids = np.array([int(dst[4:]) for _, dst in comm_pairs], dtype=np.int64)
+        src_tors, dst_tors = self.gpu_tors(src_ids), self.gpu_tors(dst_ids)
+        inter_tor = src_tors != dst_tors
+        src_servers = src_ids[inter_tor] // self.gpus_per_server
+        src_tors, dst_tors = src_tors[inter_tor], dst_tors[inter_tor]
+        servers, server_index = np.unique(src_servers, return_inverse=True)
+        order = np.argsort(server_index, kind="stable")
+        splits = np.cumsum(np.bincount(server_index, minlength=len(servers)))[:-1]
+        used = np.zeros(self.link_load.shape, dtype=bool)
+        for server, pair_index in zip(servers.tolist(), np.split(order, splits)):
+            tors = np.unique(
+                np.concatenate([src_tors[pair_index[:1]], dst_tors[pair_index]])
+            )
+            cost = (self.link_load[tors] * ~used[tors]).sum(axis=0)
+            candidates = (
+                (2**31 - 1) * server + np.arange(self.num_spines)
+            ) % self.num_spines
+            spine = candidates[np.argmin(cost[candidates])]
+            used[tors, spine] = True
+            self.server_spine[server] = spine
+        self.link_load += used
+        self.job_route_links[job_name] = np.flatnonzero(used)
+        self.job_route_servers[job_name] = servers
+        return self.job_route_links[job_name]
+
+    def release_job_spines(self, job_name: str):
+        """
+        Remove the job from the link load counters
+        """
+        link_ids = self.job_route_links.pop(job_name, None)
+        if link_ids is None:
+            return
+        self.link_load.flat[link_ids] -= 1
+        self.server_spine[self.job_route_servers.pop(job_name)] = -1
+
+    def gpu_tors(self, gpu_ids: np.ndarray) -> np.ndarray:
+        return gpu_ids // (self.servers_per_tor * self.gpus_per_server)
+
+    def ring_comm_pairs(self, gpu_group: List[str]) -> List[Tuple[str, str]]:
+        """
+        Return GPU pairs of Ring AllReduce, each GPU sends to the next one
+        """
+        if len(gpu_group) == 1:
+            return []
+        return list(zip(gpu_group, gpu_group[1:] + gpu_group[:1]))
+
+    def ring_comm_link_set(self, gpu_group: List[str]) -> List[Link]:
+        """
+        Inter-ToR links occupied by one Ring AllReduce operation.
+        The links only depend on the (ToR, spine) of each GPU in ring order,
+        so they are memoized on that placement signature.
+        """
+        gpu_ids = np.array([int(gpu[4:]) for gpu in gpu_group], dtype=np.int64)
+        tors = self.gpu_tors(gpu_ids)
+        spines = self.gpu_spines(gpu_ids)
+        signature = (tors * self.num_spines + spines).astype(np.int32).tobytes()
+        key = (len(gpu_group), signature)
+        if key not in self.ring_link_cache:
+            next_tors = np.roll(tors, -1)
+            inter_tor = tors != next_tors
+            # both hops use the spine of the sender: ToR_a - Spine, Spine - ToR_b
+            uplinks = tors[inter_tor] * self.num_spines + spines[inter_tor]
+            downlinks = next_tors[inter_tor] * self.num_spines + spines[inter_tor]
+            link_ids = np.unique(np.concatenate([uplinks, downlinks]))
+            self.ring_link_cache[key] = [
+                Link(f"ToR-{tor}", f"Spine-{spine}")
+                for tor, spine in zip(
+                    (link_ids // self.num_spines).tolist(),
+                    (link_ids % self.num_spines).tolist(),
+                )
+            ]
+        return self.ring_link_cache[key]
+
+    def ring_comm_link_list(self, job_gpu_list: List[str]) -> List[Link]:
+        """
+        Return: Links occupied in Ring AllReduce process
+        Note that same link may appear multiple times if it appears in different AllReduce ops
+        """
         comm_links = []
-        for gpu_group in dp_allreduce_gpu_groups:
-            comm_links += list(hd_comm_link_set(gpu_group))
+        for gpu_group in self.dp_allreduce_gpu_groups(job_gpu_list):
+            comm_links += self.ring_comm_link_set(gpu_group)
         return comm_links
 
     def rdma_operate_tuples(
@@ -157,23 +287,37 @@ class ClosTopology:
             rdma_operate_tuples.append([t1, t2, t3, t4])
         return rdma_operate_tuples
 
+    def ring_rdma_operate_tuples(
+        self, gpu_group: List[str], msg_len: int
+    ) -> List[List[Tuple[str, str, int]]]:
+        """
+        Return RDMA 3-tuples: (src_node, dst_node, msg_len) for single Ring AllReduce group
+        2 * (n - 1) phases (reduce-scatter then all-gather) in which every GPU
+        sends a 1/n chunk to the next one. All phases share the same list.
+        """
+        num_gpus = len(gpu_group)
+        if num_gpus == 1:
+            return []
+        chunk_len = msg_len // num_gpus
+        phase = [(src, dst, chunk_len) for src, dst in self.ring_comm_pairs(gpu_group)]
+        return [phase] * (2 * (num_gpus - 1))
+
     def job_rdma_operates_tuples(
-        self, job_gpu_list: List[str], msg_len: int
+        self, job_gpu_list: List[str], msg_len: int, all_reduce_implement: str = "hd"
     ) -> List[List[List[Tuple[str, str, int]]]]:
         """
         Return RDMA 3-tuples: (src_node, dst_node, msg_len) for single job
-        The 3-layer lists represent job > AllReduce group > phases in HD
+        The 3-layer lists represent job > AllReduce group > phases
+        all_reduce_implement: "hd" or "ring"
         """
-        max_dp_ways = 4
-        job_gpu_num = len(job_gpu_list)
-        dp_ways = min(job_gpu_num // self.gpus_per_server, max_dp_ways)
-        gpu_num_per_dp_way = job_gpu_num // dp_ways
-        dp_allreduce_gpu_groups = [
-            job_gpu_list[i::gpu_num_per_dp_way] for i in range(gpu_num_per_dp_way)
-        ]
         job_rdma_operates_tuples = []
-        for gpu_group in dp_allreduce_gpu_groups:
-            job_rdma_operates_tuples.append(
-                self.rdma_operate_tuples(gpu_group, msg_len)
-            )
+        for gpu_group in self.dp_allreduce_gpu_groups(job_gpu_list):
+            if all_reduce_implement == "ring":
+                job_rdma_operates_tuples.append(
+                    self.ring_rdma_operate_tuples(gpu_group, msg_len)
+                )
+            else:
+                job_rdma_operates_tuples.append(
+                    self.rdma_operate_tuples(gpu_group, msg_len)
+                )
         return job_rdma_operates_tuples
@@ -1,19 +1,18 @@
 import os
 import networkx as nx
 from itertools import combinations
-import matplotlib
 import params
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict
-from utils import cal_job_conflicts
+from utils import cal_job_conflicts, ShiftEvaluator
 from simulate.network_elements import Link, ClosTopology
-from typing import Tuple, Dict, List
+from simulate.link_timeline import LinkTimeline
+from simulate.job_interval_index import JobIntervalIndex
+from typing import Tuple, Dict, List, Optional
 
 
 class TrafficPattern:
+    __slots__ = ("interval", "T")
     interval: Tuple[int, int]
     T: int
 
@@ -28,6 +27,39 @@ class TrafficPattern:
         self.interval = (t1, t2)
 
 
+class TrafficSnapshot:
+    """
+    Immutable copy of the TrafficManager state needed for the conflict
+    accounting and output of one window
+    """
+
+    version: int
+    current_time: int
+    time_next: int
+    link_traffic_pattern: Dict[Link, Dict[str, TrafficPattern]]
+    job_traffic_pattern: Dict[str, TrafficPattern]
+    job_time_period: Dict[str, Tuple[int, int]]
+    running_jobs: List[str]
+
+    def __init__(
+        self,
+        version: int,
+        current_time: int,
+        time_next: int,
+        link_traffic_pattern: Dict[Link, Dict[str, TrafficPattern]],
+        job_traffic_pattern: Dict[str, TrafficPattern],
+        job_time_period: Dict[str, Tuple[int, int]],
+        running_jobs: List[str],
+    ):
+        self.version = version
+        self.current_time = current_time
+        self.time_next = time_next
+        self.link_traffic_pattern = link_traffic_pattern
+        self.job_traffic_pattern = job_traffic_pattern
+        self.job_time_period = job_time_period
+        self.running_jobs = running_jobs
+
+
 class TrafficManager:
     current_time: int
     link_traffic_pattern: Dict[
@@ -40,6 +72,13 @@ class TrafficManager:
     running_jobs: List[str]
     ended_jobs: List[str]
     penalty_time: Dict[str, int]
+    overlap_stats: Dict[str, int]
+    version: int  # bumped on every change of patterns or time periods
+    accounted_version: int  # version of the last snapshot accounted
+    link_timeline: Optional[LinkTimeline]
+    job_index: (
+        JobIntervalIndex  # lifetimes of running jobs, synced with job_time_period
+    )
 
     def __init__(self):
         self.current_time = 0
@@ -49,10 +88,19 @@ class TrafficManager:
         self.running_jobs = []
         self.ended_jobs = []
         self.penalty_time = {}
+        # job pairs evaluated per link vs. distinct pairs whose overlap was computed
+        self.overlap_stats = {"link_pairs": 0, "distinct_pairs": 0}
+        self.version = 0
+        self.accounted_version = -1
+        self.link_timeline = None  # per-link occupancy and contention if set
+        self.job_index = JobIntervalIndex()
+        self.shift_evaluator = None  # what-if evaluator of the current state
 
     def add_job(self, job_name: str, start_time: int, end_time: int):
         self.running_jobs.append(job_name)
         self.job_time_period[job_name] = (start_time, end_time)
+        self.job_index.add(job_name, start_time, end_time)
+        self.version += 1
 
     def add_traffic_pattern(
         self, link: Link, job_name: str, interval: Tuple[int, int], T: int
@@ -60,6 +108,7 @@ class TrafficManager:
         """
         Add traffic pattern to a specific link for a given job
         """
+        self.version += 1
         if link not in self.link_traffic_pattern:
             self.link_traffic_pattern[link] = {}
         pattern = TrafficPattern(interval, T)
@@ -74,8 +123,10 @@ class TrafficManager:
         """
         Unify traffic intervals of the same job.
         Should be called after update of link_traffic_pattern.
+        Patterns of released jobs are kept for the output of their last window,
+        until drop_job_patterns.
         """
-        self.job_traffic_pattern = {}
+        self.version += 1
         # Update job traffic pattern
         for link, jobs in self.link_traffic_pattern.items():
             for job_name, pattern in jobs.items():
@@ -96,40 +147,217 @@ class TrafficManager:
         Update the intervals for each job based on the provided delay dictionary
         Should be called after unify_traffic_pattern
         """
+        self.version += 1
         for job_name, delay in delay_dict.items():
             T = self.job_traffic_pattern[job_name].T
             start_time, end_time = self.job_time_period[job_name]
             start_time += delay % T
             end_time += delay % T
             self.job_time_period[job_name] = (start_time, end_time)
+            if job_name in self.job_index:
+                self.job_index.update(job_name, start_time, end_time)
 
-    def update_traffic(self, time_next: int) -> Dict[str, int]:
+    def cal_window_conflicts(
+        self, time_next: int, link_conflicts: Optional[Dict[Link, int]] = None
+    ) -> Dict[str, int]:
         """
-        Update penalty in time window [current_time, time_next],
-        and then update current_time to time_next.
-        Return job_conflicts.
+        Max conflict of each job over links in time window [current_time, time_next]
+        link_conflicts: optional dict filled with the contention of each link
         """
-        job_conflicts = cal_job_conflicts(
+        return cal_job_conflicts(
             self.link_traffic_pattern,
             self.job_time_period,
             self.current_time,
             time_next,
+            self.overlap_stats,
+            link_conflicts,
+            self.job_index.active(self.current_time, time_next),
         )
-        # Update each job's end time based on the calculated delay
+
+    def snapshot_conflicts(
+        self,
+        snapshot: TrafficSnapshot,
+        link_conflicts: Optional[Dict[Link, int]] = None,
+    ) -> Dict[str, int]:
+        """
+        Max conflict of each job over links in the window of snapshot
+        """
+        return cal_job_conflicts(
+            snapshot.link_traffic_pattern,
+            snapshot.job_time_period,
+            snapshot.current_time,
+            snapshot.time_next,
+            self.overlap_stats,
+            link_conflicts,
+        )
+
+    def get_shift_evaluator(
+        self, time_next: int, current_time: Optional[int] = None
+    ) -> ShiftEvaluator:
+        """
+        ShiftEvaluator of window [current_time, time_next] in the current state,
+        rebuilt only when the state or the window changed.
+        current_time defaults to self.current_time.
+        """
+        if current_time is None:
+            current_time = self.current_time
+        evaluator = self.shift_evaluator
+        if (
+            evaluator is None
+            or evaluator.version != self.version
+            or evaluator.current_time != current_time
+            or evaluator.new_time != time_next
+        ):
+            evaluator = ShiftEvaluator(
+                self.link_traffic_pattern,
+                self.job_time_period,
+                self.job_traffic_pattern,
+                current_time,
+                time_next,
+                self.version,
+            )
+            self.shift_evaluator = evaluator
+        return evaluator
+
+    def evaluate_time_shifts(
+        self,
+        time_shifts: Dict[str, int],
+        time_next: int,
+        current_time: Optional[int] = None,
+    ) -> Tuple[Dict[str, int], int]:
+        """
+        Predict the job conflicts in window [current_time, time_next] if
+        time_shifts were applied by update_job_time_periods, without changing
+        any state. Return ({job_name: conflict}, total conflict).
+        current_time defaults to self.current_time.
+        """
+        return self.get_shift_evaluator(time_next, current_time).evaluate(time_shifts)
+
+    def update_traffic(self, time_next: int) -> Dict[str, int]:
+        """
+        Update penalty in time window [current_time, time_next],
+        and then update current_time to time_next.
+        Return job_conflicts.
+        """
+        link_conflicts = {} if self.link_timeline is not None else None
+        job_conflicts = self.cal_window_conflicts(time_next, link_conflicts)
+        self.add_penalty(job_conflicts)
+        if self.link_timeline is not None:
+            self.link_timeline.record(
+                self.current_time,
+                time_next,
+                {link: len(jobs) for link, jobs in self.link_traffic_pattern.items()},
+                link_conflicts,
+            )
+        # Jobs' end_time affected by conflicts
+        # self.update_job_time_periods(job_conflicts)
+        self.current_time = time_next
+        return job_conflicts
+
+    def add_penalty(self, job_conflicts: Dict[str, int]):
         for job_name, conflict in job_conflicts.items():
             if job_name not in self.penalty_time:
                 self.penalty_time[job_name] = conflict
             else:
                 self.penalty_time[job_name] += conflict
-        # Jobs' end_time affected by conflicts
-        # self.update_job_time_periods(job_conflicts)
-        self.current_time = time_next
+
+    def snapshot(self, time_next: int, job_list: List[str]) -> TrafficSnapshot:
+        """
+        Copy the state of window [current_time, time_next] so that it can be
+        accounted later while the live state moves on to the next window.
+        job_list: jobs whose pattern and time period are needed for the output
+        """
+        self.version += 1
+        link_traffic_pattern = {
+            link: {
+                job_name: TrafficPattern(tuple(pattern.interval), pattern.T)
+                for job_name, pattern in jobs.items()
+            }
+            for link, jobs in self.link_traffic_pattern.items()
+        }
+        job_names = set(job_list).union(*link_traffic_pattern.values())
+        job_traffic_pattern = {
+            job_name: TrafficPattern(tuple(pattern.interval), pattern.T)
+            for job_name, pattern in (
+                (job_name, self.job_traffic_pattern.get(job_name))
+                for job_name in job_names
+            )
+            if pattern is not None
+        }
+        job_time_period = {
+            job_name: self.job_time_period[job_name] for job_name in job_names
+        }
+        return TrafficSnapshot(
+            self.version,
+            self.current_time,
+            time_next,
+            link_traffic_pattern,
+            job_traffic_pattern,
+            job_time_period,
+            list(self.running_jobs),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: TrafficSnapshot) -> "TrafficManager":
+        """
+        TrafficManager holding the state of snapshot, e.g. for a solver to run
+        on while the live state moves on
+        """
+        traffic_manager = TrafficManager()
+        traffic_manager.current_time = snapshot.current_time
+        traffic_manager.link_traffic_pattern = snapshot.link_traffic_pattern
+        traffic_manager.job_traffic_pattern = snapshot.job_traffic_pattern
+        traffic_manager.running_jobs = list(snapshot.running_jobs)
+        for job_name in snapshot.running_jobs:
+            traffic_manager.job_time_period[job_name] = snapshot.job_time_period[
+                job_name
+            ]
+            traffic_manager.job_index.add(job_name, *snapshot.job_time_period[job_name])
+        return traffic_manager
+
+    def update_traffic_from_snapshot(self, snapshot: TrafficSnapshot) -> Dict[str, int]:
+        """
+        Update penalty of the window captured by snapshot.
+        Unlike update_traffic, current_time is left untouched.
+        Snapshots must be accounted in the order they were taken.
+        """
+        assert (
+            snapshot.version > self.accounted_version
+        ), f"snapshot version {snapshot.version} already accounted"
+        link_conflicts = {} if self.link_timeline is not None else None
+        job_conflicts = self.snapshot_conflicts(snapshot, link_conflicts)
+        self.add_penalty(job_conflicts)
+        if self.link_timeline is not None:
+            self.link_timeline.record(
+                snapshot.current_time,
+                snapshot.time_next,
+                {
+                    link: len(jobs)
+                    for link, jobs in snapshot.link_traffic_pattern.items()
+                },
+                link_conflicts,
+            )
+        self.accounted_version = snapshot.version
         return job_conflicts
 
+    def report_overlap_stats(self):
+        """
+        Print how many overlap calculations were saved by sharing pair overlaps
+        across links
+        """
+        link_pairs = self.overlap_stats["link_pairs"]
+        distinct_pairs = self.overlap_stats["distinct_pairs"]
+        saved = 1 - distinct_pairs / link_pairs if link_pairs > 0 else 0
+        print(
+            f"[INFO] Overlap calculations: {distinct_pairs} distinct job pairs "
+            f"for {link_pairs} link job pairs ({saved:.1%} saved)."
+        )
+
     def release_single_job(self, job_name: str):
         """
         Release given job from link traffic pattern
         """
+        self.version += 1
         for jobs in self.link_traffic_pattern.values():
             if job_name in jobs:
                 del jobs[job_name]
@@ -138,19 +366,45 @@ class TrafficManager:
         }  # filter out links with no flows
         self.running_jobs.remove(job_name)
         self.ended_jobs.append(job_name)
+        self.job_index.remove(job_name)
+
+    def remove_job_flows(self, job_name: str):
+        """
+        Remove the flows of a running job from link traffic pattern,
+        e.g. before routing them again
+        """
+        self.version += 1
+        for jobs in self.link_traffic_pattern.values():
+            if job_name in jobs:
+                del jobs[job_name]
+        self.link_traffic_pattern = {
+            link: jobs for link, jobs in self.link_traffic_pattern.items() if jobs != {}
+        }
+        # recomputed by the next unify_traffic_pattern
+        self.job_traffic_pattern.pop(job_name, None)
+
+    def drop_job_patterns(self, job_names: List[str]):
+        """
+        Forget the patterns of released jobs once their last window is output
+        """
+        for job_name in job_names:
+            self.job_traffic_pattern.pop(job_name, None)
 
     def release_jobs(self, time_next: int) -> List[str]:
         """
         Release jobs finish in time window [current_time, time_next]
         """
-        released_jobs = []
-        running_jobs = self.running_jobs.copy()
-        for job_name in running_jobs:
-            if self.job_time_period[job_name][1] <= time_next:
-                self.release_single_job(job_name)
-                released_jobs.append(job_name)
+        released_jobs = self.job_index.ending_before(time_next)
+        for job_name in released_jobs:
+            self.release_single_job(job_name)
         return released_jobs
 
+    def close(self):
+        """
+        Release resources held by the backend (none for the in-process one)
+        """
+        pass
+
     def get_link_list(self) -> List[Link]:
         """
         Return links that have flows on them
@@ -161,9 +415,7 @@ class TrafficManager:
         job_duration = defaultdict(lambda: defaultdict(int))  # {link: {job: duration}}
         for link, jobs in self.link_traffic_pattern.items():
             for job, pattern in jobs.items():
-                job_duration[link][job] = sum(
-                    end - start for start, end in pattern["intervals"]
-                )
+                job_duration[link][job] = pattern.interval[1] - pattern.interval[0]
         return job_duration
 
     def get_conflict_graph(self):
@@ -177,8 +429,28 @@ class TrafficManager:
                     conflict_graph.add_edge(job_1, job_2, weight=1)
         return conflict_graph
 
-    def draw_conflict_graph(self, file_dir):
+    def draw_conflict_graph(self, file_dir, renderer=None, time=None):
+        """
+        Draw the conflict graph of window start time to file_dir.
+        time defaults to current_time, pass the window start once update_traffic
+        has moved current_time to the next window.
+        Large graphs should pass a ConflictGraphRenderer, which caches the
+        layout across windows and draws frames in the background.
+        """
+        if time is None:
+            time = self.current_time
         conflict_graph = self.get_conflict_graph()
+        current_hours = (time * params.time_slot) / (1000 * 60)
+        title = f"Conflict Graph (time={current_hours:.1f}h)"
+        if renderer is not None:
+            return renderer.draw(conflict_graph, title, str(time))
+
+        # matplotlib is only needed for plotting, so import it on first use
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
         pos = nx.spring_layout(conflict_graph, k=0.5, seed=10396953)
 
         fig, ax = plt.subplots(figsize=(8, 8))
@@ -193,11 +465,12 @@ class TrafficManager:
             conflict_graph, pos, edge_labels=edge_labels, ax=ax
         )
 
-        current_hours = (self.current_time * params.time_slot) / (1000 * 60)
-        ax.set_title(f"Conflict Graph (time={current_hours:.1f}h)")
+        ax.set_title(title)
         ax.set_axis_off()
 
         if not os.path.exists(file_dir):
             os.makedirs(file_dir)
-        file_path = os.path.join(file_dir, f"{self.current_time}.png")
+        file_path = os.path.join(file_dir, f"{time}.png")
         fig.savefig(file_path, format="png")
+        plt.close(fig)
+        return file_path
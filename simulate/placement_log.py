@@ -0,0 +1,213 @@
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"PLOG"
+HEADER = struct.Struct("<4sHI")  # magic, format version, number of GPUs
+RECORD = struct.Struct("<BqI")  # kind, time, payload length
+JOB = struct.Struct("<I")  # job id
+KEYFRAME_JOB = struct.Struct("<IqI")  # job id, assign time, number of ranges
+
+NAME, ASSIGN, RELEASE, KEYFRAME = range(4)
+
+
+def gpu_ranges(gpu_ids: List[int]) -> array:
+    """
+    Encode GPU ids as flat (first id, count) pairs of consecutive ids
+    """
+    ranges = array("i")
+    for gpu_id in gpu_ids:
+        if ranges and ranges[-2] + ranges[-1] == gpu_id:
+            ranges[-1] += 1
+        else:
+            ranges.extend((gpu_id, 1))
+    return ranges
+
+
+def expand_gpu_ranges(ranges: array) -> List[int]:
+    return [
+        gpu_id
+        for first, count in zip(ranges[::2], ranges[1::2])
+        for gpu_id in range(first, first + count)
+    ]
+
+
+class PlacementLog:
+    """
+    Append-only binary log of GPU assign/release events, replacing a
+    GPUManager.save_snapshot per window.
+    An assign stores the job's GPUs as ranges of consecutive ids, a release
+    only the job, and each job name is written once. A keyframe listing the
+    placed jobs is written by checkpoint() once keyframe_interval events
+    passed, so PlacementLogReader replays a bounded number of events and the
+    file grows with events, not with windows x GPUs.
+    """
+
+    def __init__(self, file_path: str, num_gpu: int, keyframe_interval: int = 4096):
+        file_dir = os.path.dirname(file_path)
+        if file_dir and not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+        self.file_path = file_path
+        self.keyframe_interval = keyframe_interval
+        self.file = open(file_path, "wb")
+        self.file.write(HEADER.pack(MAGIC, 1, num_gpu))
+        self.job_ids = {}  # {job_name: job id}
+        self.placed = {}  # {job id: (assign time, GPU ranges)}
+        self.num_events = 0
+        self.num_keyframes = 0
+        self.events_since_keyframe = 0
+
+    def write(self, kind: int, time: int, payload: bytes):
+        self.file.write(RECORD.pack(kind, time, len(payload)))
+        self.file.write(payload)
+
+    def assign(self, time: int, job_name: str, gpu_ids: List[int]):
+        if job_name not in self.job_ids:
+            job_id = len(self.job_ids)
+            self.job_ids[job_name] = job_id
+            self.write(NAME, 0, JOB.pack(job_id) + job_name.encode())
+        job_id = self.job_ids[job_name]
+        ranges = gpu_ranges(gpu_ids)
+        self.placed[job_id] = (time, ranges)
+        self.write(ASSIGN, time, JOB.pack(job_id) + ranges.tobytes())
+        self.num_events += 1
+        self.events_since_keyframe += 1
+
+    def release(self, time: int, job_name: str):
+        job_id = self.job_ids[job_name]
+        del self.placed[job_id]
+        self.write(RELEASE, time, JOB.pack(job_id))
+        self.num_events += 1
+        self.events_since_keyframe += 1
+
+    def checkpoint(self, time: int):
+        """
+        Write a keyframe at time if it is due.
+        The simulator calls this at the start of each window: jobs released
+        before have ended by time and jobs assigned later start at or after it.
+        """
+        if self.events_since_keyframe < self.keyframe_interval:
+            return
+        payload = bytearray()
+        for job_id, (assign_time, ranges) in self.placed.items():
+            payload += KEYFRAME_JOB.pack(job_id, assign_time, len(ranges) // 2)
+            payload += ranges.tobytes()
+        self.write(KEYFRAME, time, bytes(payload))
+        self.num_keyframes += 1
+        self.events_since_keyframe = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def report(self):
+        print(
+            f"[INFO] Placement log {self.file_path}: {self.num_events} events, "
+            f"{self.num_keyframes} keyframes, {os.path.getsize(self.file_path)} bytes."
+        )
+
+
+class PlacementLogReader:
+    """
+    Reconstruct placements from a PlacementLog file.
+    Opening the file scans the record headers once for job names and
+    keyframe offsets; placement_at(t) then starts from the last keyframe at
+    or before t and replays the events up to the next keyframe.
+    """
+
+    job_names: List[str]  # by job id
+    keyframes: List[Tuple[int, int]]  # (time, offset of the record)
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self.data = file.read()
+        magic, version, self.num_gpu = HEADER.unpack_from(self.data)
+        assert magic == MAGIC and version == 1, f"{file_path} is not a placement log"
+        self.job_names = []
+        self.keyframes = []
+        for kind, time, offset, payload in self.records(HEADER.size):
+            if kind == NAME:
+                self.job_names.append(bytes(payload[JOB.size :]).decode())
+            elif kind == KEYFRAME:
+                self.keyframes.append((time, offset))
+        self.keyframe_times = [time for time, _ in self.keyframes]
+
+    def records(
+        self, offset: int, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int, memoryview]]:
+        """
+        Yield (kind, time, offset, payload) of the records from offset
+        """
+        data = memoryview(self.data)
+        end = len(self.data) if end is None else end
+        while offset < end:
+            kind, time, length = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            yield kind, time, offset, data[start : start + length]
+            offset = start + length
+
+    def events(self) -> Iterator[Tuple[str, int, str, List[int]]]:
+        """
+        Yield ("assign" | "release", time, job_name, GPU ids) in log order,
+        a release has no GPU ids
+        """
+        for kind, time, _, payload in self.records(HEADER.size):
+            if kind == ASSIGN:
+                (job_id,) = JOB.unpack_from(payload)
+                ranges = array("i", bytes(payload[JOB.size :]))
+                yield "assign", time, self.job_names[job_id], expand_gpu_ranges(ranges)
+            elif kind == RELEASE:
+                (job_id,) = JOB.unpack_from(payload)
+                yield "release", time, self.job_names[job_id], []
+
+    def placement_at(self, time: int) -> Dict[str, List[int]]:
+        """
+        GPUs of each job placed at time, i.e. assigned at or before time and
+        released after it
+        """
+        i = bisect_right(self.keyframe_times, time)
+        lifetimes = {}  # {job id: [assign time, release time, GPU ranges]}
+        if i > 0:
+            _, offset = self.keyframes[i - 1]
+            kind, _, _, payload = next(self.records(offset))
+            position = 0
+            while position < len(payload):
+                job_id, assign_time, num_ranges = KEYFRAME_JOB.unpack_from(
+                    payload, position
+                )
+                position += KEYFRAME_JOB.size
+                ranges = array(
+                    "i", bytes(payload[position : position + 8 * num_ranges])
+                )
+                position += 8 * num_ranges
+                lifetimes[job_id] = [assign_time, None, ranges]
+            start = offset
+        else:
+            start = HEADER.size
+        end = self.keyframes[i][1] if i < len(self.keyframes) else None
+        for kind, event_time, _, payload in self.records(start, end):
+            if kind == ASSIGN:
+                (job_id,) = JOB.unpack_from(payload)
+                ranges = array("i", bytes(payload[JOB.size :]))
+                lifetimes[job_id] = [event_time, None, ranges]
+            elif kind == RELEASE:
+                (job_id,) = JOB.unpack_from(payload)
+                lifetimes[job_id][1] = event_time
+        return {
+            self.job_names[job_id]: expand_gpu_ranges(ranges)
+            for job_id, (assign_time, release_time, ranges) in lifetimes.items()
+            if assign_time <= time and (release_time is None or release_time > time)
+        }
+
+    def gpu_usage_at(self, time: int) -> List[Optional[str]]:
+        """
+        Placement at time in the layout of GPUManager.gpu_usage
+        """
+        gpu_usage = [None] * self.num_gpu
+        for job_name, gpu_ids in self.placement_at(time).items():
+            for gpu_id in gpu_ids:
+                gpu_usage[gpu_id] = job_name
+        return gpu_usage
@@ -0,0 +1,135 @@
+import os
+import numpy as np
+from fractions import Fraction
+from .network_elements import ClosTopology
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# one RDMA operation of a template phase:
+# source and destination position in the group, msg_len * numerator // denominator
+TEMPLATE_COLUMNS = 4
+
+
+class RdmaOperateStore:
+    """
+    Compact replacement of the {job_name: job_rdma_operates_tuples(...)} dict.
+    A job only keeps its GPU ids (int32) and msg_len. The phases of an
+    AllReduce group depend on the group size alone, so they are kept once per
+    size as templates over positions in the group, and the (src, dst, msg_len)
+    tuples are expanded on access. With spill_path set, spill() moves the GPU
+    ids of ended jobs to a file, leaving (offset, size, msg_len) in memory.
+    """
+
+    templates: Dict[int, List[np.ndarray]]  # {group size: [phase template]}
+    job_gpu_ids: Dict[str, np.ndarray]
+    job_msg_len: Dict[str, int]
+    spilled: Dict[str, Tuple[int, int]]  # {job_name: (offset, number of GPUs)}
+
+    def __init__(
+        self,
+        topology: ClosTopology,
+        all_reduce_implement: str = "hd",
+        spill_path: Optional[str] = None,
+    ):
+        self.topology = topology
+        self.all_reduce_implement = all_reduce_implement
+        self.spill_path = spill_path
+        self.templates = {}
+        self.job_gpu_ids = {}
+        self.job_msg_len = {}
+        self.spilled = {}
+        if spill_path is not None:
+            spill_dir = os.path.dirname(spill_path)
+            if spill_dir and not os.path.exists(spill_dir):
+                os.makedirs(spill_dir)
+            open(spill_path, "wb").close()
+
+    def __contains__(self, job_name: str) -> bool:
+        return job_name in self.job_msg_len
+
+    def __len__(self) -> int:
+        return len(self.job_msg_len)
+
+    def __getitem__(self, job_name: str) -> List[List[List[Tuple[str, str, int]]]]:
+        """
+        Same nested lists as ClosTopology.job_rdma_operates_tuples
+        """
+        return list(self.iter_groups(job_name))
+
+    def add(self, job_name: str, job_gpu_list: List[str], msg_len: int):
+        self.job_gpu_ids[job_name] = np.array(
+            [int(gpu[len("GPU-") :]) for gpu in job_gpu_list], dtype=np.int32
+        )
+        self.job_msg_len[job_name] = msg_len
+
+    def template(self, group_size: int) -> List[np.ndarray]:
+        """
+        Phases of one AllReduce group of group_size GPUs, built by the
+        topology on positions 0..group_size-1
+        """
+        if group_size not in self.templates:
+            # divisible by every group size, so msg_len ratios are exact
+            probe_len = group_size << 20
+            positions = list(range(group_size))
+            if self.all_reduce_implement == "ring":
+                phases = self.topology.ring_rdma_operate_tuples(positions, probe_len)
+            else:
+                phases = self.topology.rdma_operate_tuples(positions, probe_len)
+            template = []
+            for phase in phases:
+                rows = []
+                for src, dst, msg_len in phase:
+                    ratio = Fraction(msg_len, probe_len)
+                    rows.append((src, dst, ratio.numerator, ratio.denominator))
+                template.append(
+                    np.array(rows, dtype=np.int64).reshape(-1, TEMPLATE_COLUMNS)
+                )
+            self.templates[group_size] = template
+        return self.templates[group_size]
+
+    def gpu_ids(self, job_name: str) -> np.ndarray:
+        if job_name in self.job_gpu_ids:
+            return self.job_gpu_ids[job_name]
+        offset, num_gpus = self.spilled[job_name]
+        with open(self.spill_path, "rb") as file:
+            file.seek(offset)
+            return np.frombuffer(file.read(4 * num_gpus), dtype=np.int32)
+
+    def iter_groups(self, job_name: str) -> Iterator[List[List[Tuple[str, str, int]]]]:
+        """
+        Expand the (src_node, dst_node, msg_len) tuples of a job one
+        AllReduce group at a time, as lists of phases
+        """
+        msg_len = self.job_msg_len[job_name]
+        gpu_ids = self.gpu_ids(job_name).tolist()
+        for gpu_group in self.topology.dp_allreduce_gpu_groups(gpu_ids):
+            yield [
+                [
+                    (
+                        f"GPU-{gpu_group[src]}",
+                        f"GPU-{gpu_group[dst]}",
+                        msg_len * numerator // denominator,
+                    )
+                    for src, dst, numerator, denominator in phase.tolist()
+                ]
+                for phase in self.template(len(gpu_group))
+            ]
+
+    def spill(self, job_name: str):
+        """
+        Move the GPU ids of job_name to the spill file, if there is one
+        """
+        if self.spill_path is None or job_name not in self.job_gpu_ids:
+            return
+        gpu_ids = self.job_gpu_ids.pop(job_name)
+        with open(self.spill_path, "ab") as file:
+            offset = file.tell()
+            file.write(gpu_ids.tobytes())
+        self.spilled[job_name] = (offset, len(gpu_ids))
+
+    def nbytes(self) -> int:
+        """
+        Memory held by GPU ids and templates
+        """
+        return sum(gpu_ids.nbytes for gpu_ids in self.job_gpu_ids.values()) + sum(
+            phase.nbytes for template in self.templates.values() for phase in template
+        )
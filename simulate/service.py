@@ -0,0 +1,494 @@
+import json
+import time
+import heapq
+import params
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .job import Job
+from .job_queue import JobQueue
+from .simulator import Simulator
+from .network_traffic_management import TrafficManager
+from typing import Dict, List, Optional, Tuple
+
+
+def _asyncio():
+    """
+    asyncio, imported on first use: only the online mode needs it, and
+    simulate imports this module eagerly
+    """
+    import asyncio
+
+    return asyncio
+
+
+class SchedulingService:
+    """
+    Online mode of Simulator: an asyncio server on a local TCP socket taking
+    one JSON request per line and answering one JSON reply per line.
+    Requests:
+        {"op": "submit", "job": name, "time": t, "size": n, "duration": d,
+         "model_type": m}
+        {"op": "complete", "job": name, "time": t}
+        {"op": "placement", "job": name}
+        {"op": "reoptimize", "time": t}
+        {"op": "stats"}
+    submit and complete reply with the jobs they deployed as
+    {"job", "time", "gpus", "shift"}; a submitted job waits in the queue of
+    scheduling_policy while GPUs are short. stats replies with
+    {"latency": {op: ...}, "accounting": {"accounted", "pending", "errors"}}.
+    A deployed job only gets the best of num_candidate_shifts shifts of its
+    own, scored by TrafficManager.evaluate_time_shifts over one hyper-period
+    of the traffic patterns from its start; the solver of
+    simulator.method re-optimizes all jobs in the background every
+    reoptimize_every events. It runs on a snapshot without holding the lock,
+    which is only taken again to apply the shifts of the jobs whose time
+    period did not change meanwhile. Requests run one at a time in a worker
+    thread, their latency (including the wait for the lock) is reported
+    against slo_ms. Elapsed windows are snapshotted and their conflicts
+    accounted in another thread, as in Simulator.run_windows_pipelined;
+    accounting errors are reported by stats and raised by close.
+    """
+
+    latencies: Dict[str, List[float]]  # {op: [ms]}
+
+    def __init__(
+        self,
+        simulator: Optional[Simulator] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        num_candidate_shifts: int = 16,
+        reoptimize_every: int = 64,
+        slo_ms: float = 50.0,
+    ):
+        if simulator is None:
+            simulator = Simulator()
+            simulator.method = "cassini"
+        self.simulator = simulator
+        if simulator.job_queue is None:
+            simulator.job_queue = JobQueue(simulator.scheduling_policy)
+        self.host = host
+        self.port = port
+        self.num_candidate_shifts = num_candidate_shifts
+        self.reoptimize_every = reoptimize_every
+        self.slo_ms = slo_ms
+        self.hyper_period = int(
+            np.lcm.reduce([model["T"] for model in params.model_types.values()])
+        )
+        self.latencies = {}
+        self.num_events = 0  # submit/complete since the last re-optimization
+        self.num_reoptimized = 0
+        self.server = None
+        self.lock = _asyncio().Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.solver = ThreadPoolExecutor(max_workers=1)  # re-optimizations
+        self.accounting = ThreadPoolExecutor(max_workers=1)  # in window order
+        self.accounting_futures = []  # windows not checked yet
+        self.num_accounted = 0
+        self.accounting_errors = []
+        self.background_tasks = set()
+
+    async def start(self):
+        self.server = await _asyncio().start_server(
+            self.handle_connection, self.host, self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"[INFO] Scheduling service listening on {self.host}:{self.port}.")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.background_tasks:
+            await _asyncio().gather(*self.background_tasks)
+        self.executor.shutdown()
+        self.solver.shutdown()
+        self.accounting.shutdown()
+        errors = self.accounting_status()["errors"]
+        if errors:
+            raise RuntimeError(
+                f"accounting failed for {len(errors)} windows, first: {errors[0]}"
+            )
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.handle(json.loads(line))
+                except Exception as error:
+                    reply = {"error": f"{type(error).__name__}: {error}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (_asyncio().CancelledError, ConnectionError):
+            pass  # server closing or client gone
+        finally:
+            writer.close()
+
+    async def handle(self, request: dict) -> dict:
+        start = time.perf_counter()
+        op = request["op"]
+        if op == "stats":
+            reply = {
+                "latency": self.latency_stats(),
+                "accounting": self.accounting_status(),
+            }
+        elif op == "reoptimize":
+            reply = await self.reoptimize_in_background(request["time"])
+        else:
+            async with self.lock:
+                reply = (
+                    await _asyncio()
+                    .get_running_loop()
+                    .run_in_executor(self.executor, self.dispatch, request)
+                )
+        self.latencies.setdefault(op, []).append((time.perf_counter() - start) * 1000)
+        if op in ("submit", "complete"):
+            self.num_events += 1
+            if self.num_events >= self.reoptimize_every:
+                self.num_events = 0
+                task = _asyncio().create_task(
+                    self.handle({"op": "reoptimize", "time": request["time"]})
+                )
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+        return reply
+
+    def dispatch(self, request: dict) -> dict:
+        op = request["op"]
+        if op == "submit":
+            return self.submit(
+                request["job"],
+                Job(
+                    request["time"],
+                    request["duration"],
+                    request["size"],
+                    request["model_type"],
+                ),
+            )
+        elif op == "complete":
+            return self.complete(request["job"], request["time"])
+        elif op == "placement":
+            return self.placement(request["job"])
+        elif op == "reoptimize":
+            return self.reoptimize(request["time"])
+        raise ValueError(f"unknown op {op}")
+
+    def advance(self, event_time: int):
+        """
+        Account the conflicts of the windows ending before event_time
+        """
+        simulator = self.simulator
+        traffic_manager = simulator.traffic_manager
+        if not simulator.running_jobs:
+            # idle cluster, nothing to account
+            num_windows = (event_time - traffic_manager.current_time) // (
+                simulator.update_time_interval
+            )
+            traffic_manager.current_time += (
+                max(num_windows, 0) * simulator.update_time_interval
+            )
+        time_next = traffic_manager.current_time + simulator.update_time_interval
+        while time_next <= event_time:
+            # account on a snapshot, off the request path
+            snapshot = traffic_manager.snapshot(time_next, simulator.running_jobs)
+            self.accounting_futures.append(
+                self.accounting.submit(
+                    traffic_manager.update_traffic_from_snapshot, snapshot
+                )
+            )
+            traffic_manager.current_time = time_next
+            time_next += simulator.update_time_interval
+        simulator.current_time = max(simulator.current_time, event_time)
+
+    def submit(self, job_name: str, job: Job) -> dict:
+        simulator = self.simulator
+        if job_name in simulator.jobs:
+            raise ValueError(f"job {job_name} already submitted")
+        self.advance(job.arrival_time)
+        simulator.jobs[job_name] = job
+        simulator.job_queue.push(job_name, job.size, job.duration, job.arrival_time)
+        return {"job": job_name, "deployed": self.deploy()}
+
+    def complete(self, job_name: str, event_time: int) -> dict:
+        simulator = self.simulator
+        if job_name not in simulator.running_jobs:
+            raise ValueError(f"job {job_name} is not running")
+        self.advance(event_time)
+        simulator.traffic_manager.release_single_job(job_name)
+        simulator.release_single_job(job_name, event_time)
+        # windows up to event_time are snapshotted, nothing reads it anymore
+        simulator.traffic_manager.drop_job_patterns([job_name])
+        if simulator.topology.routing == "least_loaded":
+            simulator.rebalance_routes()
+        return {"job": job_name, "deployed": self.deploy()}
+
+    def deploy(self) -> List[dict]:
+        """
+        Deploy queued jobs and give each one its best time shift
+        """
+        simulator = self.simulator
+        traffic_manager = simulator.traffic_manager
+        deployed_jobs = simulator.deploy_queued_jobs()
+        if deployed_jobs:
+            traffic_manager.unify_traffic_pattern()
+        for job_name in deployed_jobs:
+            shift = self.best_shift(job_name)
+            if shift != 0:
+                traffic_manager.update_job_time_periods({job_name: shift})
+        return [self.placement(job_name) for job_name in deployed_jobs]
+
+    def best_shift(self, job_name: str) -> int:
+        """
+        Shift of job_name with the least total conflict in the current window,
+        the other jobs staying as they are
+        """
+        traffic_manager = self.simulator.traffic_manager
+        if job_name not in traffic_manager.job_traffic_pattern:
+            return 0  # no inter-ToR traffic
+        T = traffic_manager.job_traffic_pattern[job_name].T
+        # traffic repeats after the hyper-period, so score a single one
+        start_time = traffic_manager.job_time_period[job_name][0]
+        time_next = start_time + self.hyper_period
+        candidates = range(0, T, max(1, T // self.num_candidate_shifts))
+        return min(
+            candidates,
+            key=lambda shift: traffic_manager.evaluate_time_shifts(
+                {job_name: shift}, time_next, start_time
+            )[1],
+        )
+
+    def placement(self, job_name: str) -> dict:
+        gpu_manager = self.simulator.gpu_manager
+        if job_name not in gpu_manager.job_deployed_time:
+            return {"job": job_name, "queued": True}
+        deploy_time = gpu_manager.job_deployed_time[job_name]
+        return {
+            "job": job_name,
+            "time": deploy_time,
+            "gpus": [
+                int(gpu[len("GPU-") :])
+                for gpu in gpu_manager.get_job_gpu_list(job_name)
+            ],
+            "shift": self.simulator.traffic_manager.job_time_period[job_name][0]
+            - deploy_time,
+        }
+
+    def reoptimize(self, event_time: int) -> dict:
+        """
+        Run the solver of simulator.method over all running jobs
+        """
+        solver_view = self.reoptimize_snapshot(event_time)
+        if solver_view is None:
+            return {"shifts": {}}
+        return self.apply_shifts(*self.solve_snapshot(solver_view))
+
+    async def reoptimize_in_background(self, event_time: int) -> dict:
+        """
+        reoptimize with the solver running outside the lock, so that requests
+        are served meanwhile
+        """
+        loop = _asyncio().get_running_loop()
+        async with self.lock:
+            solver_view = await loop.run_in_executor(
+                self.executor, self.reoptimize_snapshot, event_time
+            )
+        if solver_view is None:
+            return {"shifts": {}}
+        start_times, time_shifts = await loop.run_in_executor(
+            self.solver, self.solve_snapshot, solver_view
+        )
+        async with self.lock:
+            return await loop.run_in_executor(
+                self.executor, self.apply_shifts, start_times, time_shifts
+            )
+
+    def reoptimize_snapshot(self, event_time: int) -> Optional[TrafficManager]:
+        """
+        Copy of the running jobs' traffic for the solver, None if idle
+        """
+        simulator = self.simulator
+        self.advance(event_time)
+        if not simulator.running_jobs:
+            return None
+        traffic_manager = simulator.traffic_manager
+        return TrafficManager.from_snapshot(
+            traffic_manager.snapshot(
+                traffic_manager.current_time + simulator.update_time_interval,
+                simulator.running_jobs,
+            )
+        )
+
+    def solve_snapshot(
+        self, solver_view: TrafficManager
+    ) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Solve on solver_view, return the start times it was taken with and
+        the resulting time shifts
+        """
+        start_times = {
+            job_name: solver_view.job_time_period[job_name][0]
+            for job_name in solver_view.running_jobs
+        }
+        self.simulator.solve_time_shifts(solver_view)
+        time_shifts = {
+            job_name: solver_view.job_time_period[job_name][0] - start_time
+            for job_name, start_time in start_times.items()
+            if solver_view.job_time_period[job_name][0] != start_time
+        }
+        return start_times, time_shifts
+
+    def apply_shifts(
+        self, start_times: Dict[str, int], time_shifts: Dict[str, int]
+    ) -> dict:
+        """
+        Apply time_shifts to the jobs still running from the start times they
+        were solved with, jobs completed or shifted meanwhile are left out
+        """
+        traffic_manager = self.simulator.traffic_manager
+        time_shifts = {
+            job_name: shift
+            for job_name, shift in time_shifts.items()
+            if job_name in self.simulator.running_jobs
+            and traffic_manager.job_time_period[job_name][0] == start_times[job_name]
+        }
+        traffic_manager.update_job_time_periods(time_shifts)
+        self.num_reoptimized += 1
+        return {"shifts": time_shifts}
+
+    def accounting_status(self) -> dict:
+        """
+        Number of windows accounted and pending, and the errors of the failed
+        ones
+        """
+        pending = []
+        for future in self.accounting_futures:
+            if not future.done():
+                pending.append(future)
+            elif future.exception() is not None:
+                error = future.exception()
+                self.accounting_errors.append(f"{type(error).__name__}: {error}")
+            else:
+                self.num_accounted += 1
+        self.accounting_futures = pending
+        return {
+            "accounted": self.num_accounted,
+            "pending": len(pending),
+            "errors": list(self.accounting_errors),
+        }
+
+    def latency_stats(self) -> dict:
+        stats = {}
+        for op, latencies in self.latencies.items():
+            latencies = np.array(latencies)
+            stats[op] = {
+                "count": len(latencies),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+                "max_ms": float(latencies.max()),
+                "slo_violations": int(np.sum(latencies > self.slo_ms)),
+            }
+        return stats
+
+    def report(self):
+        accounting = self.accounting_status()
+        print(
+            f"[INFO] Scheduling service: {self.num_reoptimized} re-optimizations, "
+            f"{accounting['accounted']} windows accounted, "
+            f"{len(accounting['errors'])} failed, SLO {self.slo_ms:.0f} ms."
+        )
+        for op, stats in self.latency_stats().items():
+            print(
+                f"[INFO]   {op}: {stats['count']} requests, "
+                f"p50 {stats['p50_ms']:.2f} ms / p99 {stats['p99_ms']:.2f} ms / "
+                f"max {stats['max_ms']:.2f} ms, "
+                f"{stats['slo_violations']} over SLO."
+            )
+
+
+async def replay_trace(
+    jobs: Dict[str, Job], host: str = "127.0.0.1", port: int = 8765
+) -> Dict[str, List[float]]:
+    """
+    Load generator: replay a job trace against a SchedulingService.
+    Jobs are submitted at their arrival time and completed duration after
+    their deployment, in time order, each request waiting for its reply.
+    Return the client side latencies {op: [ms]}.
+    """
+    reader, writer = await _asyncio().open_connection(host, port)
+    latencies = {}
+
+    async def request(message: dict) -> dict:
+        start = time.perf_counter()
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        latencies.setdefault(message["op"], []).append(
+            (time.perf_counter() - start) * 1000
+        )
+        assert "error" not in reply, reply["error"]
+        return reply
+
+    # (time, order, op, job_name), completions sort before arrivals
+    events: List[Tuple[int, int, str, str]] = [
+        (job.arrival_time, 1, "submit", job_name) for job_name, job in jobs.items()
+    ]
+    heapq.heapify(events)
+    while events:
+        event_time, _, op, job_name = heapq.heappop(events)
+        if op == "submit":
+            job = jobs[job_name]
+            reply = await request(
+                {
+                    "op": "submit",
+                    "job": job_name,
+                    "time": event_time,
+                    "size": job.size,
+                    "duration": job.duration,
+                    "model_type": job.model_type,
+                }
+            )
+        else:
+            reply = await request(
+                {"op": "complete", "job": job_name, "time": event_time}
+            )
+        for placement in reply["deployed"]:
+            heapq.heappush(
+                events,
+                (
+                    placement["time"] + jobs[placement["job"]].duration,
+                    0,
+                    "complete",
+                    placement["job"],
+                ),
+            )
+    writer.close()
+    await writer.wait_closed()
+    return latencies
+
+
+async def run_service_benchmark(
+    jobs: Dict[str, Job], service: Optional[SchedulingService] = None
+) -> SchedulingService:
+    """
+    Start a service, replay jobs against it and report the latencies
+    """
+    if service is None:
+        service = SchedulingService()
+    await service.start()
+    latencies = await replay_trace(jobs, service.host, service.port)
+    await service.close()
+    for op, op_latencies in latencies.items():
+        print(
+            f"[INFO] Client {op}: {len(op_latencies)} requests, "
+            f"p99 {np.percentile(op_latencies, 99):.2f} ms."
+        )
+    service.report()
+    return service
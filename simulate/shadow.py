@@ -0,0 +1,386 @@
+import os
+import json
+import time
+import random
+from collections import Counter
+from utils import cal_link_job_conflicts
+from solver.sparse_bigraph import construct_sparse_bigraph
+from solver.time_shifts import (
+    cal_time_shifts,
+    cal_time_shifts_cassini,
+    cal_time_shifts_reference,
+    cal_time_shifts_cassini_reference,
+    cal_time_shift_array,
+    cal_time_shift_array_cassini,
+)
+from solver.unify_time_shifts import array_unify_time_shift, bfs_unify_time_shift
+from .network_traffic_management import TrafficManager, TrafficPattern
+from .network_elements import ClosTopology, Link
+from .gpu_manager import GPUManager
+from .rdma_operates import RdmaOperateStore
+from typing import Dict, List, Optional
+
+CHECKS = ["conflicts", "time_shifts", "unify", "routing", "placement", "rdma"]
+
+
+class ShadowDivergence(AssertionError):
+    pass
+
+
+def pattern_dump(pattern: TrafficPattern) -> list:
+    return [list(pattern.interval), pattern.T]
+
+
+class ShadowVerifier:
+    """
+    Re-run the reference implementations next to the fast paths on a sample
+    of windows and calls, and compare the results:
+        conflicts    cal_job_conflicts vs max of cal_link_job_conflicts per link,
+                     whose cal_overlap_reference is the unmodified cal_overlap
+        time_shifts  cal_time_shifts(_cassini) vs their *_reference loops
+        unify        array_unify_time_shift vs bfs_unify_time_shift per component
+        routing      link lists of the AllReduce flows vs get_gpu_route on
+                     every comm pair
+        placement    first fit invariant of GPUManager's own gpu_usage; there
+                     is no fast allocator to compare with yet, so this only
+                     catches a corrupted gpu_usage
+        rdma         RdmaOperateStore vs ClosTopology.job_rdma_operates_tuples
+    Each window (conflicts, time_shifts, unify) or call (routing, placement,
+    rdma) is checked with probability sample_rate, drawn from an RNG of its
+    own so the simulation is not perturbed. A divergence writes a minimal
+    repro (the inputs of the first diverging link, component or job) to
+    dump_dir as JSON, then is logged, or raised if mode is "assert".
+    """
+
+    stats: Dict[str, Dict[str, float]]  # {check: {calls, sampled, ...}}
+
+    def __init__(
+        self,
+        sample_rate: float = 0.1,
+        mode: str = "log",
+        dump_dir: str = "save/shadow",
+        checks: Optional[List[str]] = None,
+        seed: int = 0,
+    ):
+        assert mode in ("log", "assert"), f"unknown shadow mode {mode}"
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.dump_dir = dump_dir
+        self.checks = set(CHECKS if checks is None else checks)
+        self.rng = random.Random(seed)
+        self.stats = {
+            check: {"calls": 0, "sampled": 0, "divergences": 0, "seconds": 0.0}
+            for check in CHECKS
+        }
+        self.start_time = time.perf_counter()
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def sample(self, check: str) -> bool:
+        if check not in self.checks:
+            return False
+        self.stats[check]["calls"] += 1
+        if self.rng.random() >= self.sample_rate:
+            return False
+        self.stats[check]["sampled"] += 1
+        return True
+
+    def diverged(self, check: str, message: str, repro: dict):
+        self.stats[check]["divergences"] += 1
+        if not os.path.exists(self.dump_dir):
+            os.makedirs(self.dump_dir)
+        dump_path = os.path.join(
+            self.dump_dir, f"{check}_{self.stats[check]['divergences']}.json"
+        )
+        with open(dump_path, "w") as file:
+            json.dump({"check": check, "message": message, **repro}, file, indent=4)
+        message = f"Shadow {check} diverged: {message}, repro in {dump_path}"
+        if self.mode == "assert":
+            raise ShadowDivergence(message)
+        print(f"[INFO] {message}.")
+
+    def timed(self, check: str, start: float):
+        self.stats[check]["seconds"] += time.perf_counter() - start
+
+    def check_conflicts(
+        self,
+        link_traffic_pattern: Dict[Link, Dict[str, TrafficPattern]],
+        job_time_period: Dict[str, tuple],
+        current_time: int,
+        time_next: int,
+        job_conflicts: Dict[str, int],
+    ):
+        """
+        job_conflicts: result of the fast path for window [current_time, time_next]
+        """
+        if not self.sample("conflicts"):
+            return
+        start = time.perf_counter()
+        reference = {}
+        for jobs in link_traffic_pattern.values():
+            link_job_conflicts = cal_link_job_conflicts(
+                jobs, job_time_period, current_time, time_next
+            )
+            for job_name, conflict in link_job_conflicts.items():
+                reference[job_name] = max(reference.get(job_name, 0), conflict)
+        diverging = [
+            job_name
+            for job_name in reference.keys() | job_conflicts.keys()
+            if reference.get(job_name) != job_conflicts.get(job_name)
+        ]
+        self.timed("conflicts", start)
+        if not diverging:
+            return
+        job_name = min(diverging)
+        links = [
+            link for link, jobs in link_traffic_pattern.items() if job_name in jobs
+        ]
+        job_names = set().union(*(link_traffic_pattern[link] for link in links))
+        self.diverged(
+            "conflicts",
+            f"{len(diverging)} jobs, job {job_name}: "
+            f"{job_conflicts.get(job_name)} vs reference {reference.get(job_name)}",
+            {
+                "window": [current_time, time_next],
+                "job": job_name,
+                "fast": int(job_conflicts.get(job_name, -1)),
+                "reference": int(reference.get(job_name, -1)),
+                "link_traffic_pattern": {
+                    repr(link): {
+                        name: pattern_dump(pattern)
+                        for name, pattern in link_traffic_pattern[link].items()
+                    }
+                    for link in links
+                },
+                "job_time_period": {
+                    name: list(job_time_period[name]) for name in sorted(job_names)
+                },
+            },
+        )
+
+    def check_solver_inputs(self, traffic_manager: TrafficManager, method: str):
+        """
+        Time shifts per link and their unification, on the state the solver
+        of method is about to read
+        """
+        cassini = method == "cassini"
+        if self.sample("time_shifts"):
+            start = time.perf_counter()
+            if cassini:
+                fast = cal_time_shifts_cassini(traffic_manager)
+                reference = cal_time_shifts_cassini_reference(traffic_manager)
+            else:
+                fast = cal_time_shifts(traffic_manager)
+                reference = cal_time_shifts_reference(traffic_manager)
+            diverging = [
+                link for link in reference if reference[link] != fast.get(link)
+            ]
+            self.timed("time_shifts", start)
+            if diverging:
+                link = diverging[0]
+                jobs = traffic_manager.link_traffic_pattern[link]
+                self.diverged(
+                    "time_shifts",
+                    f"{len(diverging)} links, link {link!r}",
+                    {
+                        "cassini": cassini,
+                        "link": repr(link),
+                        "fast": {
+                            name: int(shift) for name, shift in fast[link].items()
+                        },
+                        "reference": reference[link],
+                        "jobs": {
+                            name: pattern_dump(pattern)
+                            + [traffic_manager.job_time_period[name][0]]
+                            for name, pattern in jobs.items()
+                        },
+                    },
+                )
+        if self.sample("unify"):
+            start = time.perf_counter()
+            bigraph = construct_sparse_bigraph(
+                traffic_manager,
+                cal_time_shift_array_cassini if cassini else cal_time_shift_array,
+            )
+            fast = array_unify_time_shift(bigraph)
+            diverging = None
+            for component in bigraph.connected_subgraphs():
+                reference = bfs_unify_time_shift(component.to_networkx())
+                if any(fast[name] != shift for name, shift in reference.items()):
+                    diverging = (component, reference)
+                    break
+            self.timed("unify", start)
+            if diverging is not None:
+                component, reference = diverging
+                link_idx, job_idx, edge_ids = component.edges()
+                self.diverged(
+                    "unify",
+                    f"component of job {component.jobs[0]}",
+                    {
+                        "jobs": list(component.jobs),
+                        "links": [repr(link) for link in component.links],
+                        "edges": [
+                            [link, job, shift]
+                            for link, job, shift in zip(
+                                link_idx.tolist(),
+                                job_idx.tolist(),
+                                component.edge_shift[edge_ids].tolist(),
+                            )
+                        ],
+                        "fast": {name: fast[name] for name in component.jobs},
+                        "reference": reference,
+                    },
+                )
+
+    def check_routing(
+        self,
+        topology: ClosTopology,
+        job_name: str,
+        job_gpu_list: List[str],
+        all_reduce_implement: str,
+        comm_link_list: List[Link],
+    ):
+        """
+        comm_link_list: links of the job from the fast path, one entry per
+        AllReduce group using the link
+        """
+        if not self.sample("routing"):
+            return
+        start = time.perf_counter()
+        reference = Counter()
+        for gpu_group in topology.dp_allreduce_gpu_groups(job_gpu_list):
+            if all_reduce_implement == "ring":
+                comm_pairs = topology.ring_comm_pairs(gpu_group)
+            else:
+                comm_pairs = topology.hd_comm_pairs(gpu_group)
+            reference.update(
+                {
+                    link
+                    for src, dst in comm_pairs
+                    for link in topology.get_gpu_route(src, dst)
+                }
+            )
+        fast = Counter(comm_link_list)
+        self.timed("routing", start)
+        if fast == reference:
+            return
+        servers = sorted(
+            {int(gpu[4:]) // topology.gpus_per_server for gpu in job_gpu_list}
+        )
+        self.diverged(
+            "routing",
+            f"job {job_name}, {sum((fast - reference).values())} extra and "
+            f"{sum((reference - fast).values())} missing links",
+            {
+                "job": job_name,
+                "topology": [
+                    topology.num_spines,
+                    topology.num_tors,
+                    topology.servers_per_tor,
+                    topology.gpus_per_server,
+                ],
+                "routing": topology.routing,
+                "all_reduce_implement": all_reduce_implement,
+                "gpus": job_gpu_list,
+                "server_spine": {
+                    server: int(topology.server_spine[server]) for server in servers
+                },
+                "fast": sorted(repr(link) for link in fast.elements()),
+                "reference": sorted(repr(link) for link in reference.elements()),
+            },
+        )
+
+    def check_placement(self, gpu_manager: GPUManager, job_name: str, size: int):
+        """
+        A job just placed holds size GPUs, and no free GPU precedes its last
+        one (first fit)
+        """
+        if not self.sample("placement"):
+            return
+        start = time.perf_counter()
+        gpu_ids = [
+            gpu_id
+            for gpu_id, occupying_job_name in enumerate(gpu_manager.gpu_usage)
+            if occupying_job_name == job_name
+        ]
+        fast = [
+            int(gpu[len("GPU-") :]) for gpu in gpu_manager.get_job_gpu_list(job_name)
+        ]
+        skipped = [
+            gpu_id
+            for gpu_id in range(max(gpu_ids, default=-1))
+            if gpu_manager.gpu_usage[gpu_id] is None
+        ]
+        self.timed("placement", start)
+        if len(gpu_ids) == size and fast == gpu_ids and not skipped:
+            return
+        self.diverged(
+            "placement",
+            f"job {job_name} of size {size} on {len(gpu_ids)} GPUs, "
+            f"{len(skipped)} free GPUs skipped",
+            {
+                "job": job_name,
+                "size": size,
+                "gpus": gpu_ids,
+                "job_gpu_list": fast,
+                "skipped_free_gpus": skipped,
+            },
+        )
+
+    def check_rdma(
+        self,
+        store: RdmaOperateStore,
+        job_name: str,
+        job_gpu_list: List[str],
+        msg_len: int,
+    ):
+        if not self.sample("rdma"):
+            return
+        start = time.perf_counter()
+        reference = store.topology.job_rdma_operates_tuples(
+            job_gpu_list, msg_len, store.all_reduce_implement
+        )
+        fast = store[job_name]
+        self.timed("rdma", start)
+        if fast == reference:
+            return
+        group = next(
+            i
+            for i, (a, b) in enumerate(zip(fast + [None], reference + [None]))
+            if a != b
+        )
+        self.diverged(
+            "rdma",
+            f"job {job_name}, AllReduce group {group}",
+            {
+                "job": job_name,
+                "all_reduce_implement": store.all_reduce_implement,
+                "gpus": job_gpu_list,
+                "msg_len": msg_len,
+                "group": group,
+                "fast": fast[group] if group < len(fast) else None,
+                "reference": reference[group] if group < len(reference) else None,
+            },
+        )
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start_time
+        seconds = sum(stats["seconds"] for stats in self.stats.values())
+        print(
+            f"[INFO] Shadow verification ({self.mode}, sample rate "
+            f"{self.sample_rate:.0%}): {seconds:.2f}s of {elapsed:.2f}s "
+            f"({seconds / elapsed if elapsed > 0 else 0:.1%} overhead)."
+        )
+        for check, stats in self.stats.items():
+            if stats["calls"] == 0:
+                continue
+            print(
+                f"[INFO]   {check}: {stats['sampled']}/{stats['calls']} sampled, "
+                f"{stats['divergences']} divergences, {stats['seconds']:.2f}s"
+                + (
+                    " (invariant of GPUManager only, no fast allocator yet)."
+                    if check == "placement"
+                    else "."
+                )
+            )
@@ -1,34 +1,74 @@
 import os
+import sys
 import json
+import contextlib
+import time
 import random
 import params
+import numpy as np
+from array import array
+from collections import deque
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from . import TrafficManager, GPUManager, ClosTopology
+from .rdma_operates import RdmaOperateStore
+from .network_traffic_management import TrafficSnapshot
+from .job import Job
+from .job_queue import JobQueue
+from .placement_log import PlacementLog
 from utils import generate_start_times, sample_from_cdf, sample_from_cdf_continuous
-from solver import solve, solve_by_cassini, solve_by_max_cut
-from typing import List, Tuple, Dict
+from utils import MemoryTracker, SimulationMetrics, component_sizes
+from solver import solve, solve_by_cassini, solve_by_max_cut, SolverPortfolio
+from config import stp_file_dir, stp_solution_dir
+from typing import Deque, Iterator, List, Tuple, Dict, Optional
 
 
 class Simulator:
-    job_rdma_operate_tuples: Dict[str, List[List[List[Tuple[str, str, int]]]]]
-    job_traffic_start_points: Dict[str, List[int]]
+    job_rdma_operate_tuples: RdmaOperateStore
+    job_traffic_start_points: Dict[str, array]
+    jobs: Dict[str, Job]
+    waiting_jobs: Deque[str]  # jobs not arrived yet, in arrival order
+    job_queue: JobQueue  # arrived jobs waiting for GPUs
+    queueing_delay: Dict[str, int]
 
     def __init__(self):
         self.traffic_manager = TrafficManager()
         self.gpu_manager = GPUManager()
         self.topology = ClosTopology()
-        self.method = "ours"  # "ours", "cassini", or "max_cut"
+        self.method = "ours"  # "ours", "cassini", "max_cut", or "portfolio"
+        self.K = 8  # number of partitions used by "max_cut"
+        self.max_component_size = None  # split larger components, "ours"/"max_cut"
+        self.reduce_graphs = False  # shrink solver instances by BigraphReduction
+        self.max_rebalanced_jobs = 8  # jobs rerouted per window, "least_loaded" routing
+        self.stp_file_dir = stp_file_dir
+        self.stp_solution_dir = stp_solution_dir
+        self.scip_pool = None  # warm scipstp sessions for "ours", see ScipSessionPool
+        self.portfolio = None  # SolverPortfolio of "portfolio", created on first use
+        self.conflict_graph_renderer = None  # draw a frame per window if set
+        self.memory_tracker: Optional[MemoryTracker] = None  # per-phase report if set
+        self.shadow = None  # ShadowVerifier checking fast paths on samples if set
+        self.metrics: Optional[SimulationMetrics] = None  # live metrics if set
+        self.placement_log_path = None  # log GPU assign/release events if set
+        self.scheduling_policy = "fifo"  # "fifo", "easy_backfill", or "smallest_first"
         self.jobs = {}  # json input
-        self.waiting_jobs = []
+        self.waiting_jobs = deque()
+        self.job_queue = None  # created on first deploy_jobs
+        self.queueing_delay = {}  # {job_name: deploy_time - arrival_time}
         self.running_jobs = []
         self.ended_jobs = []
-        self.job_traffic_start_points = {}  # {job_name: [...]}
+        self.job_traffic_start_points = {}  # {job_name: array("q", [...])}
         self.time_count: int = 0
         self.current_time: int = 0
-        self.job_rdma_operate_tuples = {}
+        self.update_time_interval = params.update_time_interval  # window length
+        # GPU ids + shared phase templates, pass spill_path to move ended jobs to disk
+        self.job_rdma_operate_tuples = RdmaOperateStore(
+            self.topology, params.all_reduce_implement
+        )
+        self.solve_time = 0.0  # seconds spent in solve_time_shifts
+        self.max_link_jobs = []  # max number of jobs on a link of each window
 
     def generate_random_jobs(self):
-        job_names = [str(i) for i in range(1, params.job_num + 1)]
+        job_names = [sys.intern(str(i)) for i in range(1, params.job_num + 1)]
         arrival_times = generate_start_times(params.job_num, params.arrival_rate)
         durations = sample_from_cdf_continuous(
             params.durations, params.cdf_durations, params.job_num
@@ -36,15 +76,10 @@ class Simulator:
         sizes = sample_from_cdf(params.sizes, params.cdf_sizes, params.job_num)
         model_types = random.choices(list(params.model_types.keys()), k=params.job_num)
         self.jobs = {
-            job_name: {
-                "arrival_time": arrival_times[i],
-                "duration": durations[i],
-                "size": sizes[i],
-                "model_type": model_types[i],
-            }
+            job_name: Job(arrival_times[i], durations[i], sizes[i], model_types[i])
             for i, job_name in enumerate(job_names)
         }
-        self.waiting_jobs = list(self.jobs.keys())
+        self.reset_waiting_jobs()
 
     def save_jobs_to_json(self, filename=None):
         if filename is None:
@@ -54,27 +89,50 @@ class Simulator:
         if not os.path.exists("save/jobs"):
             os.makedirs("save/jobs")
         with open(file_path, "w") as file:
-            json.dump(self.jobs, file, indent=4)
+            json.dump(
+                {job_name: job.to_dict() for job_name, job in self.jobs.items()},
+                file,
+                indent=4,
+            )
 
     def load_jobs_from_json(self, file_path):
         with open(file_path, "r") as file:
-            self.jobs = json.load(file)
-            self.waiting_jobs = list(self.jobs.keys())
+            self.jobs = {
+                sys.intern(job_name): Job.from_dict(job)
+                for job_name, job in json.load(file).items()
+            }
+        self.reset_waiting_jobs()
+
+    def reset_waiting_jobs(self):
+        """
+        Mark all jobs of self.jobs as not arrived yet
+        """
+        self.waiting_jobs = deque(
+            sorted(
+                self.jobs.keys(), key=lambda job_name: self.jobs[job_name].arrival_time
+            )
+        )
+        self.job_queue = None
 
     def deploy_single_job(self, job_name: str, deploy_time: int) -> bool:
         """
         Assign GPUs to a single job then get the corresponding RDMA operates
         """
         flag = self.gpu_manager.assign_gpu_to_job(
-            job_name, self.jobs[job_name]["size"], deploy_time
+            job_name, self.jobs[job_name].size, deploy_time
         )
         if flag:
             job_gpu_list = self.gpu_manager.get_job_gpu_list(job_name)
-            model_type = self.jobs[job_name]["model_type"]
+            model_type = self.jobs[job_name].model_type
             msg_len = params.model_types[model_type]["msg_len"]
-            self.job_rdma_operate_tuples[job_name] = (
-                self.topology.job_rdma_operates_tuples(job_gpu_list, msg_len)
-            )
+            self.job_rdma_operate_tuples.add(job_name, job_gpu_list, msg_len)
+            if self.shadow is not None:
+                self.shadow.check_placement(
+                    self.gpu_manager, job_name, self.jobs[job_name].size
+                )
+                self.shadow.check_rdma(
+                    self.job_rdma_operate_tuples, job_name, job_gpu_list, msg_len
+                )
         return flag
 
     def allocate_flows(self, job_name: str, deploy_time: int):
@@ -82,83 +140,197 @@ class Simulator:
         Update link traffic patterns.
         """
         self.traffic_manager.add_job(
-            job_name, deploy_time, deploy_time + self.jobs[job_name]["duration"]
+            job_name, deploy_time, deploy_time + self.jobs[job_name].duration
         )
-        pattern = params.model_types[self.jobs[job_name]["model_type"]]
+        if self.topology.routing == "least_loaded":
+            self.topology.assign_job_spines(
+                job_name,
+                self.gpu_manager.get_job_gpu_list(job_name),
+                params.all_reduce_implement,
+            )
+        self.add_job_flows(job_name)
+
+    def add_job_flows(self, job_name: str):
+        """
+        Add the traffic pattern of the job to the links of its AllReduce flows
+        """
+        pattern = params.model_types[self.jobs[job_name].model_type]
         job_gpu_list = self.gpu_manager.get_job_gpu_list(job_name)
         if params.all_reduce_implement == "ring":
-            # TODO
-            pass
+            comm_link_list = self.topology.ring_comm_link_list(job_gpu_list)
         elif params.all_reduce_implement == "hd":
             comm_link_list = self.topology.hd_comm_link_list(job_gpu_list)
-            for link in comm_link_list:
-                self.traffic_manager.add_traffic_pattern(
-                    link,
-                    job_name,
-                    pattern["interval"],
-                    pattern["T"],
-                )
+        if self.shadow is not None:
+            self.shadow.check_routing(
+                self.topology,
+                job_name,
+                job_gpu_list,
+                params.all_reduce_implement,
+                comm_link_list,
+            )
+        for link in comm_link_list:
+            self.traffic_manager.add_traffic_pattern(
+                link,
+                job_name,
+                pattern["interval"],
+                pattern["T"],
+            )
 
     def deploy_jobs(self) -> List[str]:
         """
-        Try to deploy jobs starting before time_next
+        Try to deploy jobs starting before time_next.
+        Jobs arrived before time_next join self.job_queue, whose policy picks
+        the jobs to deploy while GPUs are available.
+        """
+        if self.job_queue is None:
+            self.job_queue = JobQueue(self.scheduling_policy)
+        time_next = self.current_time + self.update_time_interval
+        while (
+            self.waiting_jobs
+            and self.jobs[self.waiting_jobs[0]].arrival_time < time_next
+        ):
+            job_name = self.waiting_jobs.popleft()
+            job = self.jobs[job_name]
+            self.job_queue.push(job_name, job.size, job.duration, job.arrival_time)
+        deployed_jobs = self.deploy_queued_jobs()
+        self.traffic_manager.unify_traffic_pattern()
+        return deployed_jobs
+
+    def deploy_queued_jobs(self) -> List[str]:
+        """
+        Deploy jobs of self.job_queue at current_time while GPUs are available,
+        in the order picked by its policy
         """
         deployed_jobs = []
-        time_next = self.current_time + params.update_time_interval
-        waiting_jobs = self.waiting_jobs.copy()
-        for job_name in waiting_jobs:
-            if self.jobs[job_name]["arrival_time"] >= time_next:
-                break
-            deploy_time = max(self.jobs[job_name]["arrival_time"], self.current_time)
-            if self.deploy_single_job(job_name, deploy_time):
-                # if deployment success
-                self.allocate_flows(job_name, deploy_time)
-                self.waiting_jobs.remove(job_name)
-                self.running_jobs.append(job_name)
-                deployed_jobs.append(job_name)
-                print(f"[INFO] Job {job_name} deployed.")
-            else:
+        num_free_gpu = self.gpu_manager.num_free_gpu()
+        while self.job_queue:
+            job_name = self.job_queue.select(
+                num_free_gpu, self.current_time, self.release_events()
+            )
+            if job_name is None:
                 break
-        self.traffic_manager.unify_traffic_pattern()
+            deploy_time = max(self.jobs[job_name].arrival_time, self.current_time)
+            if not self.deploy_single_job(job_name, deploy_time):
+                raise RuntimeError(
+                    f"job {job_name} of size {self.jobs[job_name].size} selected "
+                    f"with {num_free_gpu} free GPUs but not placed"
+                )
+            self.allocate_flows(job_name, deploy_time)
+            num_free_gpu -= self.jobs[job_name].size
+            self.queueing_delay[job_name] = (
+                deploy_time - self.jobs[job_name].arrival_time
+            )
+            self.running_jobs.append(job_name)
+            deployed_jobs.append(job_name)
+            print(f"[INFO] Job {job_name} deployed.")
         return deployed_jobs
 
+    def release_events(self) -> Iterator[Tuple[int, int]]:
+        """
+        (end_time, size) of the running jobs by end time, read lazily from the
+        job index of traffic_manager, which follows deploys, time shifts and
+        releases
+        """
+        return (
+            (end_time, self.jobs[job_name].size)
+            for end_time, job_name in self.traffic_manager.job_index.by_end()
+        )
+
     def release_jobs(self) -> List[str]:
         """
         Release jobs finish in time window [current_time, time_next]
         """
-        time_next = self.current_time + params.update_time_interval
+        time_next = self.current_time + self.update_time_interval
+        if self.gpu_manager.placement_log is not None:
+            self.gpu_manager.placement_log.checkpoint(self.current_time)
         released_jobs = self.traffic_manager.release_jobs(time_next)
         for job_name in released_jobs:
-            self.gpu_manager.release_gpu(
+            self.release_single_job(
                 job_name, self.traffic_manager.job_time_period[job_name][1]
             )
-            self.running_jobs.remove(job_name)
-            self.ended_jobs.append(job_name)
-            print(f"[INFO] Job {job_name} released.")
+        if released_jobs and self.topology.routing == "least_loaded":
+            self.rebalance_routes()
+        if self.conflict_graph_renderer is not None:
+            self.conflict_graph_renderer.forget(released_jobs)
         return released_jobs
 
-    def update_job_traffic_start_points(self, released_jobs: List[str]):
+    def release_single_job(self, job_name: str, release_time: int):
+        """
+        Free the GPUs and spines of a job released from traffic_manager
+        """
+        self.gpu_manager.release_gpu(job_name, release_time)
+        self.topology.release_job_spines(job_name)
+        self.job_rdma_operate_tuples.spill(job_name)
+        self.running_jobs.remove(job_name)
+        self.ended_jobs.append(job_name)
+        print(f"[INFO] Job {job_name} released.")
+
+    def rebalance_routes(self):
+        """
+        Reroute running jobs on the most loaded link, now that released jobs
+        left room on other spines. At most max_rebalanced_jobs jobs are moved.
+        """
+        hottest_link = np.argmax(self.topology.link_load)
+        num_moved = 0
+        for job_name in self.running_jobs:
+            if num_moved >= self.max_rebalanced_jobs:
+                break
+            link_ids = self.topology.job_route_links.get(job_name)
+            if link_ids is None or hottest_link not in link_ids:
+                continue
+            self.topology.release_job_spines(job_name)
+            new_link_ids = self.topology.assign_job_spines(
+                job_name,
+                self.gpu_manager.get_job_gpu_list(job_name),
+                params.all_reduce_implement,
+            )
+            if np.array_equal(link_ids, new_link_ids):
+                continue
+            self.traffic_manager.remove_job_flows(job_name)
+            self.add_job_flows(job_name)
+            num_moved += 1
+        if num_moved > 0:
+            print(f"[INFO] {num_moved} jobs rerouted.")
+
+    def update_job_traffic_start_points(
+        self, released_jobs: List[str], snapshot: Optional[TrafficSnapshot] = None
+    ):
         """
         Update self.job_traffic_start_points in time window [current_time, time_next]
+        Read from snapshot instead of the live state if given (pipelined mode)
         """
-        time_next = self.current_time + params.update_time_interval
-        job_list = released_jobs + self.running_jobs
+        if snapshot is None:
+            state, current_time = self.traffic_manager, self.current_time
+            job_list = released_jobs + self.running_jobs
+        else:
+            state, current_time = snapshot, snapshot.current_time
+            job_list = released_jobs + snapshot.running_jobs
+        time_next = current_time + self.update_time_interval
         for job_name in job_list:
-            start_time = self.traffic_manager.job_time_period[job_name][0]
-            interval_start = self.traffic_manager.job_traffic_pattern[
-                job_name
-            ].interval[0]
-            T = self.traffic_manager.job_traffic_pattern[job_name].T
+            start_time = state.job_time_period[job_name][0]
+            if job_name in state.job_traffic_pattern:
+                pattern = state.job_traffic_pattern[job_name]
+                interval_start, T = pattern.interval[0], pattern.T
+            else:
+                # job without inter-ToR traffic
+                pattern = params.model_types[self.jobs[job_name].model_type]
+                interval_start, T = pattern["interval"][0], pattern["T"]
             traffic_start_point = start_time + interval_start
             while traffic_start_point < time_next:
-                if traffic_start_point < self.current_time:
+                if traffic_start_point < current_time:
                     traffic_start_point += T
                     continue
                 if job_name not in self.job_traffic_start_points:
-                    self.job_traffic_start_points[job_name] = [traffic_start_point]
+                    self.job_traffic_start_points[job_name] = array(
+                        "q", [traffic_start_point]
+                    )
                 else:
                     self.job_traffic_start_points[job_name].append(traffic_start_point)
                 traffic_start_point += T
+        if snapshot is None:
+            # last window of the released jobs is out, the live state of the
+            # pipelined mode is pruned when its snapshot is taken instead
+            self.traffic_manager.drop_job_patterns(released_jobs)
 
     def generate_netsim_input(self, save_dir: str = "save/netsim_input"):
         """
@@ -167,11 +339,12 @@ class Simulator:
         for job_name in self.jobs.keys():
             if job_name not in self.job_traffic_start_points:
                 continue
-            if self.jobs[job_name]["size"] == 8:
+            if self.jobs[job_name].size == 8:
                 continue
             traffic_start_points = self.job_traffic_start_points[job_name]
-            traffic_start_points = [0] + traffic_start_points
-            rdma_operate_tuples = self.job_rdma_operate_tuples[job_name]
+            traffic_start_points = [0] + traffic_start_points.tolist()
+            # expanded one AllReduce group at a time
+            rdma_operate_tuples = self.job_rdma_operate_tuples.iter_groups(job_name)
 
             job_save_dir = os.path.join(save_dir, f"{job_name}")  # dir for each job
             if not os.path.exists(job_save_dir):
@@ -203,29 +376,269 @@ class Simulator:
         Utilize different solvers to reduce conflicts.
         Return job conflicts after optimization.
         """
+        self.solve_time_shifts()
+        time_next = self.current_time + self.update_time_interval
+        job_conflicts = self.traffic_manager.update_traffic(time_next)
+        if self.metrics is not None:
+            self.metrics.account(job_conflicts)
+        if self.shadow is not None:
+            self.shadow.check_conflicts(
+                self.traffic_manager.link_traffic_pattern,
+                self.traffic_manager.job_time_period,
+                self.current_time,
+                time_next,
+                job_conflicts,
+            )
+        return job_conflicts
+
+    def solve_time_shifts(self, traffic_manager: Optional[TrafficManager] = None):
+        """
+        Run the solver of self.method and apply the resulting time shifts
+        to traffic_manager, self.traffic_manager by default
+        """
+        if traffic_manager is None:
+            traffic_manager = self.traffic_manager
+        self.max_link_jobs.append(
+            max(map(len, traffic_manager.link_traffic_pattern.values()), default=0)
+        )
+        if self.shadow is not None:
+            self.shadow.check_solver_inputs(traffic_manager, self.method)
+        start = time.perf_counter()
+        if self.metrics is not None:
+            self.metrics.solve_started()
         if self.method == "ours":
-            solve(self.traffic_manager)
+            solve(
+                traffic_manager,
+                self.stp_file_dir,
+                self.stp_solution_dir,
+                self.scip_pool,
+                self.max_component_size,
+                self.reduce_graphs,
+                self.current_time + self.update_time_interval,
+            )
         elif self.method == "cassini":
-            solve_by_cassini(self.traffic_manager)
+            solve_by_cassini(traffic_manager, self.reduce_graphs)
         elif self.method == "max_cut":
-            solve_by_max_cut(self.traffic_manager, 8)
-        job_conflicts = self.traffic_manager.update_traffic(
-            self.current_time + params.update_time_interval
-        )
-        return job_conflicts
+            solve_by_max_cut(
+                traffic_manager,
+                self.K,
+                self.max_component_size,
+                reduce_graphs=self.reduce_graphs,
+            )
+        elif self.method == "portfolio":
+            if self.portfolio is None:
+                self.portfolio = SolverPortfolio(
+                    K=self.K,
+                    scip_pool=self.scip_pool,
+                    stp_dir=self.stp_file_dir,
+                    solution_dir=self.stp_solution_dir,
+                    reduce_graphs=self.reduce_graphs,
+                )
+            self.portfolio.solve(
+                traffic_manager, self.current_time + self.update_time_interval
+            )
+        self.solve_time += time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.solve_finished()
 
     def step(self):
         """
         Step forward to the next time window.
         """
         self.time_count += 1
-        self.current_time += params.update_time_interval
+        self.current_time += self.update_time_interval
+        if not self.running_jobs and not self.job_queue and self.waiting_jobs:
+            # idle cluster, skip the windows before the next arrival
+            next_arrival_time = self.jobs[self.waiting_jobs[0]].arrival_time
+            idle_windows = (
+                next_arrival_time - self.current_time
+            ) // self.update_time_interval
+            if idle_windows > 0:
+                self.current_time += idle_windows * self.update_time_interval
+                self.traffic_manager.current_time = self.current_time
+
+    def draw_conflict_graph(self):
+        if self.conflict_graph_renderer is not None:
+            # the window of the frame starts at self.current_time, the traffic
+            # manager already moved on to the next one
+            self.traffic_manager.draw_conflict_graph(
+                self.conflict_graph_renderer.file_dir,
+                self.conflict_graph_renderer,
+                self.current_time,
+            )
+
+    def observe_metrics(self, released_jobs: List[str], deployed_jobs: List[str]):
+        if self.metrics is None:
+            return
+        self.metrics.observe_window(
+            self.current_time,
+            len(deployed_jobs),
+            len(released_jobs),
+            len(self.ended_jobs),
+            len(self.job_queue) if self.job_queue is not None else 0,
+            len(self.waiting_jobs),
+            len(self.running_jobs),
+            self.gpu_manager.gpu_occupation_rate(),
+            component_sizes(self.traffic_manager.link_traffic_pattern),
+        )
 
-    def run(self):
+    def track_memory(self, phase: str):
+        if self.memory_tracker is None:
+            return contextlib.nullcontext()
+        return self.memory_tracker.phase(phase)
+
+    def run(self, netsim_input: bool = True, pipelined: bool = False):
+        if self.memory_tracker is not None:
+            self.memory_tracker.start()
+        if self.shadow is not None:
+            self.shadow.start()
+        if self.metrics is not None:
+            self.metrics.start(len(self.jobs))
+        if self.placement_log_path is not None:
+            self.gpu_manager.placement_log = PlacementLog(
+                self.placement_log_path, len(self.gpu_manager.gpu_usage)
+            )
+        if pipelined:
+            self.run_windows_pipelined()
+        else:
+            while len(self.ended_jobs) < len(self.jobs):
+                with self.track_memory("release"):
+                    released_jobs = self.release_jobs()
+                with self.track_memory("deploy"):
+                    deployed_jobs = self.deploy_jobs()
+                with self.track_memory("solve"):
+                    job_conflicts = self.solve()
+                with self.track_memory("output"):
+                    self.draw_conflict_graph()
+                    self.update_job_traffic_start_points(released_jobs)
+                self.observe_metrics(released_jobs, deployed_jobs)
+                self.step()
+        self.finish(netsim_input)
+
+    def run_windows_pipelined(self):
+        """
+        Same results as the sequential loop, but the solver of window k+1 runs
+        in a background thread while the main thread does the conflict
+        accounting and output of window k on a snapshot of its state.
+        The solver is the only writer of the live state while it runs.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = None  # (snapshot, released_jobs) of the previous window
         while len(self.ended_jobs) < len(self.jobs):
-            released_jobs = self.release_jobs()
-            deployed_jobs = self.deploy_jobs()
-            job_conflicts = self.solve()
-            self.update_job_traffic_start_points(released_jobs)
+            with self.track_memory("release"):
+                released_jobs = self.release_jobs()
+            with self.track_memory("deploy"):
+                deployed_jobs = self.deploy_jobs()
+            with self.track_memory("solve"):
+                future = executor.submit(self.solve_time_shifts)
+                if pending is not None:
+                    self.account_snapshot(*pending)
+                future.result()
+            time_next = self.current_time + self.update_time_interval
+            with self.track_memory("snapshot"):
+                pending = (
+                    self.traffic_manager.snapshot(
+                        time_next, released_jobs + self.running_jobs
+                    ),
+                    released_jobs,
+                )
+            self.traffic_manager.drop_job_patterns(released_jobs)
+            # advance current_time as update_traffic does
+            self.traffic_manager.current_time = time_next
+            self.draw_conflict_graph()
+            self.observe_metrics(released_jobs, deployed_jobs)
             self.step()
-        self.generate_netsim_input()
+        if pending is not None:
+            self.account_snapshot(*pending)
+        executor.shutdown()
+
+    def account_snapshot(
+        self, snapshot: TrafficSnapshot, released_jobs: List[str]
+    ) -> Dict[str, int]:
+        job_conflicts = self.traffic_manager.update_traffic_from_snapshot(snapshot)
+        if self.metrics is not None:
+            self.metrics.account(job_conflicts)
+        if self.shadow is not None:
+            self.shadow.check_conflicts(
+                snapshot.link_traffic_pattern,
+                snapshot.job_time_period,
+                snapshot.current_time,
+                snapshot.time_next,
+                job_conflicts,
+            )
+        self.update_job_traffic_start_points(released_jobs, snapshot)
+        return job_conflicts
+
+    def scheduling_stats(self) -> Dict[str, float]:
+        """
+        GPU utilization over the makespan (first arrival to last release)
+        and queueing delay of deployed jobs, in time units
+        """
+        gpu_time = sum(
+            self.jobs[job_name].size * (released_time - deployed_time)
+            for job_name, released_time in self.gpu_manager.job_released_time.items()
+            for deployed_time in [self.gpu_manager.job_deployed_time[job_name]]
+        )
+        released_times = self.gpu_manager.job_released_time.values()
+        makespan = (
+            max(released_times) - min(job.arrival_time for job in self.jobs.values())
+            if released_times
+            else 0
+        )
+        num_gpu = len(self.gpu_manager.gpu_usage)
+        delays = np.array(list(self.queueing_delay.values()), dtype=float)
+        return {
+            "gpu_utilization": gpu_time / (num_gpu * makespan) if makespan > 0 else 0,
+            "avg_queueing_delay": delays.mean() if len(delays) else 0,
+            "p95_queueing_delay": np.percentile(delays, 95) if len(delays) else 0,
+            "max_queueing_delay": delays.max() if len(delays) else 0,
+            "makespan": makespan,
+        }
+
+    def report_routing_stats(self):
+        print(
+            f"[INFO] Routing {self.topology.routing}: "
+            f"max jobs per link {max(self.max_link_jobs, default=0)} "
+            f"(window average {np.mean(self.max_link_jobs or [0]):.1f}), "
+            f"solver time {self.solve_time:.2f}s."
+        )
+
+    def report_scheduling_stats(self):
+        stats = self.scheduling_stats()
+        print(
+            f"[INFO] Scheduling policy {self.scheduling_policy}: "
+            f"GPU utilization {stats['gpu_utilization']:.1%}, "
+            f"queueing delay avg {stats['avg_queueing_delay']:.0f} / "
+            f"p95 {stats['p95_queueing_delay']:.0f} / "
+            f"max {stats['max_queueing_delay']:.0f}, "
+            f"makespan {stats['makespan']}, {self.time_count} steps."
+        )
+
+    def finish(self, netsim_input: bool = True):
+        if self.conflict_graph_renderer is not None:
+            self.conflict_graph_renderer.close()
+        self.traffic_manager.report_overlap_stats()
+        if self.traffic_manager.link_timeline is not None:
+            self.traffic_manager.link_timeline.report()
+        self.traffic_manager.close()
+        if self.portfolio is not None:
+            self.portfolio.report()
+            self.portfolio.close()
+        if self.scip_pool is not None:
+            self.scip_pool.report()
+            self.scip_pool.close()
+        self.report_scheduling_stats()
+        self.report_routing_stats()
+        if self.shadow is not None:
+            self.shadow.report()
+        if self.metrics is not None:
+            self.metrics.close()
+        if self.gpu_manager.placement_log is not None:
+            self.gpu_manager.placement_log.close()
+            self.gpu_manager.placement_log.report()
+        if netsim_input:
+            with self.track_memory("netsim_input"):
+                self.generate_netsim_input()
+        if self.memory_tracker is not None:
+            self.memory_tracker.report()
+            self.memory_tracker.stop()
@@ -0,0 +1,400 @@
+import os
+import csv
+import time
+import random
+import itertools
+import contextlib
+import multiprocessing as mp
+import numpy as np
+import params
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import stp_file_dir, stp_solution_dir
+from utils import set_scipstp_semaphore
+from . import GPUManager, ClosTopology, RdmaOperateStore
+from .job import Job
+from .simulator import Simulator
+from typing import Dict, List, Optional
+
+# read-only data of the workers, inherited from the parent on fork
+_job_traces: Dict[int, Dict[str, Job]] = {}  # {seed: jobs}
+_topology_tables: Dict[str, Dict[int, List[np.ndarray]]] = {}  # {topology: templates}
+
+RESULT_FIELDS = [
+    "method",
+    "K",
+    "update_time_interval",
+    "seed",
+    "topology",
+    "policy",
+    "routing",
+    "num_jobs",
+    "steps",
+    "total_penalty",
+    "avg_penalty_rate",
+    "weighted_penalty_rate",
+    "gpu_utilization",
+    "avg_queueing_delay",
+    "max_link_jobs",
+    "solve_time",
+    "wall_time",
+]
+
+
+def topology_name(topology: Dict[str, int]) -> str:
+    """
+    Short label for ClosTopology kwargs, e.g. "12x64x6x8"
+    (spines x ToRs x servers per ToR x GPUs per server)
+    """
+    topology = ClosTopology(**topology)
+    return (
+        f"{topology.num_spines}x{topology.num_tors}"
+        f"x{topology.servers_per_tor}x{topology.gpus_per_server}"
+    )
+
+
+def generate_job_trace(seed: int) -> Dict[str, dict]:
+    """
+    Generate the random job trace of a given seed
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    simulator = Simulator()
+    simulator.generate_random_jobs()
+    return simulator.jobs
+
+
+def precompute_topology_tables(
+    topologies: List[Dict[str, int]], job_traces: Dict[int, Dict[str, Job]]
+) -> Dict[str, Dict[int, List[np.ndarray]]]:
+    """
+    RdmaOperateStore phase templates of every AllReduce group size found in
+    the job traces, built once per topology and shared by all its runs
+    """
+    sizes = sorted({job.size for jobs in job_traces.values() for job in jobs.values()})
+    tables = {}
+    for topology in topologies:
+        name = topology_name(topology)
+        if name in tables:
+            continue
+        topology = ClosTopology(**topology)
+        store = RdmaOperateStore(topology, params.all_reduce_implement)
+        for size in sizes:
+            if size < topology.gpus_per_server:
+                continue  # not a valid job size on this topology
+            gpu_groups = topology.dp_allreduce_gpu_groups(list(range(size)))
+            for group_size in {len(gpu_group) for gpu_group in gpu_groups}:
+                store.template(group_size)
+        tables[name] = store.templates
+    return tables
+
+
+def _init_worker(job_traces, topology_tables, scipstp_semaphore):
+    global _job_traces, _topology_tables
+    if job_traces is not None:
+        # not forked, the tables were pickled once per worker
+        _job_traces, _topology_tables = job_traces, topology_tables
+    set_scipstp_semaphore(scipstp_semaphore)
+
+
+def _run_single(run_config: dict) -> dict:
+    """
+    Run one simulation in a worker process and return its result row
+    """
+    topology = ClosTopology(**run_config["topology"])
+    num_gpu = topology.num_tors * topology.servers_per_tor * topology.gpus_per_server
+    run_name = "_".join(
+        str(run_config[key]) for key in ["method", "K", "update_time_interval", "seed"]
+    )
+    run_name += f"_{topology_name(run_config['topology'])}"
+    run_name += f"_{run_config['policy']}_{run_config['routing']}"
+
+    simulator = Simulator()
+    simulator.method = run_config["method"]
+    simulator.update_time_interval = run_config["update_time_interval"]
+    simulator.scheduling_policy = run_config["policy"]
+    if run_config["K"] is not None:
+        simulator.K = run_config["K"]
+    simulator.topology = topology
+    simulator.topology.routing = run_config["routing"]
+    simulator.job_rdma_operate_tuples = RdmaOperateStore(
+        topology, params.all_reduce_implement
+    )
+    # shared templates are never modified, sizes missing from them are added
+    # to this run's copy of the dict
+    simulator.job_rdma_operate_tuples.templates = dict(
+        _topology_tables.get(topology_name(run_config["topology"]), {})
+    )
+    simulator.gpu_manager = GPUManager(num_gpu)
+    simulator.stp_file_dir = os.path.join(stp_file_dir, run_name)
+    simulator.stp_solution_dir = os.path.join(stp_solution_dir, run_name)
+    simulator.jobs = _job_traces[run_config["seed"]]
+    simulator.reset_waiting_jobs()
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulator.run(netsim_input=False)
+    wall_time = time.perf_counter() - start
+
+    penalty = simulator.traffic_manager.penalty_time
+    penalty_rates = {
+        job_name: penalty.get(job_name, 0) / job.duration
+        for job_name, job in simulator.jobs.items()
+    }
+    weighted_sizes = {
+        job_name: job.size for job_name, job in simulator.jobs.items() if job.size > 8
+    }
+    total_size = sum(weighted_sizes.values())
+    scheduling_stats = simulator.scheduling_stats()
+    return {
+        "method": run_config["method"],
+        "K": run_config["K"],
+        "update_time_interval": run_config["update_time_interval"],
+        "seed": run_config["seed"],
+        "topology": topology_name(run_config["topology"]),
+        "policy": run_config["policy"],
+        "routing": run_config["routing"],
+        "num_jobs": len(simulator.jobs),
+        "steps": simulator.time_count,
+        "total_penalty": int(sum(penalty.values())),
+        "avg_penalty_rate": sum(penalty_rates.values()) / max(len(penalty_rates), 1),
+        "weighted_penalty_rate": (
+            sum(
+                penalty_rates[job_name] * size
+                for job_name, size in weighted_sizes.items()
+            )
+            / total_size
+            if total_size > 0
+            else 0
+        ),
+        "gpu_utilization": scheduling_stats["gpu_utilization"],
+        "avg_queueing_delay": scheduling_stats["avg_queueing_delay"],
+        "max_link_jobs": max(simulator.max_link_jobs, default=0),
+        "solve_time": simulator.solve_time,
+        "wall_time": wall_time,
+    }
+
+
+def build_grid(
+    methods: List[str],
+    Ks: List[int],
+    update_time_intervals: List[int],
+    seeds: List[int],
+    topologies: List[Dict[str, int]],
+    policies: Optional[List[str]] = None,
+    routings: Optional[List[str]] = None,
+) -> List[dict]:
+    """
+    Cartesian product of the sweep parameters.
+    K only matters for "max_cut", so other methods get a single run with K=None.
+    policies and routings default to ["fifo"] and ["hash"].
+    """
+    if policies is None:
+        policies = ["fifo"]
+    if routings is None:
+        routings = ["hash"]
+    grid = []
+    seen = set()
+    for (
+        method,
+        K,
+        update_time_interval,
+        seed,
+        topology,
+        policy,
+        routing,
+    ) in itertools.product(
+        methods, Ks, update_time_intervals, seeds, topologies, policies, routings
+    ):
+        if method != "max_cut":
+            K = None
+        key = (
+            method,
+            K,
+            update_time_interval,
+            seed,
+            topology_name(topology),
+            policy,
+            routing,
+        )
+        if key in seen:
+            continue
+        seen.add(key)
+        grid.append(
+            {
+                "method": method,
+                "K": K,
+                "update_time_interval": update_time_interval,
+                "seed": seed,
+                "topology": topology,
+                "policy": policy,
+                "routing": routing,
+            }
+        )
+    return grid
+
+
+def summarize(results: List[dict]) -> List[dict]:
+    """
+    Average results over seeds for each
+    (method, K, update_time_interval, topology, policy, routing)
+    """
+    groups = {}
+    for result in results:
+        key = (
+            result["method"],
+            result["K"],
+            result["update_time_interval"],
+            result["topology"],
+            result["policy"],
+            result["routing"],
+        )
+        groups.setdefault(key, []).append(result)
+    summary = []
+    for (method, K, update_time_interval, topology, policy, routing), rows in sorted(
+        groups.items(), key=lambda item: str(item[0])
+    ):
+        summary.append(
+            {
+                "method": method,
+                "K": K,
+                "update_time_interval": update_time_interval,
+                "topology": topology,
+                "policy": policy,
+                "routing": routing,
+                "runs": len(rows),
+                "total_penalty": np.mean([row["total_penalty"] for row in rows]),
+                "avg_penalty_rate": np.mean([row["avg_penalty_rate"] for row in rows]),
+                "weighted_penalty_rate": np.mean(
+                    [row["weighted_penalty_rate"] for row in rows]
+                ),
+                "gpu_utilization": np.mean([row["gpu_utilization"] for row in rows]),
+                "avg_queueing_delay": np.mean(
+                    [row["avg_queueing_delay"] for row in rows]
+                ),
+                "max_link_jobs": np.mean([row["max_link_jobs"] for row in rows]),
+                "solve_time": np.mean([row["solve_time"] for row in rows]),
+                "wall_time": np.mean([row["wall_time"] for row in rows]),
+            }
+        )
+    return summary
+
+
+def format_table(rows: List[dict]) -> str:
+    if not rows:
+        return ""
+    columns = list(rows[0].keys())
+    cells = [
+        [f"{row[c]:.4g}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+        for row in rows
+    ]
+    widths = [
+        max(len(column), *(len(cell[i]) for cell in cells))
+        for i, column in enumerate(columns)
+    ]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    for cell in cells:
+        lines.append("  ".join(c.ljust(w) for c, w in zip(cell, widths)))
+    return "\n".join(lines)
+
+
+def run_sweep(
+    methods: Optional[List[str]] = None,
+    Ks: Optional[List[int]] = None,
+    update_time_intervals: Optional[List[int]] = None,
+    seeds: Optional[List[int]] = None,
+    topologies: Optional[List[Dict[str, int]]] = None,
+    policies: Optional[List[str]] = None,
+    routings: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    max_scip_processes: int = 1,
+    job_traces: Optional[Dict[int, Dict[str, Job]]] = None,
+    save_dir: str = "save/sweep",
+) -> List[dict]:
+    """
+    Run every configuration of the grid across a process pool.
+    Job traces are generated once per seed and the RDMA templates once per
+    topology in the parent process. Forked workers inherit them, other start
+    methods get them once per worker at startup. At most max_scip_processes
+    scipstp processes run concurrently. Results are written to a single CSV
+    and the per-config averages over seeds are printed as a comparison table.
+    Defaults: all three methods, K=8, params.update_time_interval, seed 0,
+    the default topology, "fifo" and "hash".
+    """
+    global _job_traces, _topology_tables
+    if methods is None:
+        methods = ["ours", "cassini", "max_cut"]
+    if Ks is None:
+        Ks = [8]
+    if update_time_intervals is None:
+        update_time_intervals = [params.update_time_interval]
+    if seeds is None:
+        seeds = [0]
+    if topologies is None:
+        topologies = [{}]
+    grid = build_grid(
+        methods, Ks, update_time_intervals, seeds, topologies, policies, routings
+    )
+    if job_traces is None:
+        job_traces = {}
+    for seed in seeds:
+        if seed not in job_traces:
+            job_traces[seed] = generate_job_trace(seed)
+    topology_tables = precompute_topology_tables(topologies, job_traces)
+
+    context = mp.get_context()
+    scipstp_semaphore = context.Semaphore(max_scip_processes)
+    if context.get_start_method() == "fork":
+        _job_traces, _topology_tables = job_traces, topology_tables
+        initargs = (None, None, scipstp_semaphore)
+    else:
+        initargs = (job_traces, topology_tables, scipstp_semaphore)
+    results = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                executor.submit(_run_single, run_config): run_config
+                for run_config in grid
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(
+                    f"[INFO] Sweep run finished ({len(results)}/{len(grid)}): "
+                    f"method={result['method']}, K={result['K']}, "
+                    f"update_time_interval={result['update_time_interval']}, "
+                    f"seed={result['seed']}, topology={result['topology']}, "
+                    f"policy={result['policy']}, routing={result['routing']}"
+                )
+    finally:
+        _job_traces, _topology_tables = {}, {}
+
+    results.sort(
+        key=lambda row: (
+            row["method"],
+            str(row["K"]),
+            row["update_time_interval"],
+            row["topology"],
+            row["policy"],
+            row["routing"],
+            row["seed"],
+        )
+    )
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    file_path = os.path.join(
+        save_dir, f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    with open(file_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    print(format_table(summarize(results)))
+    print(f"[INFO] Sweep results saved to {file_path}")
+    return results
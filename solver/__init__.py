@@ -1,9 +1,20 @@
+from .sparse_bigraph import (
+    JobLinkBigraph,
+    construct_sparse_bigraph,
+    select_links_from_solution_file,
+)
 from .generate_stp_file import generate_stp_file
 from .graph_constructor import (
     construct_bigraph_from_solution_file,
     construct_bigraph_from_traffic_manager,
 )
-from .time_shifts import cal_time_shifts
-from .unify_time_shifts import bfs_unify_time_shift
+from .time_shifts import (
+    cal_time_shifts,
+    cal_time_shift_array,
+    cal_time_shift_array_cassini,
+)
+from .unify_time_shifts import array_unify_time_shift, bfs_unify_time_shift
 from .solve import solve, solve_by_cassini, solve_by_max_cut
 from .weighted_max_cut import cal_time_shift_by_max_k_cut
+from .portfolio import SolverPortfolio
+from .graph_reduction import BigraphReduction, ConflictGraphReduction
@@ -0,0 +1,190 @@
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from collections import deque
+from .graph_partition import partition_graph
+from simulate import TrafficManager
+from .sparse_bigraph import JobLinkBigraph
+from typing import Dict, List, Optional, Tuple
+
+
+def piece_order(adjacency, pieces: List[np.ndarray]) -> List[int]:
+    """
+    Order pieces breadth first over the cut edges, from the largest one,
+    so that every piece but the first is reconciled against a placed neighbor
+    """
+    labels = np.empty(adjacency.shape[0], dtype=np.int64)
+    for i, nodes in enumerate(pieces):
+        labels[nodes] = i
+    coo = adjacency.tocoo()
+    cut = labels[coo.row] != labels[coo.col]
+    neighbors = {i: set() for i in range(len(pieces))}
+    for piece, other in zip(
+        labels[coo.row[cut]].tolist(), labels[coo.col[cut]].tolist()
+    ):
+        neighbors[piece].add(other)
+    order, seen = [], set()
+    for root in sorted(range(len(pieces)), key=lambda i: -len(pieces[i])):
+        if root in seen:
+            continue
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            piece = queue.popleft()
+            order.append(piece)
+            for other in sorted(neighbors[piece]):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+    return order
+
+
+def connected_pieces(adjacency, pieces: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Split pieces into their connected parts, since the solution of a piece is
+    only defined up to a constant (or a rotation) per connected part
+    """
+    parts = []
+    for nodes in pieces:
+        num_parts, labels = connected_components(
+            adjacency[nodes][:, nodes], directed=False
+        )
+        if num_parts == 1:
+            parts.append(nodes)
+        else:
+            parts.extend(nodes[labels == label] for label in range(num_parts))
+    return parts
+
+
+def split_bigraph(
+    bigraph: JobLinkBigraph, max_size: int
+) -> Tuple[List[np.ndarray], List[JobLinkBigraph]]:
+    """
+    Partition the jobs of a (connected) bigraph into connected pieces of at
+    most max_size jobs, cutting as few shared links as possible.
+    Return the job indices of each piece, in reconciliation order, and the
+    bigraph of each piece: its jobs and all their links.
+    """
+    coo = bigraph.structure.tocoo()
+    incidence = sp.csr_matrix(
+        (np.ones(len(coo.data)), (coo.row, coo.col)), shape=coo.shape
+    )
+    # jobs sharing links, weighted by the number of shared links
+    adjacency = (incidence.T @ incidence).tocsr()
+    adjacency = (adjacency - sp.diags(adjacency.diagonal())).tocsr()
+    adjacency.eliminate_zeros()
+    pieces = connected_pieces(adjacency, partition_graph(adjacency, max_size))
+    pieces = [np.sort(pieces[i]) for i in piece_order(adjacency, pieces)]
+    subgraphs = []
+    for job_idx in pieces:
+        link_idx = np.flatnonzero(incidence[:, job_idx].getnnz(axis=1))
+        subgraphs.append(bigraph.subgraph(job_idx, link_idx))
+    return pieces, subgraphs
+
+
+def reconcile_unified_shifts(
+    bigraph: JobLinkBigraph,
+    pieces: List[np.ndarray],
+    piece_shifts: List[Dict[str, int]],
+    traffic_manager: Optional[TrafficManager] = None,
+    time_next: Optional[int] = None,
+    num_candidates: int = 4,
+) -> Dict[str, int]:
+    """
+    Merge the unified shifts of pieces solved apart.
+    The shifts of a piece are only defined up to a constant. Candidates for
+    it are the constants lining up edges of the piece on links with a placed
+    job with those links' offsets (shift - edge weight), as
+    array_unify_time_shift lines up the jobs of a link, the most voted first.
+    Each piece, in order, takes the most voted one, or if traffic_manager is
+    given, the one among num_candidates and 0 with the least conflict in
+    [current_time, time_next] predicted by evaluate_time_shifts.
+    """
+    link_idx, job_idx, edge_ids = bigraph.edges()
+    weights = bigraph.edge_shift[edge_ids]
+    num_links, num_jobs = len(bigraph.links), len(bigraph.jobs)
+    job_piece = np.empty(num_jobs, dtype=np.int64)
+    for i, jobs in enumerate(pieces):
+        job_piece[jobs] = i
+    link_offset = np.zeros(num_links, dtype=np.int64)
+    link_placed = np.zeros(num_links, dtype=bool)
+    job_shift = np.zeros(num_jobs, dtype=np.int64)
+    time_shifts = {}  # placed pieces
+    for i, (jobs, shifts) in enumerate(zip(pieces, piece_shifts)):
+        job_shift[jobs] = [shifts[bigraph.jobs[j]] for j in jobs.tolist()]
+        in_piece = job_piece[job_idx] == i
+        boundary = in_piece & link_placed[link_idx]
+        if boundary.any():
+            offsets = link_offset[link_idx[boundary]] - (
+                job_shift[job_idx[boundary]] - weights[boundary]
+            )
+            values, counts = np.unique(offsets, return_counts=True)
+            candidates = values[np.argsort(-counts, kind="stable")].tolist()
+            if traffic_manager is None:
+                constant = candidates[0]
+            else:
+                job_names = [bigraph.jobs[j] for j in jobs.tolist()]
+                piece_shift = job_shift[jobs]
+
+                def total_conflict(constant: int) -> int:
+                    time_shifts.update(
+                        zip(job_names, (piece_shift + constant).tolist())
+                    )
+                    return traffic_manager.evaluate_time_shifts(time_shifts, time_next)[
+                        1
+                    ]
+
+                constant = min([0, *candidates[:num_candidates]], key=total_conflict)
+            job_shift[jobs] += constant
+        time_shifts.update((bigraph.jobs[j], job_shift[j]) for j in jobs.tolist())
+        # links reached first by this piece take the offset of their first edge
+        new_edges = np.flatnonzero(in_piece & ~link_placed[link_idx])
+        new_links, first = np.unique(link_idx[new_edges], return_index=True)
+        first_edges = new_edges[first]
+        link_offset[new_links] = job_shift[job_idx[first_edges]] - weights[first_edges]
+        link_placed[new_links] = True
+    return dict(zip(bigraph.jobs, job_shift.tolist()))
+
+
+def split_conflict_graph(conflict_graph: nx.Graph, max_size: int) -> List[List[str]]:
+    """
+    Partition the jobs of a (connected) conflict graph into connected pieces
+    of at most max_size jobs, cutting as little conflict weight as possible.
+    Return the jobs of each piece, in reconciliation order.
+    """
+    nodes = list(conflict_graph.nodes)
+    adjacency = nx.to_scipy_sparse_array(conflict_graph, nodelist=nodes, format="csr")
+    pieces = connected_pieces(adjacency, partition_graph(adjacency, max_size))
+    return [
+        [nodes[i] for i in np.sort(pieces[piece]).tolist()]
+        for piece in piece_order(adjacency, pieces)
+    ]
+
+
+def reconcile_partitions(
+    conflict_graph: nx.Graph, piece_partitions: List[Dict[int, List[str]]], K: int
+) -> Dict[int, List[str]]:
+    """
+    Merge the max k-cut partitions (numbered 1..K) of pieces solved apart.
+    Each piece, in order, rotates its partition numbers by the amount that
+    puts the least conflict weight in the same partition as placed neighbors.
+    """
+    partition_of = {}  # {job_name: partition}
+    for partitions in piece_partitions:
+        piece_partition = {
+            job_name: k for k, job_names in partitions.items() for job_name in job_names
+        }
+        same_partition_weight = np.zeros(K)
+        for job_name, k in piece_partition.items():
+            for neighbor, data in conflict_graph[job_name].items():
+                if neighbor in partition_of:
+                    rotation = (partition_of[neighbor] - k) % K
+                    same_partition_weight[rotation] += data.get("weight", 1)
+        rotation = int(np.argmin(same_partition_weight))
+        for job_name, k in piece_partition.items():
+            partition_of[job_name] = (k - 1 + rotation) % K + 1
+    partitions = {k: [] for k in range(1, K + 1)}
+    for job_name, k in partition_of.items():
+        partitions[k].append(job_name)
+    return partitions
@@ -1,46 +1,51 @@
-import networkx as nx
-from simulate import TrafficManager
+import numpy as np
+from .sparse_bigraph import JobLinkBigraph
 
 
-def generate_stp_file(
-    subgraph: nx.Graph, traffic_manager: TrafficManager, stp_file_path: str
-):
-    job_list = [
-        job for job in subgraph.nodes if subgraph.nodes[job]["category"] == "job"
+def generate_stp_file(bigraph: JobLinkBigraph, stp_file_path: str):
+    """
+    Write a connected job-link bigraph as an .stp file.
+    Jobs are nodes 1..num_jobs and links follow; edge weights are inversed
+    traffic durations. Cost scales with the number of edges.
+    """
+    num_jobs, num_links = len(bigraph.jobs), len(bigraph.links)
+    link_idx, job_idx, edge_ids = bigraph.edges()
+    durations = bigraph.edge_duration[edge_ids]
+    nonzero = durations != 0  # I dont know why there are 0s
+    link_idx, job_idx, durations = (
+        link_idx[nonzero],
+        job_idx[nonzero],
+        durations[nonzero],
+    )
+    order = np.lexsort((link_idx, job_idx))  # job-major, as the nodes are numbered
+    edge_lines = [
+        f"E {job_id} {link_id} {1 / duration}\n"
+        for job_id, link_id, duration in zip(
+            (job_idx[order] + 1).tolist(),
+            (link_idx[order] + num_jobs + 1).tolist(),
+            durations[order].tolist(),
+        )
     ]
-    link_list = [
-        link for link in subgraph.nodes if subgraph.nodes[link]["category"] == "link"
-    ]
-    job_duration = traffic_manager.get_job_duration()
 
     # write to .stp file
     with open(stp_file_path, "w") as stp_file:
         stp_file.write("33d32945 STP File, STP Format Version  1.00\n\n")
         stp_file.write("SECTION Graph\n")
-        stp_file.write(f"Nodes {subgraph.number_of_nodes()}\n")
-        stp_file.write(f"Edges {subgraph.number_of_edges()}\n")
+        stp_file.write(f"Nodes {num_jobs + num_links}\n")
+        stp_file.write(f"Edges {len(edge_lines)}\n")
 
         # write edge information
-        for job_id, job_name in enumerate(job_list, start=1):
-            for link_id, link in enumerate(link_list, start=len(job_list) + 1):
-                duration = job_duration[link][job_name]
-                if duration == 0:
-                    continue  # I dont know why there are 0s
-                inversed_duration = 1 / duration
-                stp_file.write(f"E {job_id} {link_id} {inversed_duration}\n")
+        stp_file.writelines(edge_lines)
         stp_file.write("END\n\n")
 
         stp_file.write("SECTION Terminals\n")
-        stp_file.write(f"Terminals {len(job_list)}\n")
-        for job_id in range(1, len(job_list) + 1):
-            stp_file.write(f"T {job_id}\n")
+        stp_file.write(f"Terminals {num_jobs}\n")
+        stp_file.writelines(f"T {job_id}\n" for job_id in range(1, num_jobs + 1))
         stp_file.write("END\n\n")
 
         stp_file.write("SECTION MaximumDegrees\n")
-        for _ in range(len(job_list)):
-            stp_file.write(f"MD {len(link_list)}\n")
-        for _ in range(len(link_list)):
-            stp_file.write(f"MD {len(job_list)}\n")
+        stp_file.write(f"MD {num_links}\n" * num_jobs)
+        stp_file.write(f"MD {num_jobs}\n" * num_links)
         stp_file.write("END\n\n")
 
         stp_file.write("EOF")
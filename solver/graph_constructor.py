@@ -1,31 +1,33 @@
 import re
 import networkx as nx
-from .time_shifts import cal_time_shifts, cal_time_shifts_cassini
+from .time_shifts import (
+    cal_time_shift_array,
+    cal_time_shift_array_cassini,
+    cal_time_shifts_reference,
+)
+from .sparse_bigraph import construct_sparse_bigraph
 from simulate import TrafficManager
 
 
 def construct_bigraph_from_traffic_manager(traffic_manager: TrafficManager):
     # Construct bipartite graph from TrafficManager
-    bigraph = nx.Graph()
-    link_list = traffic_manager.get_link_list()
-
-    for link in link_list:
-        bigraph.add_node(link, category="link")
-        for job_name in traffic_manager.link_traffic_pattern[link].keys():
-            bigraph.add_node(job_name, category="job")
-            bigraph.add_edge(job_name, link)
-
-    # calculate time shifts: {link: {job: shift}}
-    time_shifts = cal_time_shifts(traffic_manager)
-    for link, jobs in time_shifts.items():
-        for job_name in jobs.keys():
-            bigraph[link][job_name]["weight"] = time_shifts[link][job_name]
-
-    return bigraph
+    # time shifts are stored as edge weights
+    return construct_sparse_bigraph(traffic_manager, cal_time_shift_array).to_networkx()
 
 
 def construct_bigraph_from_traffic_manager_cassini(traffic_manager: TrafficManager):
     # Construct bipartite graph from TrafficManager (CASSINI)
+    return construct_sparse_bigraph(
+        traffic_manager, cal_time_shift_array_cassini
+    ).to_networkx()
+
+
+def construct_bigraph_reference(
+    traffic_manager: TrafficManager, cal_time_shifts=cal_time_shifts_reference
+):
+    # Construct bipartite graph from TrafficManager node by node
+    # Kept as reference for construct_sparse_bigraph: same nodes, edges and
+    # weights, links in get_link_list order and jobs as first seen
     bigraph = nx.Graph()
     link_list = traffic_manager.get_link_list()
 
@@ -36,7 +38,7 @@ def construct_bigraph_from_traffic_manager_cassini(traffic_manager: TrafficManag
             bigraph.add_edge(job_name, link)
 
     # calculate time shifts: {link: {job: shift}}
-    time_shifts = cal_time_shifts_cassini(traffic_manager)
+    time_shifts = cal_time_shifts(traffic_manager)
     for link, jobs in time_shifts.items():
         for job_name in jobs.keys():
             bigraph[link][job_name]["weight"] = time_shifts[link][job_name]
@@ -0,0 +1,183 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Tuple
+
+
+def heavy_edge_matching(adjacency, rng: np.random.Generator) -> Tuple[np.ndarray, int]:
+    """
+    Match each node with its unmatched neighbor of heaviest edge, nodes
+    visited in random order. Return (coarse node of each node, number of
+    coarse nodes).
+    """
+    num_nodes = adjacency.shape[0]
+    indptr, indices, data = adjacency.indptr, adjacency.indices, adjacency.data
+    coarse = np.full(num_nodes, -1, dtype=np.int64)
+    num_coarse = 0
+    for node in rng.permutation(num_nodes).tolist():
+        if coarse[node] >= 0:
+            continue
+        coarse[node] = num_coarse
+        neighbors = indices[indptr[node] : indptr[node + 1]]
+        weights = data[indptr[node] : indptr[node + 1]]
+        free = coarse[neighbors] < 0
+        if free.any():
+            coarse[neighbors[free][np.argmax(weights[free])]] = num_coarse
+        num_coarse += 1
+    return coarse, num_coarse
+
+
+def coarsen(adjacency, node_weights: np.ndarray, coarse: np.ndarray, num_coarse: int):
+    """
+    Collapse matched nodes, summing node and parallel edge weights
+    """
+    projection = sp.csr_matrix(
+        (np.ones(len(coarse)), (np.arange(len(coarse)), coarse)),
+        shape=(len(coarse), num_coarse),
+    )
+    coarse_adjacency = projection.T @ adjacency @ projection
+    # edges inside a matched pair become self loops, drop them
+    coarse_adjacency = (
+        coarse_adjacency - sp.diags(coarse_adjacency.diagonal())
+    ).tocsr()
+    coarse_adjacency.eliminate_zeros()
+    coarse_weights = np.bincount(coarse, weights=node_weights, minlength=num_coarse)
+    return coarse_adjacency, coarse_weights
+
+
+def cut_weight(adjacency, side: np.ndarray) -> float:
+    coo = adjacency.tocoo()
+    return float(coo.data[side[coo.row] != side[coo.col]].sum()) / 2
+
+
+def grow_bisection(
+    adjacency, node_weights: np.ndarray, start: int, max_weight: float
+) -> np.ndarray:
+    """
+    Greedy graph growing: move nodes to side 1 from start, always the node
+    with the largest gain, until half of the weight moved
+    """
+    num_nodes = adjacency.shape[0]
+    indptr, indices, data = adjacency.indptr, adjacency.indices, adjacency.data
+    side = np.zeros(num_nodes, dtype=np.int64)
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    to_side_1 = np.zeros(num_nodes)  # edge weight to side 1
+    half = node_weights.sum() / 2
+    weight_1 = 0.0
+    node = start
+    while weight_1 + node_weights[node] <= max_weight:
+        side[node] = 1
+        weight_1 += node_weights[node]
+        to_side_1[indices[indptr[node] : indptr[node + 1]]] += data[
+            indptr[node] : indptr[node + 1]
+        ]
+        if weight_1 >= half:
+            break
+        gain = np.where(side == 0, 2 * to_side_1 - degree, -np.inf)
+        node = int(np.argmax(gain))
+        if side[node] == 1:
+            break
+    return side
+
+
+def refine_bisection(
+    adjacency,
+    node_weights: np.ndarray,
+    side: np.ndarray,
+    max_weight: float,
+    num_passes: int = 4,
+):
+    """
+    Boundary refinement in the style of Fiduccia-Mattheyses: move nodes
+    with positive gain (cut weight saved) to the other side, best gains
+    first, while both sides stay within max_weight
+    """
+    indptr, indices, data = adjacency.indptr, adjacency.indices, adjacency.data
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    side_weights = np.bincount(side, weights=node_weights, minlength=2)
+    for _ in range(num_passes):
+        to_side_1 = adjacency @ side
+        gain = np.where(side == 1, degree - 2 * to_side_1, 2 * to_side_1 - degree)
+        moved = 0
+        for node in np.argsort(-gain, kind="stable").tolist():
+            if gain[node] <= 0:
+                break
+            source = side[node]
+            if side_weights[1 - source] + node_weights[node] > max_weight:
+                continue
+            # gains are stale after earlier moves of this pass
+            neighbors = indices[indptr[node] : indptr[node + 1]]
+            weights = data[indptr[node] : indptr[node + 1]]
+            same = weights[side[neighbors] == source].sum()
+            if degree[node] - 2 * same <= 0:
+                continue
+            side[node] = 1 - source
+            side_weights[source] -= node_weights[node]
+            side_weights[1 - source] += node_weights[node]
+            moved += 1
+        if moved == 0:
+            break
+    return side
+
+
+def multilevel_bisection(
+    adjacency,
+    node_weights: np.ndarray,
+    rng: np.random.Generator,
+    imbalance: float = 0.1,
+    coarsest_size: int = 64,
+    num_tries: int = 4,
+) -> np.ndarray:
+    """
+    Split nodes into two sides of at most (1 + imbalance) / 2 of the weight,
+    with a small cut weight: coarsen by heavy edge matching, bisect the
+    coarsest graph by greedy growing, then project back level by level with
+    boundary refinement
+    """
+    max_weight = max(
+        node_weights.sum() * (1 + imbalance) / 2, float(node_weights.max())
+    )
+    levels = []  # (adjacency, node weights, coarse map) from fine to coarse
+    while adjacency.shape[0] > coarsest_size:
+        coarse, num_coarse = heavy_edge_matching(adjacency, rng)
+        if num_coarse > 0.9 * adjacency.shape[0]:
+            break  # matching stalled, e.g. a star
+        levels.append((adjacency, node_weights, coarse))
+        adjacency, node_weights = coarsen(adjacency, node_weights, coarse, num_coarse)
+
+    best_side, best_cut = None, np.inf
+    starts = rng.choice(adjacency.shape[0], min(num_tries, adjacency.shape[0]), False)
+    for start in starts.tolist():
+        side = grow_bisection(adjacency, node_weights, start, max_weight)
+        side = refine_bisection(adjacency, node_weights, side, max_weight)
+        cut = cut_weight(adjacency, side)
+        if cut < best_cut:
+            best_side, best_cut = side, cut
+    side = best_side
+
+    for adjacency, node_weights, coarse in reversed(levels):
+        side = refine_bisection(adjacency, node_weights, side[coarse], max_weight)
+    return side
+
+
+def partition_graph(adjacency, max_size: int, seed: int = 0) -> List[np.ndarray]:
+    """
+    Split the nodes of a weighted undirected graph (symmetric scipy sparse
+    adjacency) into pieces of at most max_size nodes by recursive multilevel
+    bisection, keeping the weight of the edges cut small.
+    Return the node indices of each piece.
+    """
+    adjacency = adjacency.tocsr().astype(np.float64)
+    rng = np.random.default_rng(seed)
+    pieces = []
+    stack = [np.arange(adjacency.shape[0])]
+    while stack:
+        nodes = stack.pop()
+        if len(nodes) <= max_size:
+            pieces.append(nodes)
+            continue
+        sub_adjacency = adjacency[nodes][:, nodes].tocsr()
+        side = multilevel_bisection(sub_adjacency, np.ones(len(nodes)), rng)
+        if side.all() or not side.any():
+            side = np.arange(len(nodes)) >= len(nodes) // 2
+        stack.extend([nodes[side == 1], nodes[side == 0]])
+    return pieces
@@ -0,0 +1,221 @@
+import numpy as np
+import networkx as nx
+from .sparse_bigraph import JobLinkBigraph
+from typing import Dict, List, Optional, Tuple
+
+
+class BigraphReduction:
+    """
+    Shrink a job-link bigraph before STP solving and unification, repeating
+    until nothing changes:
+        links carrying a single job are dropped, they connect nothing;
+        degree-1 jobs of a link are dropped but one, the representative,
+        which keeps the link forced into the Steiner tree;
+        parallel links are collapsed into the first one when they carry the
+        same jobs with the same traffic durations, and time shifts differing
+        by a constant (absorbed by the link offset), so that neither the
+        Steiner tree costs nor the unified shifts change.
+    A dropped job is only reachable through its link, so unification shifts
+    it by the link offset plus its edge weight, as its representative:
+    lift() recovers its shift from the representative's one. Jobs left
+    without links are components of their own, with shift 0.
+    """
+
+    reduced: JobLinkBigraph
+    removed: List[Tuple[str, str, int, int]]  # (job, representative, edge ids)
+    stats: Dict[str, Tuple[int, int]]  # {jobs/links/edges: (before, after)}
+
+    def __init__(self, bigraph: JobLinkBigraph):
+        num_links, num_jobs = len(bigraph.links), len(bigraph.jobs)
+        link_idx, job_idx, edge_ids = bigraph.edges()
+        edge_duration = bigraph.edge_duration[edge_ids]
+        edge_shift = bigraph.edge_shift[edge_ids]
+        alive = np.ones(len(edge_ids), dtype=bool)
+        self.removed = []
+        changed = True
+        while changed:
+            changed = False
+            # links carrying a single job
+            link_degree = np.bincount(link_idx[alive], minlength=num_links)
+            single = alive & (link_degree[link_idx] == 1)
+            if single.any():
+                alive &= ~single
+                changed = True
+            # degree-1 jobs, all but the first one of each link
+            job_degree = np.bincount(job_idx[alive], minlength=num_jobs)
+            leaves = np.flatnonzero(alive & (job_degree[job_idx] == 1))
+            if len(leaves) > 0:
+                order = np.lexsort((job_idx[leaves], link_idx[leaves]))
+                leaves = leaves[order]
+                first = np.ones(len(leaves), dtype=bool)
+                first[1:] = link_idx[leaves[1:]] != link_idx[leaves[:-1]]
+                representatives = leaves[
+                    np.maximum.accumulate(np.where(first, np.arange(len(leaves)), 0))
+                ]
+                dropped = ~first
+                for edge, representative in zip(
+                    leaves[dropped].tolist(), representatives[dropped].tolist()
+                ):
+                    self.removed.append(
+                        (
+                            bigraph.jobs[job_idx[edge]],
+                            bigraph.jobs[job_idx[representative]],
+                            int(edge_ids[edge]),
+                            int(edge_ids[representative]),
+                        )
+                    )
+                if dropped.any():
+                    alive[leaves[dropped]] = False
+                    changed = True
+            # parallel links, keyed by their jobs, durations and relative shifts
+            alive_edges = np.flatnonzero(alive)
+            alive_edges = alive_edges[
+                np.lexsort((job_idx[alive_edges], link_idx[alive_edges]))
+            ]
+            _, starts = np.unique(link_idx[alive_edges], return_index=True)
+            kept = set()
+            for edges in np.split(alive_edges, starts[1:]) if len(starts) else []:
+                key = (
+                    job_idx[edges].tobytes(),
+                    edge_duration[edges].tobytes(),
+                    (edge_shift[edges] - edge_shift[edges[0]]).tobytes(),
+                )
+                if key not in kept:
+                    kept.add(key)
+                    continue
+                alive[edges] = False
+                changed = True
+
+        jobs = np.arange(num_jobs)  # isolated jobs are kept
+        links = np.flatnonzero(np.bincount(link_idx[alive], minlength=num_links))
+        link_position = np.full(num_links, -1, dtype=np.int64)
+        link_position[links] = np.arange(len(links))
+        removed_jobs = {job_name for job_name, _, _, _ in self.removed}
+        jobs = np.array(
+            [j for j in jobs.tolist() if bigraph.jobs[j] not in removed_jobs],
+            dtype=np.int64,
+        )
+        job_position = np.full(num_jobs, -1, dtype=np.int64)
+        job_position[jobs] = np.arange(len(jobs))
+        self.reduced = JobLinkBigraph(
+            [bigraph.jobs[j] for j in jobs.tolist()],
+            [bigraph.links[i] for i in links.tolist()],
+            link_position[link_idx[alive]],
+            job_position[job_idx[alive]],
+            bigraph.edge_shift[edge_ids[alive]],
+            edge_duration[alive],
+        )
+        self.edge_shift = bigraph.edge_shift
+        self.stats = {
+            "jobs": (num_jobs, len(jobs)),
+            "links": (num_links, len(links)),
+            "edges": (len(edge_ids), int(alive.sum())),
+        }
+
+    def lift(self, time_shifts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Time shifts of all jobs from those of the reduced jobs, missing jobs
+        of the reduced bigraph (isolated ones) get 0
+        """
+        lifted = {
+            job_name: time_shifts.get(job_name, 0) for job_name in self.reduced.jobs
+        }
+        for job_name, representative, edge, representative_edge in reversed(
+            self.removed
+        ):
+            lifted[job_name] = int(
+                lifted[representative]
+                - self.edge_shift[representative_edge]
+                + self.edge_shift[edge]
+            )
+        return lifted
+
+
+class ConflictGraphReduction:
+    """
+    Shrink a conflict graph before max k-cut: a job with fewer than K
+    neighbors can always take a partition none of them uses, cutting all its
+    edges, so jobs are peeled off while their degree is below K.
+    lift() puts them back in reverse order, each in the first partition its
+    placed neighbors leave free: the cut weight is the optimum of the
+    reduced graph plus all edges of the peeled jobs, which is optimal.
+    """
+
+    reduced: nx.Graph
+    removed: List[str]
+    stats: Dict[str, Tuple[int, int]]  # {jobs/edges: (before, after)}
+
+    def __init__(self, conflict_graph: nx.Graph, K: int):
+        self.conflict_graph = conflict_graph
+        self.K = K
+        reduced = conflict_graph.copy()
+        self.removed = []
+        queue = [node for node in reduced.nodes if reduced.degree(node) < K]
+        while queue:
+            node = queue.pop()
+            if node not in reduced:
+                continue
+            neighbors = list(reduced.neighbors(node))
+            reduced.remove_node(node)
+            self.removed.append(node)
+            queue.extend(
+                neighbor for neighbor in neighbors if reduced.degree(neighbor) < K
+            )
+        self.reduced = reduced
+        self.stats = {
+            "jobs": (
+                conflict_graph.number_of_nodes(),
+                reduced.number_of_nodes(),
+            ),
+            "edges": (
+                conflict_graph.number_of_edges(),
+                reduced.number_of_edges(),
+            ),
+        }
+
+    def lift(
+        self, partitions: Optional[Dict[int, List[str]]]
+    ) -> Optional[Dict[int, List[str]]]:
+        """
+        Partitions (numbered 1..K) of all jobs from those of the reduced graph
+        """
+        if partitions is None:
+            return None
+        partitions = {k: list(partitions.get(k, [])) for k in range(1, self.K + 1)}
+        partition_of = {
+            job_name: k for k, job_names in partitions.items() for job_name in job_names
+        }
+        for node in reversed(self.removed):
+            used = {
+                partition_of[neighbor]
+                for neighbor in self.conflict_graph.neighbors(node)
+                if neighbor in partition_of
+            }
+            k = next(k for k in range(1, self.K + 1) if k not in used)
+            partition_of[node] = k
+            partitions[k].append(node)
+        return partitions
+
+
+def report_reduction(name: str, reductions: list):
+    """
+    Print how much the instances of a solver path shrank
+    """
+    if not reductions:
+        return
+    totals = {
+        key: tuple(
+            sum(reduction.stats[key][i] for reduction in reductions) for i in range(2)
+        )
+        for key in reductions[0].stats
+    }
+    if all(before == after for before, after in totals.values()):
+        return
+    count = f" ({len(reductions)} graphs)" if len(reductions) > 1 else ""
+    print(
+        f"[INFO] {name} graph reduction{count}: "
+        + ", ".join(
+            f"{key} {before} -> {after}" for key, (before, after) in totals.items()
+        )
+        + "."
+    )
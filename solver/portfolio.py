@@ -0,0 +1,276 @@
+import os
+import time
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from simulate import TrafficManager
+from utils import run_scipstp
+from .generate_stp_file import generate_stp_file
+from .sparse_bigraph import JobLinkBigraph, select_links_from_solution_file
+from .time_shifts import (
+    flatten_link_traffic,
+    cal_time_shift_array,
+    cal_time_shift_array_cassini,
+)
+from .unify_time_shifts import array_unify_time_shift
+from .graph_reduction import BigraphReduction, ConflictGraphReduction
+from .weighted_max_cut import cal_time_shift_by_max_k_cut
+from config import stp_file_dir, stp_solution_dir, scipstp_path_full
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _time_left(deadline: float) -> Optional[float]:
+    """
+    Seconds until deadline (a perf_counter time), None once it has passed
+    """
+    remaining = deadline - time.perf_counter()
+    return remaining if remaining > 0 else None
+
+
+def _shifts_by_max_cut(
+    state, conflict_graph, K: int, deadline: float, reduce_graphs: bool = False
+) -> Optional[Dict[str, int]]:
+    reduction = ConflictGraphReduction(conflict_graph, K) if reduce_graphs else None
+    time_limit = _time_left(deadline)
+    if time_limit is None:
+        return None
+    return cal_time_shift_by_max_k_cut(
+        state, conflict_graph, K, reduction, time_limit=time_limit
+    )
+
+
+def _shifts_by_stp(
+    bigraph: JobLinkBigraph,
+    stp_file_path: str,
+    solution_path: str,
+    scip_pool,
+    deadline: float,
+    reduce_graphs: bool = False,
+) -> Optional[Dict[str, int]]:
+    """
+    With reduce_graphs, every connected core of the reduced bigraph with more
+    than one job is solved on its own ("_{k}" file suffix), jobs left alone
+    keep shift 0
+    """
+    reduction = None
+    cores = [bigraph]
+    if reduce_graphs:
+        reduction = BigraphReduction(bigraph)
+        cores = [
+            core
+            for core in reduction.reduced.connected_subgraphs()
+            if len(core.jobs) > 1
+        ]
+    time_shifts = {}
+    for k, core in enumerate(cores):
+        core_stp_path, core_solution_path = stp_file_path, solution_path
+        if reduction is not None:
+            stp_root, stp_ext = os.path.splitext(stp_file_path)
+            solution_root, solution_ext = os.path.splitext(solution_path)
+            core_stp_path = f"{stp_root}_{k}{stp_ext}"
+            core_solution_path = f"{solution_root}_{k}{solution_ext}"
+        generate_stp_file(core, core_stp_path)
+        time_limit = _time_left(deadline)
+        if time_limit is None:
+            return None
+        if scip_pool is not None:
+            if not scip_pool.solve(core_stp_path, core_solution_path, time_limit):
+                return None
+        elif not run_scipstp(
+            scipstp_path_full, core_stp_path, core_solution_path, time_limit
+        ):
+            return None
+        time_shifts.update(
+            array_unify_time_shift(
+                select_links_from_solution_file(core, core_solution_path)
+            )
+        )
+    return time_shifts if reduction is None else reduction.lift(time_shifts)
+
+
+class SolverPortfolio:
+    """
+    Solve each connected component with several methods and keep, per
+    component, the time shifts with the least conflict in the current window.
+    "cassini" runs first for all components and is always available;
+    "max_cut" and "ours" (STP) race in a thread pool until the deadline
+    (seconds per window), results arriving later are dropped. Each solver call
+    gets the time left until the deadline as its own limit (CBC timeLimit,
+    SCIP limits/time) when it starts, so no worker keeps solving for a past
+    window.
+    Wins are counted per method and component size (power of two buckets).
+    """
+
+    wins: Dict[Tuple[str, int], int]  # {(method, size bucket): wins}
+
+    def __init__(
+        self,
+        methods: Sequence[str] = ("cassini", "max_cut", "ours"),
+        deadline: float = 10.0,
+        K: int = 8,
+        scip_pool=None,
+        stp_dir: str = stp_file_dir,
+        solution_dir: str = stp_solution_dir,
+        max_workers: int = 4,
+        reduce_graphs: bool = False,
+    ):
+        self.methods = list(methods)
+        if "ours" in methods and scip_pool is None:
+            if not os.path.exists(os.path.join(scipstp_path_full, "scipstp")):
+                print("[INFO] scipstp not found, portfolio runs without ours.")
+                self.methods = [method for method in methods if method != "ours"]
+        self.deadline = deadline
+        self.K = K
+        self.scip_pool = scip_pool
+        self.stp_dir = stp_dir
+        self.solution_dir = solution_dir
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.reduce_graphs = reduce_graphs  # BigraphReduction / ConflictGraphReduction
+        self.wins = {}
+        self.num_late = 0  # results missing the deadline
+
+    def evaluate(
+        self,
+        traffic_manager: TrafficManager,
+        job_names: List[str],
+        time_shifts: Dict[str, int],
+        time_next: int,
+    ) -> int:
+        """
+        Total conflict of job_names in [current_time, time_next]
+        if time_shifts were applied, without touching traffic_manager
+        """
+        job_conflicts, _ = traffic_manager.evaluate_time_shifts(time_shifts, time_next)
+        return int(sum(job_conflicts[job_name] for job_name in job_names))
+
+    def solve(self, traffic_manager: TrafficManager, time_next: int) -> Dict[str, int]:
+        """
+        Apply the best time shifts of each component to traffic_manager
+        and return them
+        """
+        start = time.perf_counter()
+        deadline = start + self.deadline
+        # both bigraphs share the edge order of a single flatten pass
+        links, jobs, traffic = flatten_link_traffic(traffic_manager)
+        edge_duration = traffic["interval_end"] - traffic["interval_start"]
+        bigraph = JobLinkBigraph(
+            jobs,
+            links,
+            traffic["link"],
+            traffic["job"],
+            cal_time_shift_array(traffic),
+            edge_duration,
+        )
+        components = [
+            (job_idx, link_idx)
+            for job_idx, link_idx in bigraph.components()
+            if len(job_idx) > 1  # a single job has nothing to conflict with
+        ]
+        if not components:
+            return {}
+        cassini_bigraph = JobLinkBigraph(
+            jobs,
+            links,
+            traffic["link"],
+            traffic["job"],
+            cal_time_shift_array_cassini(traffic),
+            edge_duration,
+        )
+        cassini_shifts = array_unify_time_shift(cassini_bigraph)
+
+        # frozen state for the threads, which may outlive this window
+        state = SimpleNamespace(
+            job_time_period=dict(traffic_manager.job_time_period),
+            job_traffic_pattern=dict(traffic_manager.job_traffic_pattern),
+        )
+        conflict_graph = None
+        if "max_cut" in self.methods:
+            conflict_graph = traffic_manager.get_conflict_graph()
+        futures = {}
+        for i, (job_idx, link_idx) in enumerate(components):
+            job_names = [bigraph.jobs[j] for j in job_idx]
+            if "max_cut" in self.methods:
+                subgraph = conflict_graph.subgraph(job_names).copy()
+                future = self.executor.submit(
+                    _shifts_by_max_cut,
+                    state,
+                    subgraph,
+                    self.K,
+                    deadline,
+                    self.reduce_graphs,
+                )
+                futures[future] = (i, "max_cut")
+            if "ours" in self.methods:
+                os.makedirs(self.stp_dir, exist_ok=True)
+                os.makedirs(self.solution_dir, exist_ok=True)
+                name = f"{traffic_manager.current_time}_{i}"
+                future = self.executor.submit(
+                    _shifts_by_stp,
+                    bigraph.subgraph(job_idx, link_idx),
+                    os.path.join(os.getcwd(), self.stp_dir, f"{name}.stp"),
+                    os.path.join(os.getcwd(), self.solution_dir, f"{name}.txt"),
+                    self.scip_pool,
+                    deadline,
+                    self.reduce_graphs,
+                )
+                futures[future] = (i, "ours")
+
+        # candidates: no shift and cassini, then the racing methods.
+        # Ties go to the first method listed, "none" last.
+        candidates = [[] for _ in components]  # [(score, rank, method, shifts)]
+        ranks = {method: rank for rank, method in enumerate([*self.methods, "none"])}
+
+        def add_candidate(component, method, shifts):
+            job_names = [bigraph.jobs[j] for j in components[component][0]]
+            score = self.evaluate(traffic_manager, job_names, shifts, time_next)
+            candidates[component].append((score, ranks[method], method, shifts))
+
+        for i, (job_idx, _) in enumerate(components):
+            add_candidate(i, "none", {})
+            if "cassini" in self.methods:
+                add_candidate(
+                    i,
+                    "cassini",
+                    {bigraph.jobs[j]: cassini_shifts[bigraph.jobs[j]] for j in job_idx},
+                )
+        remaining = deadline - time.perf_counter()
+        try:
+            for future in as_completed(futures, timeout=max(remaining, 0)):
+                i, method = futures[future]
+                try:
+                    shifts = future.result()
+                except Exception as error:
+                    print(f"[INFO] Portfolio {method} failed: {error}")
+                    continue
+                if shifts is not None:
+                    add_candidate(i, method, shifts)
+        except TimeoutError:
+            # queued calls are cancelled, running ones stop at their time limit
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+                    self.num_late += 1
+
+        time_shifts = {}
+        for (job_idx, _), component_candidates in zip(components, candidates):
+            score, _, method, shifts = min(
+                component_candidates, key=lambda candidate: candidate[:2]
+            )
+            size_bucket = 1 << (len(job_idx) - 1).bit_length()
+            self.wins[(method, size_bucket)] = (
+                self.wins.get((method, size_bucket), 0) + 1
+            )
+            time_shifts.update(shifts)
+        traffic_manager.update_job_time_periods(time_shifts)
+        return time_shifts
+
+    def report(self):
+        print(f"[INFO] Portfolio wins ({self.num_late} results after the deadline):")
+        for size_bucket in sorted({size for _, size in self.wins}):
+            counts = ", ".join(
+                f"{method} {self.wins.get((method, size_bucket), 0)}"
+                for method in [*self.methods, "none"]
+            )
+            print(f"[INFO]   components of <= {size_bucket} jobs: {counts}")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
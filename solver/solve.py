@@ -1,59 +1,170 @@
 import os
+import params
 import networkx as nx
+from concurrent.futures import ThreadPoolExecutor
 from simulate import TrafficManager
 from .generate_stp_file import generate_stp_file
-from .graph_constructor import (
-    construct_bigraph_from_solution_file,
-    construct_bigraph_from_traffic_manager,
-    construct_bigraph_from_traffic_manager_cassini,
+from .sparse_bigraph import construct_sparse_bigraph, select_links_from_solution_file
+from .time_shifts import cal_time_shift_array, cal_time_shift_array_cassini
+from .unify_time_shifts import array_unify_time_shift
+from .weighted_max_cut import (
+    cal_time_shift_by_max_k_cut,
+    max_k_cut_networkx,
+    time_shifts_from_partitions,
 )
-from .unify_time_shifts import bfs_unify_time_shift
-from .weighted_max_cut import cal_time_shift_by_max_k_cut
-from utils import run_scipstp
+from .graph_reduction import BigraphReduction, ConflictGraphReduction, report_reduction
+from utils import run_scipstp, ScipSessionPool
 from config import stp_file_dir, stp_solution_dir, scipstp_path_full
+from typing import List, Optional
 
 
-def solve(traffic_manager: TrafficManager):
-    if not os.path.exists(stp_file_dir):
-        os.makedirs(stp_file_dir)
-    if not os.path.exists(stp_solution_dir):
-        os.makedirs(stp_solution_dir)
+def solve(
+    traffic_manager: TrafficManager,
+    stp_dir: str = stp_file_dir,
+    solution_dir: str = stp_solution_dir,
+    scip_pool: Optional[ScipSessionPool] = None,
+    max_component_size: Optional[int] = None,
+    reduce_graphs: bool = False,
+    time_next: Optional[int] = None,
+):
+    """
+    scip_pool: warm scipstp sessions solving the components concurrently,
+    otherwise one scipstp process is run per component
+    max_component_size: components with more jobs are split into pieces of at
+    most this many jobs, solved apart and reconciled on the links they share,
+    scored by the conflict predicted in the next window
+    reduce_graphs: solve the bigraph shrunk by BigraphReduction, jobs left
+    alone skip scipstp, and lift the time shifts back to all jobs
+    time_next: end of the window scoring the reconciliation, one
+    params.update_time_interval after current_time by default
+    """
+    if time_next is None:
+        time_next = traffic_manager.current_time + params.update_time_interval
+    if not os.path.exists(stp_dir):
+        os.makedirs(stp_dir)
+    if not os.path.exists(solution_dir):
+        os.makedirs(solution_dir)
 
-    bigraph = construct_bigraph_from_traffic_manager(traffic_manager)
-    subgraphs = [bigraph.subgraph(c).copy() for c in nx.connected_components(bigraph)]
-    time_shifts = {}
-    for i, subgraph in enumerate(subgraphs):
-        stp_file_path = os.path.join(
-            stp_file_dir, f"{traffic_manager.current_time}_{i}.stp"
+    bigraph = construct_sparse_bigraph(traffic_manager, cal_time_shift_array)
+    reduction = None
+    if reduce_graphs:
+        reduction = BigraphReduction(bigraph)
+        report_reduction("STP", [reduction])
+        bigraph = reduction.reduced
+    components = []  # (component, job pieces or None, indices in subgraphs)
+    subgraphs = []  # bigraphs handed to scipstp
+    for component in bigraph.connected_subgraphs():
+        if reduction is not None and len(component.jobs) == 1:
+            continue  # no links left, shift 0
+        if max_component_size is not None and len(component.jobs) > max_component_size:
+            # decomposition needs scipy, imported once a component is split
+            from .decomposition import split_bigraph
+
+            pieces, piece_subgraphs = split_bigraph(component, max_component_size)
+        else:
+            pieces, piece_subgraphs = None, [component]
+        components.append(
+            (
+                component,
+                pieces,
+                range(len(subgraphs), len(subgraphs) + len(piece_subgraphs)),
+            )
         )
+        subgraphs.extend(piece_subgraphs)
+    report_decomposition(
+        [len(indices) for _, pieces, indices in components if pieces is not None],
+        max_component_size,
+    )
+    solution_paths = []
+    for i, subgraph in enumerate(subgraphs):
+        stp_file_path = os.path.join(stp_dir, f"{traffic_manager.current_time}_{i}.stp")
         stp_file_path_full = os.path.join(os.getcwd(), stp_file_path)
         stp_solution_path = os.path.join(
-            stp_solution_dir, f"{traffic_manager.current_time}_{i}.txt"
+            solution_dir, f"{traffic_manager.current_time}_{i}.txt"
         )
         stp_solution_path_full = os.path.join(os.getcwd(), stp_solution_path)
-        generate_stp_file(subgraph, traffic_manager, stp_file_path)
-        run_scipstp(
-            scipstp_path_full,
-            stp_file_path_full,
-            stp_solution_path_full,
-        )
-        solution_bigraph = construct_bigraph_from_solution_file(
-            subgraph, stp_solution_path
-        )
-        time_shifts.update(bfs_unify_time_shift(solution_bigraph))
+        generate_stp_file(subgraph, stp_file_path)
+        if scip_pool is None:
+            run_scipstp(
+                scipstp_path_full,
+                stp_file_path_full,
+                stp_solution_path_full,
+            )
+        solution_paths.append((stp_file_path_full, stp_solution_path_full))
+    if scip_pool is None:
+        solved = [True] * len(subgraphs)
+    else:
+        solved = scip_pool.solve_many(solution_paths)
+    subgraph_shifts = []
+    for subgraph, (_, stp_solution_path), success in zip(
+        subgraphs, solution_paths, solved
+    ):
+        if success:
+            solution_bigraph = select_links_from_solution_file(
+                subgraph, stp_solution_path
+            )
+        else:
+            # no Steiner tree in time, unify over all links of the component
+            print(f"[INFO] No STP solution for {stp_solution_path}, using all links.")
+            solution_bigraph = subgraph
+        subgraph_shifts.append(array_unify_time_shift(solution_bigraph))
+    time_shifts = {}
+    for component, pieces, indices in components:
+        if pieces is None:
+            time_shifts.update(subgraph_shifts[indices[0]])
+        else:
+            from .decomposition import reconcile_unified_shifts
+
+            time_shifts.update(
+                reconcile_unified_shifts(
+                    component,
+                    pieces,
+                    [subgraph_shifts[i] for i in indices],
+                    traffic_manager,
+                    time_next,
+                )
+            )
+    if reduction is not None:
+        time_shifts = reduction.lift(time_shifts)
     traffic_manager.update_job_time_periods(time_shifts)
 
 
-def solve_by_cassini(traffic_manager: TrafficManager):
-    bigraph = construct_bigraph_from_traffic_manager_cassini(traffic_manager)
-    subgraphs = [bigraph.subgraph(c).copy() for c in nx.connected_components(bigraph)]
-    time_shifts = {}
-    for subgraph in subgraphs:
-        time_shifts.update(bfs_unify_time_shift(subgraph))
+def report_decomposition(piece_counts: List[int], max_component_size: Optional[int]):
+    """
+    piece_counts: number of pieces of each split component
+    """
+    if piece_counts:
+        print(
+            f"[INFO] Split {len(piece_counts)} components of more than "
+            f"{max_component_size} jobs into {sum(piece_counts)} pieces."
+        )
+
+
+def solve_by_cassini(traffic_manager: TrafficManager, reduce_graphs: bool = False):
+    bigraph = construct_sparse_bigraph(traffic_manager, cal_time_shift_array_cassini)
+    if reduce_graphs:
+        reduction = BigraphReduction(bigraph)
+        report_reduction("cassini", [reduction])
+        time_shifts = reduction.lift(array_unify_time_shift(reduction.reduced))
+    else:
+        time_shifts = array_unify_time_shift(bigraph)  # all components at once
     traffic_manager.update_job_time_periods(time_shifts)
 
 
-def solve_by_max_cut(traffic_manager: TrafficManager, K=5):
+def solve_by_max_cut(
+    traffic_manager: TrafficManager,
+    K=5,
+    max_component_size: Optional[int] = None,
+    max_workers: int = 4,
+    reduce_graphs: bool = False,
+):
+    """
+    max_component_size: components with more jobs are split into pieces of at
+    most this many jobs, cut in parallel threads and reconciled on the
+    conflicts between pieces
+    reduce_graphs: cut the components shrunk by ConflictGraphReduction and
+    lift the partitions back to all jobs
+    """
     conflict_graph = traffic_manager.get_conflict_graph()
     subgraphs = [
         conflict_graph.subgraph(c).copy()
@@ -61,8 +172,42 @@ def solve_by_max_cut(traffic_manager: TrafficManager, K=5):
     ]
     time_shift = {}
     time_shifts = {}
+    piece_counts = []  # pieces of each split component
+    reductions = []
     for subgraph in subgraphs:
-        time_shift = cal_time_shift_by_max_k_cut(traffic_manager, subgraph, K)
+        reduction = None
+        reduced = subgraph
+        if reduce_graphs:
+            reduction = ConflictGraphReduction(subgraph, K)
+            reductions.append(reduction)
+            reduced = reduction.reduced
+        if max_component_size is None or len(reduced) <= max_component_size:
+            time_shift = cal_time_shift_by_max_k_cut(
+                traffic_manager, subgraph, K, reduction
+            )
+            time_shifts.update(time_shift)
+            continue
+        # decomposition needs scipy, imported once a component is split
+        from .decomposition import split_conflict_graph, reconcile_partitions
+
+        pieces = split_conflict_graph(reduced, max_component_size)
+        piece_counts.append(len(pieces))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            piece_partitions = list(
+                executor.map(
+                    lambda piece: max_k_cut_networkx(reduced.subgraph(piece).copy(), K),
+                    pieces,
+                )
+            )
+        T_min = min(
+            [traffic_manager.job_traffic_pattern[job_name].T for job_name in subgraph]
+        )
+        partitions = reconcile_partitions(reduced, piece_partitions, K)
+        if reduction is not None:
+            partitions = reduction.lift(partitions)
+        time_shift = time_shifts_from_partitions(traffic_manager, partitions, T_min, K)
         time_shifts.update(time_shift)
+    report_decomposition(piece_counts, max_component_size)
+    report_reduction("max-cut", reductions)
     traffic_manager.update_job_time_periods(time_shifts)
     return time_shifts
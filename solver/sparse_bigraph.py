@@ -0,0 +1,168 @@
+import re
+import numpy as np
+import networkx as nx
+from simulate import TrafficManager
+from simulate.network_elements import Link
+from .time_shifts import flatten_link_traffic, cal_time_shift_array
+from typing import Dict, List, Tuple
+
+
+class JobLinkBigraph:
+    """
+    Job-link bipartite graph held as a (links x jobs) CSR matrix.
+    Matrix entries are 1-based edge ids indexing edge_shift and edge_duration,
+    so that zero-valued time shifts are never dropped by SciPy.
+    SciPy is imported on first use, only the "ours" and "cassini" methods need it.
+    """
+
+    jobs: List[str]
+    links: List[Link]
+    structure: "scipy.sparse.csr_matrix"
+    edge_shift: np.ndarray
+    edge_duration: np.ndarray
+
+    def __init__(
+        self,
+        jobs: List[str],
+        links: List[Link],
+        rows: np.ndarray,
+        cols: np.ndarray,
+        edge_shift: np.ndarray,
+        edge_duration: np.ndarray,
+    ):
+        import scipy.sparse as sp
+
+        self.jobs = jobs
+        self.links = links
+        self.edge_shift = np.asarray(edge_shift, dtype=np.int64)
+        self.edge_duration = np.asarray(edge_duration, dtype=np.int64)
+        edge_ids = np.arange(1, len(rows) + 1, dtype=np.int64)
+        self.structure = sp.csr_matrix(
+            (edge_ids, (rows, cols)), shape=(len(links), len(jobs))
+        )
+
+    @property
+    def number_of_edges(self) -> int:
+        return self.structure.nnz
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return (link index, job index, edge id - 1) arrays ordered by edge id,
+        i.e. in link_traffic_pattern iteration order
+        """
+        coo = self.structure.tocoo()
+        order = np.argsort(coo.data, kind="stable")
+        return coo.row[order], coo.col[order], coo.data[order] - 1
+
+    def component_labels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return connected component labels of (links, jobs)
+        """
+        import scipy.sparse as sp
+        from scipy.sparse.csgraph import connected_components
+
+        num_links, num_jobs = self.structure.shape
+        link_idx, job_idx, _ = self.edges()
+        adjacency = sp.coo_matrix(
+            (np.ones(len(link_idx)), (link_idx, job_idx + num_links)),
+            shape=(num_links + num_jobs, num_links + num_jobs),
+        )
+        _, labels = connected_components(adjacency, directed=False)
+        return labels[:num_links], labels[num_links:]
+
+    def components(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return (job indices, link indices) of each connected component
+        """
+        link_labels, job_labels = self.component_labels()
+        labels = np.concatenate([link_labels, job_labels])
+        job_order = np.argsort(job_labels, kind="stable")
+        link_order = np.argsort(link_labels, kind="stable")
+        num_labels = labels.max() + 1 if len(labels) else 0
+        job_splits = np.cumsum(np.bincount(job_labels, minlength=num_labels))[:-1]
+        link_splits = np.cumsum(np.bincount(link_labels, minlength=num_labels))[:-1]
+        components = zip(
+            np.split(job_order, job_splits), np.split(link_order, link_splits)
+        )
+        # isolated nodes cannot exist, every job and link has at least one edge
+        return [(jobs, links) for jobs, links in components if len(jobs) > 0]
+
+    def subgraph(self, job_idx: np.ndarray, link_idx: np.ndarray) -> "JobLinkBigraph":
+        """
+        Induced subgraph on the given job and link indices (kept in that order)
+        """
+        sub_structure = self.structure[link_idx][:, job_idx].tocoo()
+        order = np.argsort(sub_structure.data, kind="stable")
+        edge_ids = sub_structure.data[order] - 1
+        return JobLinkBigraph(
+            [self.jobs[i] for i in job_idx],
+            [self.links[i] for i in link_idx],
+            sub_structure.row[order],
+            sub_structure.col[order],
+            self.edge_shift[edge_ids],
+            self.edge_duration[edge_ids],
+        )
+
+    def connected_subgraphs(self) -> List["JobLinkBigraph"]:
+        return [
+            self.subgraph(job_idx, link_idx) for job_idx, link_idx in self.components()
+        ]
+
+    def to_networkx(self) -> nx.Graph:
+        """
+        Same graph as the networkx constructors: "category" node attribute
+        and time shifts as "weight" edge attribute
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(self.jobs, category="job")
+        graph.add_nodes_from(self.links, category="link")
+        link_idx, job_idx, edge_ids = self.edges()
+        graph.add_weighted_edges_from(
+            zip(
+                [self.links[i] for i in link_idx],
+                [self.jobs[i] for i in job_idx],
+                self.edge_shift[edge_ids].tolist(),
+            )
+        )
+        return graph
+
+
+def construct_sparse_bigraph(
+    traffic_manager: TrafficManager, cal_time_shift=cal_time_shift_array
+) -> JobLinkBigraph:
+    """
+    Build the job-link bigraph in a single pass over link_traffic_pattern.
+    cal_time_shift: cal_time_shift_array or cal_time_shift_array_cassini
+    """
+    links, jobs, traffic = flatten_link_traffic(traffic_manager)
+    return JobLinkBigraph(
+        jobs,
+        links,
+        traffic["link"],
+        traffic["job"],
+        cal_time_shift(traffic),
+        traffic["interval_end"] - traffic["interval_start"],
+    )
+
+
+def select_links_from_solution_file(
+    bigraph: JobLinkBigraph, solution_file_path: str
+) -> JobLinkBigraph:
+    """
+    Restrict bigraph to all jobs plus the links used by the Steiner tree
+    in solution_file_path (node ids as written by generate_stp_file)
+    """
+    num_jobs = len(bigraph.jobs)
+    with open(solution_file_path, "r") as file:
+        content = file.read()
+    edge_pattern = re.compile(r"x_(\d+)_(\d+)\s+1\s+\(obj:\d*\.?\d+\)")
+    node_ids = np.array(
+        [
+            [int(node_1), int(node_2)]
+            for node_1, node_2 in edge_pattern.findall(content)
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    # note that indices here are 0-based, jobs come first
+    link_ids = np.unique(node_ids.max(axis=1)) - num_jobs
+    return bigraph.subgraph(np.arange(num_jobs), link_ids)
@@ -1,27 +1,130 @@
+import numpy as np
 from simulate import TrafficManager
+from simulate.network_elements import Link
+from typing import Dict, List, Tuple
+
+
+def flatten_link_traffic(
+    traffic_manager: TrafficManager,
+) -> Tuple[List[Link], List[str], Dict[str, np.ndarray]]:
+    """
+    Flatten link_traffic_pattern into one entry per (link, job) pair,
+    in link_traffic_pattern iteration order (so grouped by link).
+    Return links, jobs (by first appearance) and a dict of arrays:
+    "link", "job" (indices), "T", "start", "interval_start", "interval_end"
+    """
+    links = traffic_manager.get_link_list()
+    job_index = {}
+    columns = {
+        key: []
+        for key in ["link", "job", "T", "start", "interval_start", "interval_end"]
+    }
+    for link_id, link in enumerate(links):
+        for job_name, pattern in traffic_manager.link_traffic_pattern[link].items():
+            if job_name not in job_index:
+                job_index[job_name] = len(job_index)
+            columns["link"].append(link_id)
+            columns["job"].append(job_index[job_name])
+            columns["T"].append(pattern.T)
+            columns["start"].append(traffic_manager.job_time_period[job_name][0])
+            columns["interval_start"].append(pattern.interval[0])
+            columns["interval_end"].append(pattern.interval[1])
+    traffic = {key: np.array(value, dtype=np.int64) for key, value in columns.items()}
+    return links, list(job_index.keys()), traffic
+
+
+def _link_segments(link: np.ndarray, num_links: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Number of jobs and first entry of each link in a link-grouped array
+    """
+    link_job_num = np.bincount(link, minlength=num_links)
+    segment_start = np.concatenate([[0], np.cumsum(link_job_num)[:-1]])
+    return link_job_num, segment_start
+
+
+def cal_time_shift_array(traffic: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Time shift of every (link, job) entry of flatten_link_traffic.
+    Same slots as cal_time_shifts: jobs on a link are sorted by T (stable)
+    and placed every T_min // link_job_num, done as one segmented sort.
+    """
+    link, T = traffic["link"], traffic["T"]
+    if len(link) == 0:
+        return np.zeros(0, dtype=np.int64)
+    num_links = link.max() + 1
+    link_job_num, segment_start = _link_segments(link, num_links)
+    T_min = np.minimum.reduceat(T, segment_start)  # Min T of each link
+    interval_len = T_min // link_job_num  # Interval length between job traffics
+    order = np.lexsort((T, link))  # Deploy jobs with small Ts first
+    slot = np.arange(len(link)) - segment_start[link[order]]
+    start_point = np.empty(len(link), dtype=np.int64)
+    start_point[order] = slot * interval_len[link[order]]
+    return (start_point - (traffic["start"] + traffic["interval_start"])) % T
+
+
+def cal_time_shift_array_cassini(traffic: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Time shift of every (link, job) entry of flatten_link_traffic (CASSINI).
+    Jobs keep their order on the link and start after the previous ones.
+    """
+    link, T = traffic["link"], traffic["T"]
+    if len(link) == 0:
+        return np.zeros(0, dtype=np.int64)
+    _, segment_start = _link_segments(link, link.max() + 1)
+    interval_len = traffic["interval_start"] - traffic["interval_end"]
+    step = interval_len + 10000 // 3
+    exclusive = np.cumsum(step) - step
+    start_point = exclusive - exclusive[segment_start][link]
+    return (start_point - (traffic["start"] + traffic["interval_start"])) % T
+
+
+def time_shift_dict(
+    links: List[Link], jobs: List[str], traffic: Dict[str, np.ndarray], shifts
+) -> Dict[Link, Dict[str, int]]:
+    time_shifts = {link: {} for link in links}
+    for link_id, job_id, shift in zip(
+        traffic["link"].tolist(), traffic["job"].tolist(), shifts.tolist()
+    ):
+        time_shifts[links[link_id]][jobs[job_id]] = shift
+    return time_shifts
 
 
 def cal_time_shifts(traffic_manager: TrafficManager):
     # Calculate jobs' time shifts on each link
     # Return: {link: {job_name: time_shift}}
+    links, jobs, traffic = flatten_link_traffic(traffic_manager)
+    return time_shift_dict(links, jobs, traffic, cal_time_shift_array(traffic))
+
+
+def cal_time_shifts_cassini(traffic_manager: TrafficManager):
+    # Calculate jobs' time shifts on each link (CASSINI)
+    # Return: {link: {job_name: time_shift}}
+    links, jobs, traffic = flatten_link_traffic(traffic_manager)
+    return time_shift_dict(links, jobs, traffic, cal_time_shift_array_cassini(traffic))
+
+
+def cal_time_shifts_reference(traffic_manager: TrafficManager):
+    # Calculate jobs' time shifts on each link, one link and job at a time
+    # Kept as reference for cal_time_shift_array
+    # Return: {link: {job_name: time_shift}}
     time_shifts = {}
     for link, jobs in traffic_manager.link_traffic_pattern.items():
         time_shifts[link] = {}
 
         link_job_num = len(jobs)  # number of jobs on the link
-        T_min = min([pattern["T"] for pattern in jobs.values()])  # Min T of the link
+        T_min = min([pattern.T for pattern in jobs.values()])  # Min T of the link
         interval_len = T_min // link_job_num  # Interval length between job traffics
 
         jobs_sorted = list(
-            sorted(jobs.items(), key=lambda item: item[1]["T"])
+            sorted(jobs.items(), key=lambda item: item[1].T)
         )  # Deploy jobs with small Ts first
 
         start_point = 0
 
         for job_name, pattern in jobs_sorted:
             start_time = traffic_manager.job_time_period[job_name][0]
-            interval_start = pattern["intervals"][0][0]
-            T = pattern["T"]
+            interval_start = pattern.interval[0]
+            T = pattern.T
             time_shifts[link][job_name] = (
                 start_point - (start_time + interval_start)
             ) % T
@@ -29,8 +132,9 @@ def cal_time_shifts(traffic_manager: TrafficManager):
     return time_shifts
 
 
-def cal_time_shifts_cassini(traffic_manager: TrafficManager):
-    # Calculate jobs' time shifts on each link
+def cal_time_shifts_cassini_reference(traffic_manager: TrafficManager):
+    # Calculate jobs' time shifts on each link, one link and job at a time
+    # Kept as reference for cal_time_shift_array_cassini
     # Return: {link: {job_name: time_shift}}
     time_shifts = {}
     for link, jobs in traffic_manager.link_traffic_pattern.items():
@@ -38,10 +142,9 @@ def cal_time_shifts_cassini(traffic_manager: TrafficManager):
         start_point = 0
         for job_name, pattern in jobs.items():
             start_time = traffic_manager.job_time_period[job_name][0]
-            interval_start = pattern["intervals"][0][0]
-            interval_end = pattern["intervals"][0][1]
+            interval_start, interval_end = pattern.interval
             interval_len = interval_start - interval_end
-            T = pattern["T"]
+            T = pattern.T
             time_shifts[link][job_name] = (
                 start_point - (start_time + interval_start)
             ) % T
@@ -1,30 +1,109 @@
+import numpy as np
 from collections import deque
+from .sparse_bigraph import JobLinkBigraph
+from typing import Dict
 
 
 def bfs_unify_time_shift(graph):
+    """
+    Unify the time shifts of each connected component breadth-first, from
+    its first job in node order with shift 0
+    """
     unified_time_shifts = {}  # {job_name: shift}
     job_list = [job for job in graph.nodes if graph.nodes[job]["category"] == "job"]
-    start_job_name = job_list[0]
-
-    unified_time_shifts[start_job_name] = 0
-
-    queue = deque([start_job_name])
-    while queue:
-        current_node = queue.popleft()
-        current_shift = unified_time_shifts[current_node]
-
-        for neighbor1 in graph.neighbors(current_node):
-            for neighbor2 in graph.neighbors(neighbor1):
-                if neighbor2 not in unified_time_shifts:
-                    edge_weight1 = graph.get_edge_data(current_node, neighbor1).get(
-                        "weight", 0
-                    )
-                    edge_weight2 = graph.get_edge_data(neighbor1, neighbor2).get(
-                        "weight", 0
-                    )
-                    unified_time_shifts[neighbor2] = (
-                        current_shift + edge_weight2 - edge_weight1
-                    )
-                    queue.append(neighbor2)
+    for start_job_name in job_list:
+        if start_job_name in unified_time_shifts:
+            continue
+
+        unified_time_shifts[start_job_name] = 0
+
+        queue = deque([start_job_name])
+        while queue:
+            current_node = queue.popleft()
+            current_shift = unified_time_shifts[current_node]
+
+            for neighbor1 in graph.neighbors(current_node):
+                for neighbor2 in graph.neighbors(neighbor1):
+                    if neighbor2 not in unified_time_shifts:
+                        edge_weight1 = graph.get_edge_data(current_node, neighbor1).get(
+                            "weight", 0
+                        )
+                        edge_weight2 = graph.get_edge_data(neighbor1, neighbor2).get(
+                            "weight", 0
+                        )
+                        unified_time_shifts[neighbor2] = (
+                            current_shift + edge_weight2 - edge_weight1
+                        )
+                        queue.append(neighbor2)
 
     return unified_time_shifts
+
+
+def array_unify_time_shift(bigraph: JobLinkBigraph) -> Dict[str, int]:
+    """
+    Same {job_name: shift} mapping as bfs_unify_time_shift on
+    bigraph.to_networkx(), computed level by level on the edge arrays of the bigraph.
+    Each component starts from its first job with shift 0. A link is used by
+    the first queued job reaching it (the BFS order), and every job on it is
+    then shifted by link offset + its own edge weight in one vectorized step.
+    """
+    num_links, num_jobs = len(bigraph.links), len(bigraph.jobs)
+    link_idx, job_idx, edge_ids = bigraph.edges()
+    weights = bigraph.edge_shift[edge_ids]
+    unassigned = np.iinfo(np.int64).max
+
+    job_shift = np.zeros(num_jobs, dtype=np.int64)
+    job_rank = np.full(num_jobs, unassigned, dtype=np.int64)  # BFS queue position
+    link_done = np.zeros(num_links, dtype=bool)
+    link_offset = np.zeros(num_links, dtype=np.int64)
+    link_owner_rank = np.zeros(num_links, dtype=np.int64)
+    link_owner_edge = np.zeros(num_links, dtype=np.int64)
+
+    # roots: first job of each component, all components in one pass
+    _, job_labels = bigraph.component_labels()
+    _, roots = np.unique(job_labels, return_index=True)
+    roots = np.sort(roots)
+    job_rank[roots] = np.arange(len(roots))
+    next_rank = len(roots)
+    frontier = np.zeros(num_jobs, dtype=bool)
+    frontier[roots] = True
+
+    while frontier.any():
+        # links reached by the frontier, owned by the earliest queued job
+        candidate = frontier[job_idx] & ~link_done[link_idx]
+        if not candidate.any():
+            break
+        cand_links, cand_jobs = link_idx[candidate], job_idx[candidate]
+        cand_edges = np.flatnonzero(candidate)
+        order = np.lexsort((cand_edges, job_rank[cand_jobs]))
+        new_links, first = np.unique(cand_links[order], return_index=True)
+        owner_edges = cand_edges[order][first]
+        owner_jobs = job_idx[owner_edges]
+        link_offset[new_links] = job_shift[owner_jobs] - weights[owner_edges]
+        link_owner_rank[new_links] = job_rank[owner_jobs]
+        link_owner_edge[new_links] = owner_edges
+        link_done[new_links] = True
+
+        # unassigned jobs on the new links, discovered in BFS order
+        is_new_link = np.zeros(num_links, dtype=bool)
+        is_new_link[new_links] = True
+        discover = is_new_link[link_idx] & (job_rank[job_idx] == unassigned)
+        frontier = np.zeros(num_jobs, dtype=bool)
+        if not discover.any():
+            continue
+        disc_edges = np.flatnonzero(discover)
+        disc_links, disc_jobs = link_idx[disc_edges], job_idx[disc_edges]
+        order = np.lexsort(
+            (disc_edges, link_owner_edge[disc_links], link_owner_rank[disc_links])
+        )
+        new_jobs, first = np.unique(disc_jobs[order], return_index=True)
+        chosen = order[first]
+        job_shift[new_jobs] = (
+            link_offset[disc_links[chosen]] + weights[disc_edges[chosen]]
+        )
+        # queue order of the new jobs follows their discovery order
+        job_rank[new_jobs[np.argsort(first)]] = next_rank + np.arange(len(new_jobs))
+        next_rank += len(new_jobs)
+        frontier[new_jobs] = True
+
+    return dict(zip(bigraph.jobs, job_shift.tolist()))
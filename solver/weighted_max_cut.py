@@ -1,9 +1,8 @@
-import pulp
 import networkx as nx
 from simulate import TrafficManager
 
 
-def max_k_cut_networkx(G, K=8):
+def max_k_cut_networkx(G, K=8, time_limit=None):
     """
     Solves the Max K-Cut problem for a given NetworkX graph.
     Ensures that every node is assigned to a partition.
@@ -11,10 +10,13 @@ def max_k_cut_networkx(G, K=8):
     Parameters:
     - G: A NetworkX graph where edge weights are stored in the 'weight' attribute.
     - K: The number of partitions to divide the graph into. Default is 5.
+    - time_limit: Seconds CBC may run, returning its best solution so far. Default is no limit.
 
     Returns:
     - partitions: A dictionary where keys are partition numbers and values are lists of nodes in each partition.
     """
+    import pulp  # imported on first use, only the "max_cut" method needs it
+
     # Extract nodes and edges information
     nodes = list(G.nodes())
     num_nodes = len(nodes)
@@ -75,7 +77,9 @@ def max_k_cut_networkx(G, K=8):
     prob += pulp.lpSum([w[i, j] * weight for (i, j, weight) in edges]), "TotalCutWeight"
 
     # Solve the problem without solver output
-    prob.solve(pulp.PULP_CBC_CMD(msg=0))  # Set msg=0 to suppress output
+    prob.solve(
+        pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit)
+    )  # Set msg=0 to suppress output
 
     # Check the solution status
     if pulp.LpStatus[prob.status] != "Optimal":
@@ -104,21 +108,42 @@ def max_k_cut_networkx(G, K=8):
     return partitions
 
 
-def cal_time_shift_by_max_k_cut(traffic_manager: TrafficManager, G: nx.Graph, K=5):
-    time_shifts = {}
-    partitions = max_k_cut_networkx(G, K)
+def cal_time_shift_by_max_k_cut(
+    traffic_manager: TrafficManager, G: nx.Graph, K=5, reduction=None, time_limit=None
+):
+    """
+    reduction: ConflictGraphReduction of G, whose reduced graph is cut instead
+    time_limit: seconds for CBC, None is returned if it found no solution
+    """
+    if reduction is None:
+        partitions = max_k_cut_networkx(G, K, time_limit)
+    else:
+        partitions = max_k_cut_networkx(reduction.reduced, K, time_limit)
+        if partitions is not None:
+            partitions = reduction.lift(partitions)
+    if partitions is None:
+        return None
     T_min = min(
-        [traffic_manager.job_traffic_pattern[job_name]["T"] for job_name in G.nodes]
+        [traffic_manager.job_traffic_pattern[job_name].T for job_name in G.nodes]
     )
+    return time_shifts_from_partitions(traffic_manager, partitions, T_min, K)
+
+
+def time_shifts_from_partitions(
+    traffic_manager: TrafficManager, partitions, T_min: int, K=5
+):
+    """
+    Start the traffic of the jobs of partition i at time spot (i - 1) * T_min / K
+    """
+    time_shifts = {}
     for i, job_list in partitions.items():
         time_spot = (i - 1) * T_min // K
         start_time_spot = time_spot
         for job_name in job_list:
             start = traffic_manager.job_time_period[job_name][0]
             pattern = traffic_manager.job_traffic_pattern[job_name]
-            T = pattern["T"]
-            interval_start = pattern["intervals"][0][0]
-            interval_end = pattern["intervals"][0][1]
+            T = pattern.T
+            interval_start, interval_end = pattern.interval
             interval_len = interval_start - interval_end
             time_shifts[job_name] = (time_spot - (start + interval_start)) % T
             # start_time_spot = start_time_spot + interval_end - interval_start
@@ -0,0 +1,14 @@
+import params
+from simulate import run_sweep
+
+if __name__ == "__main__":
+    run_sweep(
+        methods=["ours", "cassini", "max_cut"],
+        Ks=[4, 8],
+        update_time_intervals=[params.update_time_interval],
+        seeds=[0, 1, 2],
+        topologies=[{}],
+        policies=["fifo", "easy_backfill"],
+        routings=["hash", "least_loaded"],
+        max_scip_processes=2,
+    )
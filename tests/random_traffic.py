@@ -0,0 +1,27 @@
+import random
+from simulate import TrafficManager
+from simulate.network_elements import Link
+
+
+def random_traffic_manager(
+    seed: int, num_jobs: int = 12, num_links: int = 10
+) -> TrafficManager:
+    """
+    Jobs with mixed periods, each on 1 to 3 of num_links shared links
+    """
+    rng = random.Random(seed)
+    traffic_manager = TrafficManager()
+    links = [Link(f"leaf{i}", f"spine{i % 3}") for i in range(num_links)]
+    for j in range(num_jobs):
+        job_name = f"job{j}"
+        start_time = rng.randrange(1000)
+        traffic_manager.add_job(
+            job_name, start_time, start_time + rng.randrange(1000, 100000)
+        )
+        T = rng.choice([100, 150, 200, 300])
+        interval_start = rng.randrange(T)
+        interval = (interval_start, interval_start + rng.randrange(1, T // 2))
+        for link in rng.sample(links, rng.randint(1, 3)):
+            traffic_manager.add_traffic_pattern(link, job_name, interval, T)
+    traffic_manager.unify_traffic_pattern()
+    return traffic_manager
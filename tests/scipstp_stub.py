@@ -0,0 +1,111 @@
+"""
+Stand-in for an interactive scipstp session, speaking the subset of the SCIP
+shell protocol used by ScipSessionPool: "set ...", "read <stp file>",
+"optimize", "write solution <file>" and "quit", one command per line.
+Instead of solving the STP exactly it writes a BFS tree over the graph with
+non-terminal leaves pruned, which is a valid Steiner tree.
+Usage: python tests/scipstp_stub.py [--crash-after N] [--sleep SECONDS]
+"""
+
+import sys
+import time
+from collections import deque
+
+
+def read_stp(stp_file):
+    edges, terminals = [], []
+    with open(stp_file, "r") as file:
+        for line in file:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "E":
+                edges.append((int(fields[1]), int(fields[2]), float(fields[3])))
+            elif fields[0] == "T":
+                terminals.append(int(fields[1]))
+    return edges, terminals
+
+
+def steiner_tree(edges, terminals):
+    """
+    Return tree edges (parent, child, weight) with 1-based node ids
+    """
+    neighbors = {}
+    for u, v, weight in edges:
+        neighbors.setdefault(u, []).append((v, weight))
+        neighbors.setdefault(v, []).append((u, weight))
+    if not terminals:
+        return []
+    parent = {terminals[0]: None}
+    queue = deque([terminals[0]])
+    while queue:
+        u = queue.popleft()
+        for v, weight in neighbors.get(u, []):
+            if v not in parent:
+                parent[v] = (u, weight)
+                queue.append(v)
+    # prune non-terminal leaves
+    terminal_set = set(terminals)
+    num_children = {node: 0 for node in parent}
+    for node, edge in parent.items():
+        if edge is not None:
+            num_children[edge[0]] += 1
+    leaves = [
+        node
+        for node, count in num_children.items()
+        if count == 0 and node not in terminal_set
+    ]
+    while leaves:
+        node = leaves.pop()
+        edge = parent.pop(node)
+        if edge is None:
+            continue
+        num_children[edge[0]] -= 1
+        if num_children[edge[0]] == 0 and edge[0] not in terminal_set:
+            leaves.append(edge[0])
+    return [(edge[0], node, edge[1]) for node, edge in parent.items() if edge]
+
+
+def main():
+    args = sys.argv[1:]
+    crash_after = (
+        int(args[args.index("--crash-after") + 1]) if "--crash-after" in args else None
+    )
+    sleep = float(args[args.index("--sleep") + 1]) if "--sleep" in args else 0.0
+    problem = None
+    tree = None
+    num_optimized = 0
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "quit":
+            break
+        elif command.startswith("set "):
+            # e.g. "set stp reduction 0" -> "stp/reduction = 0"
+            *path, value = command.split()[1:]
+            print(f"{'/'.join(path)} = {value}", flush=True)
+        elif command.startswith("read "):
+            problem = read_stp(command[len("read ") :])
+            tree = None
+            print(f"read problem <{command[len('read '):]}>", flush=True)
+        elif command == "optimize":
+            num_optimized += 1
+            if crash_after is not None and num_optimized > crash_after:
+                sys.exit(1)
+            time.sleep(sleep)
+            tree = steiner_tree(*problem) if problem is not None else []
+            print(
+                "SCIP Status        : problem is solved [optimal solution found]",
+                flush=True,
+            )
+        elif command.startswith("write solution "):
+            sol_file = command[len("write solution ") :]
+            with open(sol_file, "w") as file:
+                file.write("solution status: optimal solution found\n")
+                file.write(f"objective value: {sum(w for _, _, w in tree or [])}\n")
+                for u, v, weight in tree or []:
+                    file.write(f"x_{u - 1}_{v - 1} 1 \t(obj:{weight:.12f})\n")
+            print(f"written solution information to file <{sol_file}>", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+from simulate.network_traffic_management import TrafficPattern
+from utils.cal_job_conflicts import cal_job_conflicts, cal_link_job_conflicts
+from random_traffic import random_traffic_manager
+
+
+def per_link_conflicts(link_traffic_pattern, job_time_period, current_time, new_time):
+    """
+    Max over links of cal_link_job_conflicts, one pair at a time on each link
+    """
+    job_conflicts = {}
+    for jobs in link_traffic_pattern.values():
+        link_job_conflicts = cal_link_job_conflicts(
+            jobs, job_time_period, current_time, new_time
+        )
+        for job_name, conflict in link_job_conflicts.items():
+            job_conflicts[job_name] = max(job_conflicts.get(job_name, 0), conflict)
+    return job_conflicts
+
+
+def test_distinct_pairs_match_per_link():
+    rng = random.Random(0)
+    for seed in range(30):
+        traffic_manager = random_traffic_manager(seed, num_jobs=15, num_links=6)
+        link_traffic_pattern = traffic_manager.link_traffic_pattern
+        # a stale pattern of one job on one link must not be merged
+        link, jobs = next(iter(link_traffic_pattern.items()))
+        job_name, pattern = next(iter(jobs.items()))
+        jobs[job_name] = TrafficPattern(
+            (pattern.interval[0] + 1, pattern.interval[1] + 1), pattern.T
+        )
+        current_time = rng.randrange(5000)
+        new_time = current_time + rng.randrange(1, 3000)
+        stats = {}
+        job_conflicts = cal_job_conflicts(
+            link_traffic_pattern,
+            traffic_manager.job_time_period,
+            current_time,
+            new_time,
+            stats,
+        )
+        assert job_conflicts == per_link_conflicts(
+            link_traffic_pattern,
+            traffic_manager.job_time_period,
+            current_time,
+            new_time,
+        )
+        assert stats["distinct_pairs"] <= stats["link_pairs"]
+
+
+def test_link_conflicts_and_active_jobs():
+    traffic_manager = random_traffic_manager(1, num_jobs=15, num_links=6)
+    link_traffic_pattern = traffic_manager.link_traffic_pattern
+    job_time_period = traffic_manager.job_time_period
+    link_conflicts = {}
+    job_conflicts = cal_job_conflicts(
+        link_traffic_pattern, job_time_period, 0, 2000, link_conflicts=link_conflicts
+    )
+    for link, jobs in link_traffic_pattern.items():
+        link_job_conflicts = cal_link_job_conflicts(jobs, job_time_period, 0, 2000)
+        # every pair overlap is counted once for each of its two jobs
+        assert 2 * link_conflicts[link] == sum(link_job_conflicts.values())
+    # jobs outside active_jobs have no pairs, hence no conflict
+    active_jobs = set(list(job_time_period)[::2])
+    filtered = cal_job_conflicts(
+        link_traffic_pattern, job_time_period, 0, 2000, active_jobs=active_jobs
+    )
+    assert all(filtered[job_name] == 0 for job_name in filtered.keys() - active_jobs)
+    assert sum(filtered.values()) <= sum(job_conflicts.values())
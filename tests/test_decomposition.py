@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+import simulate  # noqa: F401, solver imports simulate first
+from solver.decomposition import split_bigraph, reconcile_unified_shifts
+from solver.graph_partition import partition_graph
+from solver.sparse_bigraph import JobLinkBigraph
+from solver.unify_time_shifts import array_unify_time_shift
+
+
+def random_graph(num_nodes: int, density: float, seed: int):
+    upper = sp.random(
+        num_nodes, num_nodes, density=density, random_state=seed, format="csr"
+    )
+    upper = sp.triu(upper, k=1)
+    return (upper + upper.T).tocsr()
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_size", [1, 3, 8, 25])
+def test_partition_graph_bounds_piece_size(seed, max_size):
+    num_nodes = 60
+    pieces = partition_graph(random_graph(num_nodes, 0.08, seed), max_size, seed)
+    assert all(0 < len(piece) <= max_size for piece in pieces)
+    assert sorted(np.concatenate(pieces).tolist()) == list(range(num_nodes))
+
+
+def consistent_bigraph(num_jobs: int, num_links: int, seed: int) -> JobLinkBigraph:
+    """
+    Connected bigraph whose edge shifts all agree: edge (link, job) has
+    shift job_base - link_base, so unified shifts are unique up to a constant
+    """
+    rng = np.random.default_rng(seed)
+    edges = {(rng.integers(num_links), 0)}
+    for job in range(1, num_jobs):
+        # a link of an earlier job keeps the graph connected
+        edges.add((rng.choice([link for link, _ in edges]), job))
+        for link in rng.choice(num_links, size=rng.integers(1, 3), replace=False):
+            edges.add((link, job))
+    used_links = sorted({link for link, _ in edges})
+    link_index = {link: i for i, link in enumerate(used_links)}
+    rows = np.array([link_index[link] for link, _ in sorted(edges)])
+    cols = np.array([job for _, job in sorted(edges)])
+    job_base = rng.integers(0, 1000, num_jobs)
+    link_base = rng.integers(0, 1000, len(used_links))
+    return JobLinkBigraph(
+        [f"job{j}" for j in range(num_jobs)],
+        [f"link{l}" for l in range(len(used_links))],
+        rows,
+        cols,
+        job_base[cols] - link_base[rows],
+        np.full(len(rows), 10),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_size", [2, 4])
+def test_reconciled_shifts_equal_undecomposed(seed, max_size):
+    bigraph = consistent_bigraph(12, 16, seed)
+    pieces, subgraphs = split_bigraph(bigraph, max_size)
+    assert len(pieces) > 1
+    reconciled = reconcile_unified_shifts(
+        bigraph, pieces, [array_unify_time_shift(subgraph) for subgraph in subgraphs]
+    )
+    unified = array_unify_time_shift(bigraph)
+    # both are defined up to a common constant
+    constant = reconciled["job0"] - unified["job0"]
+    assert reconciled == {job: shift + constant for job, shift in unified.items()}
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import simulate  # noqa: F401, solver imports simulate first
+from solver.graph_reduction import BigraphReduction
+from solver.sparse_bigraph import JobLinkBigraph, construct_sparse_bigraph
+from solver.time_shifts import cal_time_shift_array, cal_time_shift_array_cassini
+from solver.unify_time_shifts import array_unify_time_shift
+from random_traffic import random_traffic_manager
+
+
+def reducible_bigraph(seed: int):
+    """
+    Connected bigraph with consistent edge shifts (job base - link base),
+    plus parallel copies of links, links of a single job and leaf jobs.
+    Return it with the name of a copied link whose durations differ.
+    """
+    rng = np.random.default_rng(seed)
+    num_jobs, num_links = 12, 10
+    link_jobs = [set() for _ in range(num_links)]
+    link_jobs[0].add(0)
+    for job in range(1, num_jobs):
+        # a link of an earlier job keeps the graph connected
+        link_jobs[rng.choice([l for l, jobs in enumerate(link_jobs) if jobs])].add(job)
+        for link in rng.choice(num_links, size=rng.integers(0, 3), replace=False):
+            link_jobs[link].add(job)
+    for link in rng.choice(num_links, size=3, replace=False):
+        link_jobs.append(set(link_jobs[link]))  # parallel copy
+    for job in rng.choice(num_jobs, size=3, replace=False):
+        link_jobs.append({job})  # single job
+    shared = max(range(num_links), key=lambda l: len(link_jobs[l]))
+    link_jobs.append(set(link_jobs[shared]))  # copy with other durations
+    other_durations_link = len(link_jobs) - 1
+    shared_links = [l for l, jobs in enumerate(link_jobs) if len(jobs) > 1]
+    # leaf jobs, two on the same link so that one is represented by the other
+    for link in [shared_links[0], shared_links[0], *rng.choice(shared_links, size=2)]:
+        link_jobs[link].add(num_jobs)
+        num_jobs += 1
+    job_base = rng.integers(0, 1000, num_jobs)
+    link_base = rng.integers(0, 1000, len(link_jobs))
+    job_duration = rng.integers(1, 100, num_jobs)
+    rows = np.array([l for l, jobs in enumerate(link_jobs) for _ in sorted(jobs)])
+    cols = np.array([j for jobs in link_jobs for j in sorted(jobs)])
+    duration = job_duration[cols]
+    duration[rows == other_durations_link] += 1
+    bigraph = JobLinkBigraph(
+        [f"job{j}" for j in range(num_jobs)],
+        [f"link{l}" for l in range(len(link_jobs))],
+        rows,
+        cols,
+        job_base[cols] - link_base[rows],
+        duration,
+    )
+    return bigraph, f"link{other_durations_link}"
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_lifted_shifts_equal_unreduced(seed):
+    bigraph, other_durations_link = reducible_bigraph(seed)
+    reduction = BigraphReduction(bigraph)
+    assert reduction.stats["links"][1] < reduction.stats["links"][0]
+    assert reduction.stats["jobs"][1] < reduction.stats["jobs"][0]
+    assert other_durations_link in reduction.reduced.links
+    lifted = reduction.lift(array_unify_time_shift(reduction.reduced))
+    unified = array_unify_time_shift(bigraph)
+    # unified shifts are defined up to a constant per component
+    constant = lifted["job0"] - unified["job0"]
+    assert lifted == {job: shift + constant for job, shift in unified.items()}
+
+
+@pytest.mark.parametrize(
+    "cal_time_shift", [cal_time_shift_array, cal_time_shift_array_cassini]
+)
+def test_lifted_shifts_equal_unreduced_traffic(cal_time_shift):
+    # mixed periods and overlapping links, so edge shifts are inconsistent
+    num_reduced = 0
+    for seed in range(400):
+        traffic_manager = random_traffic_manager(seed, num_jobs=20)
+        bigraph = construct_sparse_bigraph(traffic_manager, cal_time_shift)
+        reduction = BigraphReduction(bigraph)
+        num_reduced += reduction.stats["jobs"][1] < reduction.stats["jobs"][0]
+        lifted = reduction.lift(array_unify_time_shift(reduction.reduced))
+        assert lifted == array_unify_time_shift(bigraph)
+    assert num_reduced > 0
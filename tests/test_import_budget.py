@@ -0,0 +1,10 @@
+from utils.import_budget import import_time_budget, measure_import_time
+
+
+def test_import_simulate_within_budget():
+    import_time, loaded_modules = measure_import_time("simulate")
+    assert not loaded_modules, f"import simulate eagerly loads {loaded_modules}"
+    assert import_time <= import_time_budget, (
+        f"import simulate takes {import_time:.3f}s, "
+        f"over budget {import_time_budget:.3f}s"
+    )
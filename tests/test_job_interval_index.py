@@ -0,0 +1,31 @@
+import random
+from simulate.job_interval_index import JobIntervalIndex
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    index = JobIntervalIndex()
+    lifetimes = {}
+    for step in range(2000):
+        job_name = str(rng.randrange(200))
+        start_time = rng.randrange(1000)
+        end_time = start_time + rng.randrange(1, 300)
+        if job_name in index:
+            if rng.random() < 0.5:
+                index.remove(job_name)
+                del lifetimes[job_name]
+            else:
+                index.update(job_name, start_time, end_time)
+                lifetimes[job_name] = (start_time, end_time)
+        else:
+            index.add(job_name, start_time, end_time)
+            lifetimes[job_name] = (start_time, end_time)
+        start = rng.randrange(1200)
+        end = start + rng.randrange(1, 100)
+        assert index.active(start, end) == {
+            job_name for job_name, (s, e) in lifetimes.items() if s < end and e > start
+        }
+        assert index.ending_before(start) == sorted(
+            (job_name for job_name, (_, e) in lifetimes.items() if e <= start),
+            key=lambda job_name: (lifetimes[job_name][1], job_name),
+        )
@@ -0,0 +1,117 @@
+import random
+import pytest
+from simulate import JobQueue
+
+
+def brute_force_select(queue, policy, num_free_gpu, current_time, release_events):
+    """
+    queue: [(job_name, size, duration, arrival_time)] in arrival order
+    """
+    if not queue:
+        return None
+    if policy == "smallest_first":
+        head = min(queue, key=lambda job: job[1])
+    else:
+        head = queue[0]
+    if head[1] <= num_free_gpu:
+        return head[0]
+    if policy != "easy_backfill":
+        return None
+    free, shadow_time = num_free_gpu, float("inf")
+    for end_time, size in sorted(release_events):
+        free += size
+        if free >= head[1]:
+            shadow_time = end_time
+            break
+    if shadow_time == float("inf"):
+        extra_gpu = 0
+    else:
+        released = sum(
+            size for end_time, size in release_events if end_time <= shadow_time
+        )
+        extra_gpu = num_free_gpu + released - head[1]
+    for job_name, size, duration, arrival_time in queue:
+        end_time = max(arrival_time, current_time) + duration
+        if size <= num_free_gpu and (size <= extra_gpu or end_time <= shadow_time):
+            return job_name
+    return None
+
+
+def test_fifo_stops_at_first_job_that_does_not_fit():
+    queue = JobQueue("fifo")
+    queue.push("big", 8, 100, 0)
+    queue.push("small", 1, 100, 1)
+    assert queue.select(4, 10) is None
+    assert queue.select(8, 10) == "big"
+    assert queue.select(1, 10) == "small"
+    assert len(queue) == 0
+
+
+def test_smallest_first_takes_the_oldest_smallest_job():
+    queue = JobQueue("smallest_first")
+    queue.push("big", 8, 100, 0)
+    queue.push("small", 2, 100, 1)
+    queue.push("smaller", 1, 300, 2)
+    queue.push("smaller_later", 1, 50, 3)
+    assert [queue.select(8, 10) for _ in range(4)] == [
+        "smaller",
+        "smaller_later",
+        "small",
+        "big",
+    ]
+
+
+def test_backfill_takes_the_earliest_job_ending_before_the_reservation():
+    queue = JobQueue("easy_backfill")
+    queue.push("head", 8, 100, 0)
+    queue.push("long", 2, 1000, 1)
+    queue.push("middle", 2, 40, 2)
+    queue.push("shortest", 2, 10, 3)
+    # 8 GPUs are free at time 100, with none left over
+    release_events = [(100, 4)]
+    assert queue.select(4, 10, release_events) == "middle"
+    release_events = [(50, 2), (100, 4)]
+    assert queue.select(2, 10, release_events) == "shortest"
+    assert queue.select(0, 10, release_events) is None
+
+
+def test_backfill_uses_every_job_ending_at_the_reservation():
+    queue = JobQueue("easy_backfill")
+    queue.push("head", 8, 100, 0)
+    queue.push("long", 2, 1000, 1)
+    # two jobs end at time 100, leaving 2 GPUs over after the reservation
+    assert JobQueue.reservation(8, 4, [(100, 2), (100, 4), (200, 8)]) == (100, 2)
+    assert queue.select(4, 10, [(100, 2), (100, 4), (200, 8)]) == "long"
+
+
+@pytest.mark.parametrize("policy", ["fifo", "easy_backfill", "smallest_first"])
+def test_select_matches_brute_force(policy):
+    rng = random.Random(0)
+    for _ in range(200):
+        queue = JobQueue(policy)
+        jobs = []
+        for i in range(rng.randrange(1, 30)):
+            job = (f"job{i}", rng.choice([1, 2, 4, 8, 16]), rng.randrange(1, 500), i)
+            queue.push(*job)
+            jobs.append(job)
+        current_time = rng.randrange(20)
+        num_free_gpu = rng.randrange(16)
+        release_events = sorted(
+            (rng.randrange(current_time, 600), rng.choice([1, 2, 4, 8]))
+            for _ in range(rng.randrange(5))
+        )
+        while True:
+            expected = brute_force_select(
+                jobs, policy, num_free_gpu, current_time, release_events
+            )
+            selected = queue.select(num_free_gpu, current_time, release_events)
+            assert selected == expected
+            if selected is None:
+                break
+            job = next(job for job in jobs if job[0] == selected)
+            jobs.remove(job)
+            num_free_gpu -= job[1]
+            release_events = sorted(
+                release_events + [(max(job[3], current_time) + job[2], job[1])]
+            )
+        assert len(queue) == len(jobs)
@@ -0,0 +1,22 @@
+from simulate import LinkTimeline
+
+
+def test_coarsen_keeps_time_with_flows():
+    timeline = LinkTimeline(max_runs=2)
+    # flows on [0, 10), [30, 40) and [60, 70) with gaps between them
+    for start, num_jobs, contention in [(0, 2, 5), (30, 3, 7), (60, 1, 0)]:
+        timeline.record(start, start + 10, {"link": num_jobs}, {"link": contention})
+    assert timeline.num_coarsened > 0
+    assert timeline.link_summary("link") == (12, 3, 30)
+    # contention per time unit with flows, gaps excluded
+    (_, start, end, _, contention), *_ = timeline.hotspot_windows(1)
+    assert (start, end, contention) == (0, 40, 12)
+    assert timeline.runs["link"].idle[0] == 20
+
+
+def test_contiguous_windows_extend_runs():
+    timeline = LinkTimeline()
+    for start in range(0, 50, 10):
+        timeline.record(start, start + 10, {"link": 2}, {"link": 4})
+    assert timeline.num_runs == 1
+    assert timeline.link_summary("link") == (20, 2, 50)
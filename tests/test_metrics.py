@@ -0,0 +1,78 @@
+import urllib.request
+from utils import MetricsRegistry, SimulationMetrics, component_sizes
+
+
+def test_render():
+    registry = MetricsRegistry()
+    windows = registry.counter("windows_total", "Windows")
+    queue = registry.gauge("queue_length", "Queue")
+    registry.gauge("ratio", "Ratio", lambda: 0.25)
+    windows.inc()
+    windows.inc(2)
+    queue.set(7)
+    assert registry.render() == (
+        "# HELP windows_total Windows\n"
+        "# TYPE windows_total counter\n"
+        "windows_total 3\n"
+        "# HELP queue_length Queue\n"
+        "# TYPE queue_length gauge\n"
+        "queue_length 7\n"
+        "# HELP ratio Ratio\n"
+        "# TYPE ratio gauge\n"
+        "ratio 0.25\n"
+    )
+
+
+def test_large_counters_render_exactly():
+    registry = MetricsRegistry()
+    registry.counter("slots_total", "Slots").inc(2**53 - 1)
+    assert registry.render().splitlines()[-1] == f"slots_total {2**53 - 1}"
+
+
+def test_histogram_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", [1, 0.1, 10])
+    for value in [0.05, 0.1, 0.5, 2, 20]:
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[:2] == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+    ]
+    # cumulative counts over the sorted bounds, bounds are inclusive
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="10"} 4',
+        'latency_seconds_bucket{le="+Inf"} 5',
+        "latency_seconds_sum 22.65",
+        "latency_seconds_count 5",
+    ]
+
+
+def test_component_sizes():
+    link_traffic_pattern = {
+        "l1": {"a": None, "b": None},
+        "l2": {"b": None, "c": None},
+        "l3": {"d": None},
+        "l4": {"e": None, "f": None},
+    }
+    assert sorted(component_sizes(link_traffic_pattern)) == [1, 2, 3]
+
+
+def test_exposition(tmp_path):
+    file_path = str(tmp_path / "metrics" / "run.prom")
+    metrics = SimulationMetrics(port=0, file_path=file_path, file_interval=60)
+    metrics.start(num_jobs=4)
+    try:
+        metrics.observe_window(10, 2, 1, 1, 3, 0, 1, 0.5, [1, 3])
+        url = f"http://{metrics.host}:{metrics.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode()
+        assert "clustersim_simulated_time 10\n" in body
+        assert 'clustersim_component_jobs_bucket{le="2"} 1\n' in body
+        assert "clustersim_max_component_jobs 3\n" in body
+    finally:
+        metrics.close()
+    with open(file_path) as file:
+        assert "clustersim_windows_total 1\n" in file.read()
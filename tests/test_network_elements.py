@@ -0,0 +1,90 @@
+import random
+from simulate import ClosTopology
+
+
+def random_gpu_group(rng: random.Random, size: int):
+    return [f"GPU-{gpu}" for gpu in rng.sample(range(3072), size)]
+
+
+def brute_force_ring_links(topology: ClosTopology, gpu_group):
+    links = set()
+    for i, gpu in enumerate(gpu_group):
+        links.update(topology.get_gpu_route(gpu, gpu_group[(i + 1) % len(gpu_group)]))
+    return links
+
+
+def test_ring_link_set_matches_routes():
+    rng = random.Random(0)
+    topology = ClosTopology()
+    for _ in range(300):
+        gpu_group = random_gpu_group(rng, rng.choice([1, 2, 3, 4, 8, 16]))
+        links = topology.ring_comm_link_set(gpu_group)
+        assert len(links) == len(set(links))
+        assert set(links) == brute_force_ring_links(topology, gpu_group)
+    # the cache key holds the spines, so a rerouted server gets its new links
+    gpu_group = random_gpu_group(rng, 8)
+    server = int(gpu_group[0][4:]) // topology.gpus_per_server
+    topology.server_spine[server] = 5
+    assert set(topology.ring_comm_link_set(gpu_group)) == brute_force_ring_links(
+        topology, gpu_group
+    )
+
+
+def test_ring_rdma_tuples_match_brute_force():
+    rng = random.Random(1)
+    topology = ClosTopology()
+    for size in [1, 2, 3, 4, 8]:
+        gpu_group = random_gpu_group(rng, size)
+        phases = topology.ring_rdma_operate_tuples(gpu_group, 4096)
+        expected = [
+            [
+                (gpu_group[i], gpu_group[(i + 1) % size], 4096 // size)
+                for i in range(size)
+            ]
+            for _ in range(2 * (size - 1))
+        ]
+        assert phases == (expected if size > 1 else [])
+
+
+def link_id(topology: ClosTopology, link) -> int:
+    """
+    tor * num_spines + spine, as in assign_job_spines
+    """
+    ends = dict(node.split("-") for node in (link.start, link.end))
+    return int(ends["ToR"]) * topology.num_spines + int(ends["Spine"])
+
+
+def test_spine_counters_return_to_zero_after_release():
+    rng = random.Random(2)
+    topology = ClosTopology()
+    topology.routing = "least_loaded"
+    servers = rng.sample(range(topology.num_tors * topology.servers_per_tor), 120)
+    jobs = {}
+    for i in range(30):
+        job_servers, servers = servers[: rng.choice([1, 2, 4])], servers[4:]
+        jobs[f"job{i}"] = [
+            f"GPU-{server * topology.gpus_per_server + gpu}"
+            for server in job_servers
+            for gpu in range(topology.gpus_per_server)
+        ]
+    for job_name, job_gpu_list in jobs.items():
+        all_reduce_implement = rng.choice(["hd", "ring"])
+        link_ids = topology.assign_job_spines(
+            job_name, job_gpu_list, all_reduce_implement
+        )
+        # the flows of the job go through exactly the links it is counted on
+        routed = {
+            link_id(topology, link)
+            for src, dst in topology.job_comm_pairs(job_gpu_list, all_reduce_implement)
+            for link in topology.get_gpu_route(src, dst)
+        }
+        assert routed == set(link_ids.tolist())
+    assert topology.link_load.sum() == sum(
+        len(link_ids) for link_ids in topology.job_route_links.values()
+    )
+    for job_name in rng.sample(list(jobs), len(jobs)):
+        topology.release_job_spines(job_name)
+    topology.release_job_spines("job0")  # released twice, no effect
+    assert not topology.link_load.any()
+    assert (topology.server_spine == -1).all()
+    assert not topology.job_route_links and not topology.job_route_servers
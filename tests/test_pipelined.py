@@ -0,0 +1,33 @@
+import random
+import numpy as np
+import params
+import pytest
+from simulate import Simulator
+
+
+def run(method: str, pipelined: bool) -> Simulator:
+    random.seed(0)
+    np.random.seed(0)
+    simulator = Simulator()
+    simulator.method = method
+    simulator.generate_random_jobs()
+    simulator.run(netsim_input=False, pipelined=pipelined)
+    return simulator
+
+
+@pytest.mark.parametrize("method", ["cassini", "max_cut"])
+def test_pipelined_equals_sequential(monkeypatch, method):
+    monkeypatch.setattr(params, "job_num", 40)
+    monkeypatch.setattr(params, "arrival_rate", 20000)
+    sequential = run(method, pipelined=False)
+    pipelined = run(method, pipelined=True)
+    # jobs shared links, so the solver shifted them
+    assert max(sequential.max_link_jobs) > 1
+    penalty_time = sequential.traffic_manager.penalty_time
+    assert pipelined.traffic_manager.penalty_time == penalty_time
+    assert pipelined.time_count == sequential.time_count
+    assert (
+        pipelined.gpu_manager.job_deployed_time
+        == sequential.gpu_manager.job_deployed_time
+    )
+    assert pipelined.job_traffic_start_points == sequential.job_traffic_start_points
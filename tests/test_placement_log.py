@@ -0,0 +1,52 @@
+import random
+import functools
+import pytest
+import numpy as np
+import params
+from simulate import Simulator, PlacementLog, PlacementLogReader
+
+
+class RecordingSimulator(Simulator):
+    """
+    Simulator keeping the GPUManager state of each window after its deploys
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.window_gpu_usage = []  # [(time_next, gpu_usage)]
+
+    def deploy_jobs(self):
+        deployed_jobs = super().deploy_jobs()
+        self.window_gpu_usage.append(
+            (
+                self.current_time + self.update_time_interval,
+                list(self.gpu_manager.gpu_usage),
+            )
+        )
+        return deployed_jobs
+
+
+@pytest.mark.parametrize("keyframe_interval", [4096, 8])
+def test_replay_matches_gpu_manager(tmp_path, monkeypatch, capsys, keyframe_interval):
+    monkeypatch.setattr(
+        "simulate.simulator.PlacementLog",
+        functools.partial(PlacementLog, keyframe_interval=keyframe_interval),
+    )
+    monkeypatch.setattr(params, "job_num", 60)
+    monkeypatch.setattr(params, "arrival_rate", 20000)
+    random.seed(0)
+    np.random.seed(0)
+    simulator = RecordingSimulator()
+    simulator.method = "cassini"
+    simulator.placement_log_path = str(tmp_path / "placement.log")
+    simulator.generate_random_jobs()
+    simulator.run(netsim_input=False)
+    capsys.readouterr()
+
+    reader = PlacementLogReader(simulator.placement_log_path)
+    assert (len(reader.keyframes) > 0) == (keyframe_interval == 8)
+    assert len(simulator.window_gpu_usage) == simulator.time_count
+    for time_next, gpu_usage in simulator.window_gpu_usage:
+        # jobs released in a window end by time_next and jobs of the next
+        # window are deployed from time_next on
+        assert reader.gpu_usage_at(time_next - 1) == gpu_usage
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import networkx as nx
+import simulate  # noqa: F401, solver imports simulate first
+from solver import SolverPortfolio, construct_sparse_bigraph
+from solver.portfolio import _shifts_by_max_cut, _shifts_by_stp
+from solver.weighted_max_cut import max_k_cut_networkx
+from utils import ScipSessionPool
+from random_traffic import random_traffic_manager
+
+
+def test_max_cut_with_time_limit():
+    graph = nx.complete_graph(10)
+    nx.set_edge_attributes(graph, 1, "weight")
+    partitions = max_k_cut_networkx(graph, K=3, time_limit=5)
+    assert sorted(node for nodes in partitions.values() for node in nodes) == list(
+        range(10)
+    )
+
+
+def test_calls_after_the_deadline_do_not_solve():
+    graph = nx.complete_graph(10)
+    # the state is never read once the deadline has passed
+    assert _shifts_by_max_cut(None, graph, 3, time.perf_counter() - 1) is None
+
+
+def stub_pool(*args: str) -> ScipSessionPool:
+    stub_path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "scipstp_stub.py"
+    )
+    return ScipSessionPool(command=[sys.executable, stub_path, *args], grace=0.2)
+
+
+def test_stp_solves_every_reduced_core(tmp_path):
+    # several components, each reduced to its own core
+    bigraph = construct_sparse_bigraph(random_traffic_manager(3, 30, 60))
+    components = [
+        component
+        for component in bigraph.connected_subgraphs()
+        if len(component.jobs) > 1
+    ]
+    assert len(components) > 1
+    pool = stub_pool()
+    try:
+        deadline = time.perf_counter() + 30
+
+        def solve(bigraph, name):
+            return _shifts_by_stp(
+                bigraph,
+                str(tmp_path / f"{name}.stp"),
+                str(tmp_path / f"{name}.txt"),
+                pool,
+                deadline,
+                reduce_graphs=True,
+            )
+
+        expected = {}
+        for i, component in enumerate(components):
+            expected.update(solve(component, f"component_{i}"))
+        shifts = solve(bigraph, "all")
+        assert {job: shifts[job] for job in expected} == expected
+    finally:
+        pool.close()
+
+
+def test_portfolio_keeps_the_best_candidate(tmp_path):
+    traffic_manager = random_traffic_manager(4, 30, 60)
+    pool = stub_pool()
+    portfolio = SolverPortfolio(
+        methods=("cassini", "ours"),
+        deadline=30,
+        scip_pool=pool,
+        stp_dir=str(tmp_path / "stp"),
+        solution_dir=str(tmp_path / "solutions"),
+    )
+    try:
+        time_next = traffic_manager.current_time + 20000
+        _, unshifted = traffic_manager.evaluate_time_shifts({}, time_next)
+        portfolio.solve(traffic_manager, time_next)
+        assert portfolio.num_late == 0
+        assert pool.stats["solves"] > 0
+        # no component is left worse off than without shifts
+        _, shifted = traffic_manager.evaluate_time_shifts({}, time_next)
+        assert shifted <= unshifted
+    finally:
+        portfolio.close()
+        pool.close()
+
+
+def test_results_after_the_deadline_are_dropped(tmp_path):
+    traffic_manager = random_traffic_manager(4, 30, 60)
+    # every solve sleeps far beyond the deadline
+    pool = stub_pool("--sleep", "5")
+    portfolio = SolverPortfolio(
+        methods=("cassini", "ours"),
+        deadline=0.5,
+        scip_pool=pool,
+        stp_dir=str(tmp_path / "stp"),
+        solution_dir=str(tmp_path / "solutions"),
+        max_workers=1,
+    )
+    try:
+        start = time.perf_counter()
+        portfolio.solve(traffic_manager, traffic_manager.current_time + 20000)
+        assert time.perf_counter() - start < 3
+        num_components = sum(portfolio.wins.values())
+        assert num_components > 1
+        # the running solve and the queued ones, which are cancelled
+        assert portfolio.num_late == num_components
+        assert not any(method == "ours" for method, _ in portfolio.wins)
+    finally:
+        portfolio.close()
+        pool.close()
@@ -0,0 +1,41 @@
+import random
+import params
+import pytest
+from simulate import ClosTopology, RdmaOperateStore
+
+
+def random_jobs(rng: random.Random, num_jobs: int):
+    """
+    {job_name: (job_gpu_list, msg_len)} with the trace sizes and msg_lens
+    """
+    msg_lens = [model["msg_len"] for model in params.model_types.values()]
+    jobs = {}
+    for i in range(num_jobs):
+        size = rng.choice(params.sizes[:6])
+        gpu_list = [f"GPU-{gpu}" for gpu in rng.sample(range(3072), size)]
+        # odd lengths too, so that every chunk division rounds down
+        jobs[f"job{i}"] = (gpu_list, rng.choice(msg_lens) + rng.randrange(7))
+    return jobs
+
+
+@pytest.mark.parametrize("all_reduce_implement", ["hd", "ring"])
+def test_expansion_matches_tuple_lists(tmp_path, all_reduce_implement):
+    rng = random.Random(0)
+    topology = ClosTopology()
+    store = RdmaOperateStore(
+        topology, all_reduce_implement, spill_path=str(tmp_path / "spill.bin")
+    )
+    jobs = random_jobs(rng, 60)
+    for job_name, (gpu_list, msg_len) in jobs.items():
+        store.add(job_name, gpu_list, msg_len)
+    assert len(store) == len(jobs)
+    # spilled jobs are read back from the file
+    for job_name in rng.sample(list(jobs), 20):
+        store.spill(job_name)
+    assert len(store.spilled) == 20
+    for job_name, (gpu_list, msg_len) in jobs.items():
+        expected = topology.job_rdma_operates_tuples(
+            gpu_list, msg_len, all_reduce_implement
+        )
+        assert job_name in store
+        assert store[job_name] == expected
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import pytest
+from utils import ScipSessionPool
+
+stub_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scipstp_stub.py")
+
+
+def stub_command(*args: str):
+    """
+    Local stand-in speaking the scipstp shell protocol, see scipstp_stub.py
+    """
+    return [sys.executable, stub_path, *args]
+
+
+def write_stp(stp_file: str):
+    """
+    Jobs 1..3 sharing links 4 (jobs 1, 2) and 5 (jobs 2, 3)
+    """
+    with open(stp_file, "w") as file:
+        file.write("SECTION Graph\nNodes 5\nEdges 4\n")
+        file.write("E 1 4 0.5\nE 2 4 0.5\nE 2 5 0.25\nE 3 5 0.25\nEND\n\n")
+        file.write("SECTION Terminals\nTerminals 3\nT 1\nT 2\nT 3\nEND\n\nEOF")
+
+
+@pytest.fixture
+def stp_files(tmp_path):
+    files = []
+    for i in range(4):
+        stp_file = str(tmp_path / f"{i}.stp")
+        write_stp(stp_file)
+        files.append((stp_file, str(tmp_path / "solutions" / f"{i}.txt")))
+    return files
+
+
+def solution_edges(sol_file: str):
+    edges = []
+    with open(sol_file) as file:
+        for line in file:
+            if line.startswith("x_"):
+                u, v = map(int, line.split()[0].split("_")[1:])
+                edges.append((min(u, v), max(u, v)))
+    return sorted(edges)
+
+
+tree = [(0, 3), (1, 3), (1, 4), (2, 4)]  # all edges, 0-based ids
+
+
+def test_solve(stp_files):
+    pool = ScipSessionPool(command=stub_command())
+    try:
+        stp_file, sol_file = stp_files[0]
+        assert pool.solve(stp_file, sol_file)
+        assert solution_edges(sol_file) == tree
+        assert pool.stats["solves"] == 1 and pool.stats["restarts"] == 0
+    finally:
+        pool.close()
+
+
+def test_timeout_restarts_session(stp_files):
+    pool = ScipSessionPool(command=stub_command("--sleep", "5"), timeout=0.1, grace=0.2)
+    try:
+        stp_file, sol_file = stp_files[0]
+        assert not pool.solve(stp_file, sol_file)
+        assert pool.stats["timeouts"] == 1
+        assert pool.stats["failures"] == 1
+        assert pool.stats["restarts"] == 1
+        assert all(session.is_alive() for session in pool.sessions)
+    finally:
+        pool.close()
+
+
+def test_crash_is_retried(stp_files):
+    pool = ScipSessionPool(command=stub_command("--crash-after", "1"))
+    try:
+        (stp_file, sol_file), (other_stp_file, other_sol_file) = stp_files[:2]
+        assert pool.solve(stp_file, sol_file)
+        # the session dies on its second optimize, is restarted and retried
+        assert pool.solve(other_stp_file, other_sol_file)
+        assert pool.stats["solves"] == 2 and pool.stats["restarts"] == 1
+    finally:
+        pool.close()
+
+
+def test_solve_many(stp_files):
+    pool = ScipSessionPool(num_sessions=2, command=stub_command())
+    try:
+        assert pool.solve_many(stp_files) == [True] * len(stp_files)
+        for _, sol_file in stp_files:
+            assert solution_edges(sol_file) == tree
+        assert pool.stats["solves"] == len(stp_files)
+    finally:
+        pool.close()
+
+
+def test_solve_many_restarts_dead_sessions(stp_files):
+    pool = ScipSessionPool(num_sessions=2, command=stub_command())
+    try:
+        pool.sessions[0].process.kill()
+        pool.sessions[0].process.wait()
+        assert pool.solve_many(stp_files) == [True] * len(stp_files)
+        assert pool.stats["unhealthy"] == 1 and pool.stats["restarts"] == 1
+    finally:
+        pool.close()
+
+
+def test_time_limit_of_single_solve(stp_files):
+    pool = ScipSessionPool(command=stub_command("--sleep", "5"), grace=0.2)
+    try:
+        stp_file, sol_file = stp_files[0]
+        start = time.monotonic()
+        assert not pool.solve(stp_file, sol_file, time_limit=0.1)
+        assert time.monotonic() - start < 2
+        assert pool.stats["timeouts"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,149 @@
+import json
+import asyncio
+import threading
+import pytest
+import params
+from simulate import SchedulingService
+
+interval = params.update_time_interval
+
+
+async def open_client(service: SchedulingService):
+    reader, writer = await asyncio.open_connection(service.host, service.port)
+
+    async def request(message: dict) -> dict:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    return request, writer
+
+
+def submit(job_name: str, time: int, size: int) -> dict:
+    return {
+        "op": "submit",
+        "job": job_name,
+        "time": time,
+        "size": size,
+        "duration": 10 * interval,
+        "model_type": "LLaMA-7B",
+    }
+
+
+def test_protocol(capsys):
+    async def scenario():
+        service = SchedulingService(reoptimize_every=1000)
+        await service.start()
+        request, writer = await open_client(service)
+
+        reply = await request(submit("a", 0, 8))
+        assert [placement["job"] for placement in reply["deployed"]] == ["a"]
+        assert reply["deployed"][0]["gpus"] == list(range(8))
+        reply = await request(submit("b", interval // 2, 16))
+        assert reply["deployed"][0]["gpus"] == list(range(8, 24))
+        reply = await request(submit("a", interval, 8))
+        assert reply == {"error": "ValueError: job a already submitted"}
+
+        # needs the GPUs of both a and b
+        reply = await request(submit("c", 2 * interval, 3072 - 8))
+        assert reply["deployed"] == []
+        assert await request({"op": "placement", "job": "c"}) == {
+            "job": "c",
+            "queued": True,
+        }
+        reply = await request({"op": "complete", "job": "a", "time": 3 * interval})
+        assert reply == {"job": "a", "deployed": []}
+        reply = await request({"op": "complete", "job": "a", "time": 3 * interval})
+        assert reply == {"error": "ValueError: job a is not running"}
+        reply = await request({"op": "complete", "job": "b", "time": 4 * interval})
+        assert reply["deployed"][0]["job"] == "c"
+        placement = await request({"op": "placement", "job": "c"})
+        assert placement["time"] == 4 * interval and len(placement["gpus"]) == 3064
+
+        reply = await request({"op": "reoptimize", "time": 5 * interval})
+        assert set(reply["shifts"]) <= {"c"}
+        stats = await request({"op": "stats"})
+        assert stats["latency"]["submit"]["count"] == 3
+        assert stats["latency"]["complete"]["count"] == 2
+        assert stats["accounting"]["errors"] == []
+
+        writer.close()
+        await writer.wait_closed()
+        await service.close()
+        return service
+
+    service = asyncio.run(scenario())
+    capsys.readouterr()
+    assert service.accounting_status() == {
+        "accounted": 5,
+        "pending": 0,
+        "errors": [],
+    }
+    assert service.num_reoptimized == 1
+
+
+def test_accounting_errors_are_surfaced(capsys):
+    async def scenario():
+        service = SchedulingService()
+
+        def fail(snapshot):
+            raise KeyError("lost pattern")
+
+        service.simulator.traffic_manager.update_traffic_from_snapshot = fail
+        await service.start()
+        request, writer = await open_client(service)
+        await request(submit("a", 0, 8))
+        await request({"op": "complete", "job": "a", "time": 2 * interval})
+        service.accounting.submit(lambda: None).result()  # accounting done
+        stats = await request({"op": "stats"})
+        assert stats["accounting"]["errors"] == ["KeyError: 'lost pattern'"] * 2
+        writer.close()
+        await writer.wait_closed()
+        with pytest.raises(RuntimeError, match="accounting failed for 2 windows"):
+            await service.close()
+
+    asyncio.run(scenario())
+    capsys.readouterr()
+
+
+def test_reoptimize_runs_outside_the_lock(capsys):
+    async def scenario():
+        service = SchedulingService()
+        solving, resume = threading.Event(), threading.Event()
+        solve_time_shifts = service.simulator.solve_time_shifts
+
+        def blocking_solve(traffic_manager=None):
+            solving.set()
+            resume.wait(10)
+            solve_time_shifts(traffic_manager)
+
+        service.simulator.solve_time_shifts = blocking_solve
+        await service.start()
+        request, writer = await open_client(service)
+        other_request, other_writer = await open_client(service)
+        shifts = {}
+        for i, job_name in enumerate(["a", "b", "c"]):
+            reply = await request(submit(job_name, i, 64))
+            shifts[job_name] = reply["deployed"][0]["shift"]
+        reoptimize = asyncio.create_task(
+            other_request({"op": "reoptimize", "time": interval})
+        )
+        assert await asyncio.to_thread(solving.wait, 10)
+        # served while the solver runs
+        reply = await request({"op": "complete", "job": "b", "time": interval})
+        assert reply == {"job": "b", "deployed": []}
+        resume.set()
+        reply = await reoptimize
+        # b completed meanwhile, its shift is dropped
+        assert "b" not in reply["shifts"]
+        assert reply["shifts"]
+        for job_name, shift in reply["shifts"].items():
+            placement = await request({"op": "placement", "job": job_name})
+            assert placement["shift"] == shifts[job_name] + shift
+        for client in (writer, other_writer):
+            client.close()
+            await client.wait_closed()
+        await service.close()
+
+    asyncio.run(scenario())
+    capsys.readouterr()
@@ -0,0 +1,41 @@
+import random
+import numpy as np
+import params
+from simulate import Simulator, ShadowVerifier
+from simulate.network_traffic_management import TrafficPattern
+from utils.cal_job_conflicts import cal_overlap, cal_overlap_reference
+
+
+def test_cal_overlap_matches_reference():
+    rng = random.Random(0)
+    for _ in range(500):
+        patterns, periods = [], []
+        for _ in range(2):
+            T = rng.randrange(10, 200)
+            start = rng.randrange(T)
+            patterns.append(TrafficPattern((start, start + rng.randrange(1, T)), T))
+            start_time = rng.randrange(5000)
+            periods.extend([start_time, start_time + rng.randrange(1, 10000)])
+        # windows long after the job starts exercise the skipped periods
+        current_time = rng.randrange(10000)
+        new_time = current_time + rng.randrange(1, 500)
+        args = (*patterns, *periods, current_time, new_time)
+        assert cal_overlap(*args) == cal_overlap_reference(*args)
+
+
+def test_shadow_run_has_no_divergences(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(params, "job_num", 40)
+    monkeypatch.setattr(params, "arrival_rate", 20000)
+    random.seed(0)
+    np.random.seed(0)
+    simulator = Simulator()
+    simulator.method = "cassini"
+    simulator.shadow = ShadowVerifier(
+        sample_rate=1.0, mode="assert", dump_dir=str(tmp_path)
+    )
+    simulator.generate_random_jobs()
+    simulator.run(netsim_input=False)
+    assert "invariant of GPUManager only" in capsys.readouterr().out
+    stats = simulator.shadow.stats
+    assert stats["conflicts"]["sampled"] > 0 and stats["placement"]["sampled"] > 0
+    assert not any(check["divergences"] for check in stats.values())
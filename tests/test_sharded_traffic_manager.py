@@ -0,0 +1,37 @@
+import random
+import numpy as np
+import params
+import pytest
+from simulate import PairShardedTrafficManager, Simulator
+
+
+def run(sharded: bool, pipelined: bool) -> Simulator:
+    random.seed(0)
+    np.random.seed(0)
+    simulator = Simulator()
+    simulator.method = "cassini"
+    if sharded:
+        simulator.traffic_manager = PairShardedTrafficManager(num_shards=2)
+    simulator.generate_random_jobs()
+    simulator.run(netsim_input=False, pipelined=pipelined)
+    return simulator
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_sharded_equals_in_process(monkeypatch, pipelined):
+    monkeypatch.setattr(params, "job_num", 40)
+    monkeypatch.setattr(params, "arrival_rate", 20000)
+    in_process = run(sharded=False, pipelined=pipelined)
+    sharded = run(sharded=True, pipelined=pipelined)
+    assert sum(in_process.traffic_manager.penalty_time.values()) > 0
+    assert (
+        sharded.traffic_manager.penalty_time == in_process.traffic_manager.penalty_time
+    )
+    assert (
+        sharded.traffic_manager.overlap_stats
+        == in_process.traffic_manager.overlap_stats
+    )
+    assert sharded.time_count == in_process.time_count
+    # the shards did the overlap work and were shut down
+    assert all(seconds > 0 for seconds in sharded.traffic_manager.shard_seconds)
+    assert not sharded.traffic_manager.processes
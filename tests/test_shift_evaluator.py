@@ -0,0 +1,32 @@
+import copy
+import random
+from random_traffic import random_traffic_manager
+
+
+def test_evaluate_matches_applied_shifts():
+    rng = random.Random(0)
+    for seed in range(20):
+        traffic_manager = random_traffic_manager(seed, num_jobs=15, num_links=8)
+        traffic_manager.current_time = rng.randrange(2000)
+        time_next = traffic_manager.current_time + rng.randrange(1, 3000)
+        time_periods = dict(traffic_manager.job_time_period)
+        version = traffic_manager.version
+        # several candidates on one evaluator, revisiting some shifts
+        candidates = []
+        for _ in range(4):
+            jobs = rng.sample(sorted(time_periods), rng.randrange(len(time_periods)))
+            candidates.append({job: rng.randrange(-500, 500) for job in jobs})
+        candidates.append(candidates[0])
+        for time_shifts in candidates:
+            job_conflicts, total = traffic_manager.evaluate_time_shifts(
+                time_shifts, time_next
+            )
+            applied = copy.deepcopy(traffic_manager)
+            applied.update_job_time_periods(time_shifts)
+            expected = applied.update_traffic(time_next)
+            assert job_conflicts == expected
+            assert total == sum(expected.values())
+        # nothing changed in the live state
+        assert traffic_manager.job_time_period == time_periods
+        assert traffic_manager.version == version
+        assert traffic_manager.penalty_time == {}
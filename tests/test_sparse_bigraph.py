@@ -0,0 +1,48 @@
+import pytest
+import simulate  # noqa: F401, solver imports simulate first
+from solver.graph_constructor import construct_bigraph_reference
+from solver.sparse_bigraph import construct_sparse_bigraph
+from solver.time_shifts import (
+    cal_time_shift_array,
+    cal_time_shift_array_cassini,
+    cal_time_shifts_reference,
+    cal_time_shifts_cassini_reference,
+)
+from solver.unify_time_shifts import array_unify_time_shift, bfs_unify_time_shift
+from random_traffic import random_traffic_manager
+
+methods = [
+    (cal_time_shift_array, cal_time_shifts_reference),
+    (cal_time_shift_array_cassini, cal_time_shifts_cassini_reference),
+]
+
+
+def nodes(graph, category):
+    return [node for node in graph if graph.nodes[node]["category"] == category]
+
+
+@pytest.mark.parametrize("cal_time_shift, cal_time_shifts", methods)
+def test_same_graph_as_reference(cal_time_shift, cal_time_shifts):
+    for seed in range(20):
+        traffic_manager = random_traffic_manager(seed)
+        reference = construct_bigraph_reference(traffic_manager, cal_time_shifts)
+        graph = construct_sparse_bigraph(traffic_manager, cal_time_shift).to_networkx()
+        assert nodes(graph, "job") == nodes(reference, "job")
+        assert nodes(graph, "link") == nodes(reference, "link")
+        # neighbour order decides the unification of inconsistent shifts
+        for node in reference:
+            assert list(graph[node].items()) == list(reference[node].items())
+
+
+@pytest.mark.parametrize("cal_time_shift, cal_time_shifts", methods)
+def test_unified_shifts_equal_reference(cal_time_shift, cal_time_shifts):
+    for seed in range(200):
+        traffic_manager = random_traffic_manager(seed, num_jobs=20)
+        bigraph = construct_sparse_bigraph(traffic_manager, cal_time_shift)
+        reference = construct_bigraph_reference(traffic_manager, cal_time_shifts)
+        assert array_unify_time_shift(bigraph) == bfs_unify_time_shift(reference)
+        # unifying the components apart gives the same shifts
+        shifts = {}
+        for component in bigraph.connected_subgraphs():
+            shifts.update(array_unify_time_shift(component))
+        assert shifts == bfs_unify_time_shift(reference)
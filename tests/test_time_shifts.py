@@ -0,0 +1,23 @@
+import pytest
+import simulate  # noqa: F401, solver imports simulate first
+from solver.time_shifts import (
+    cal_time_shifts,
+    cal_time_shifts_cassini,
+    cal_time_shifts_reference,
+    cal_time_shifts_cassini_reference,
+)
+from random_traffic import random_traffic_manager
+
+
+@pytest.mark.parametrize(
+    "cal_time_shifts, reference",
+    [
+        (cal_time_shifts, cal_time_shifts_reference),
+        (cal_time_shifts_cassini, cal_time_shifts_cassini_reference),
+    ],
+)
+def test_time_shifts_equal_reference(cal_time_shifts, reference):
+    for seed in range(50):
+        # more jobs than links, so links hold ties of equal T
+        traffic_manager = random_traffic_manager(seed, num_jobs=25, num_links=8)
+        assert cal_time_shifts(traffic_manager) == reference(traffic_manager)
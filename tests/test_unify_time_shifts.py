@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import simulate  # noqa: F401, solver imports simulate first
+from solver.sparse_bigraph import JobLinkBigraph
+from solver.unify_time_shifts import array_unify_time_shift, bfs_unify_time_shift
+
+
+def random_bigraph(num_jobs: int, num_links: int, seed: int) -> JobLinkBigraph:
+    """
+    Bigraph with random (inconsistent) shifts, usually several components
+    """
+    rng = np.random.default_rng(seed)
+    edges = set()
+    for job in range(num_jobs):
+        for link in rng.choice(num_links, size=rng.integers(1, 4), replace=False):
+            edges.add((int(link), job))
+    used_links = sorted({link for link, _ in edges})
+    link_index = {link: i for i, link in enumerate(used_links)}
+    # link-major edge order, jobs of a link in random order
+    edges = sorted(edges, key=lambda edge: (edge[0], rng.random()))
+    rows = np.array([link_index[link] for link, _ in edges])
+    cols = np.array([job for _, job in edges])
+    job_order = rng.permutation(num_jobs)
+    return JobLinkBigraph(
+        [f"job{j}" for j in job_order],
+        [f"link{l}" for l in used_links],
+        rows,
+        np.argsort(job_order)[cols],
+        rng.integers(0, 1000, len(rows)),
+        np.full(len(rows), 10),
+    )
+
+
+@pytest.mark.parametrize("num_jobs, num_links", [(5, 12), (20, 15), (60, 20)])
+def test_array_unify_equals_bfs(num_jobs, num_links):
+    for seed in range(50):
+        bigraph = random_bigraph(num_jobs, num_links, seed)
+        assert array_unify_time_shift(bigraph) == bfs_unify_time_shift(
+            bigraph.to_networkx()
+        )
+        for component in bigraph.connected_subgraphs():
+            # e.g. a Steiner tree keeping the odd links only
+            links = np.arange(1, len(component.links), 2)
+            if len(links) == 0:
+                continue
+            restricted = component.subgraph(np.arange(len(component.jobs)), links)
+            assert array_unify_time_shift(restricted) == bfs_unify_time_shift(
+                restricted.to_networkx()
+            )
@@ -1,8 +1,12 @@
 from .cal_job_conflicts import cal_job_conflicts, cal_link_job_conflicts
-from .run_stp_solver import run_scipstp
+from .shift_evaluator import ShiftEvaluator
+from .run_stp_solver import run_scipstp, get_scipstp_semaphore, set_scipstp_semaphore
 from .random_generate import (
     generate_start_times,
     sample_from_cdf,
     sample_from_cdf_continuous,
 )
 from .clean_tmp_file import clean_tmp_file
+from .memory_report import MemoryTracker
+from .metrics import MetricsRegistry, SimulationMetrics, component_sizes
+from .scip_pool import ScipSessionPool
@@ -1,4 +1,5 @@
 import numpy as np
+from itertools import combinations
 
 
 def cal_overlap(
@@ -12,10 +13,68 @@ def cal_overlap(
     new_time,
 ):
     # calculate overlap between two jobs in a given time period (estimated)
-    intervals_1 = pattern_1["intervals"]
-    T_1 = pattern_1["T"]
-    intervals_2 = pattern_2["intervals"]
-    T_2 = pattern_2["T"]
+    intervals_1 = [pattern_1.interval]
+    T_1 = pattern_1.T
+    intervals_2 = [pattern_2.interval]
+    T_2 = pattern_2.T
+
+    array_1 = np.zeros(new_time - current_time, dtype=bool)
+    array_2 = np.zeros(new_time - current_time, dtype=bool)
+
+    for start, end in intervals_1:
+        # skip the periods ending before current_time at once
+        if end + start_time_1 <= current_time:
+            skipped = (current_time - end - start_time_1) // T_1 + 1
+            start += skipped * T_1
+            end += skipped * T_1
+        while start + start_time_1 < min(end_time_1, new_time):
+            if end + start_time_1 <= current_time:
+                start += T_1
+                end += T_1
+                continue
+            else:
+                low = max(current_time, start + start_time_1) - current_time
+                high = min(new_time, end + start_time_1) - current_time
+                array_1[low:high] = 1
+                start += T_1
+                end += T_1
+    for start, end in intervals_2:
+        # skip the periods ending before current_time at once
+        if end + start_time_2 <= current_time:
+            skipped = (current_time - end - start_time_2) // T_2 + 1
+            start += skipped * T_2
+            end += skipped * T_2
+        while start + start_time_2 < min(end_time_2, new_time):
+            if end + start_time_2 <= current_time:
+                start += T_2
+                end += T_2
+                continue
+            else:
+                low = max(current_time, start + start_time_2) - current_time
+                high = min(new_time, end + start_time_2) - current_time
+                array_2[low:high] = 1
+                start += T_2
+                end += T_2
+
+    return np.sum(array_1 & array_2)
+
+
+def cal_overlap_reference(
+    pattern_1,
+    pattern_2,
+    start_time_1,
+    end_time_1,
+    start_time_2,
+    end_time_2,
+    current_time,
+    new_time,
+):
+    # cal_overlap as originally written, stepping one period at a time from
+    # the job start; kept unmodified as the reference of the shadow mode
+    intervals_1 = [pattern_1.interval]
+    T_1 = pattern_1.T
+    intervals_2 = [pattern_2.interval]
+    T_2 = pattern_2.T
 
     array_1 = np.zeros(new_time - current_time, dtype=bool)
     array_2 = np.zeros(new_time - current_time, dtype=bool)
@@ -49,7 +108,8 @@ def cal_overlap(
 
 
 def cal_link_job_conflicts(jobs, job_time_period, current_time, new_time):
-    # Calculate job traffic conflicts on a single link
+    # Calculate job traffic conflicts on a single link, pair by pair with
+    # cal_overlap_reference
     # jobs: {job_name: pattern}
     # job_time_period: {job_name: (start_time, end_time)}
     # return: {job_name: conflict}
@@ -63,7 +123,7 @@ def cal_link_job_conflicts(jobs, job_time_period, current_time, new_time):
             pair = frozenset([job_name, other_job_name])
             if pair in calculated_pairs:
                 continue
-            conflict_value = cal_overlap(
+            conflict_value = cal_overlap_reference(
                 pattern,
                 other_pattern,
                 *job_time_period[job_name],
@@ -78,28 +138,129 @@ def cal_link_job_conflicts(jobs, job_time_period, current_time, new_time):
     return link_job_conflicts
 
 
-def cal_job_conflicts(link_traffic_pattern, job_time_period, current_time, new_time):
-    # Calculate max conflict of each job on each link
-    # from current_time to new_time
-    # link_traffic_patter: {link: {job_name: pattern}}
+def collect_job_pairs(link_traffic_pattern, active_jobs=None):
+    # Distinct co-located job pairs of link_traffic_pattern
+    # active_jobs: optional set of jobs alive in the window, pairs with
+    # another job cannot overlap and are skipped
+    # Return ({link: [pair_key, ...]},
+    #         {pair_key: (job_name, pattern, other_job_name, other_pattern)})
+    link_job_pairs = {}  # {link: [pair_key, ...]}
+    pair_jobs = {}  # {pair_key: (job_name, pattern, other_job_name, other_pattern)}
+    for link, jobs in link_traffic_pattern.items():
+        pair_keys = []
+        for (job_name, pattern), (other_job_name, other_pattern) in combinations(
+            jobs.items(), 2
+        ):
+            if active_jobs is not None and (
+                job_name not in active_jobs or other_job_name not in active_jobs
+            ):
+                continue
+            if other_job_name < job_name:
+                job_name, pattern, other_job_name, other_pattern = (
+                    other_job_name,
+                    other_pattern,
+                    job_name,
+                    pattern,
+                )
+            # patterns are part of the key, so links that still hold a
+            # different pattern of the same job are not merged
+            pair_key = (
+                job_name,
+                tuple(pattern.interval),
+                pattern.T,
+                other_job_name,
+                tuple(other_pattern.interval),
+                other_pattern.T,
+            )
+            if pair_key not in pair_jobs:
+                pair_jobs[pair_key] = (job_name, pattern, other_job_name, other_pattern)
+            pair_keys.append(pair_key)
+        link_job_pairs[link] = pair_keys
+    return link_job_pairs, pair_jobs
+
+
+def sum_job_conflicts(
+    link_traffic_pattern,
+    link_job_pairs,
+    pair_overlaps,
+    stats=None,
+    link_conflicts=None,
+):
+    # Scatter the overlap of each distinct pair to the jobs of every link
+    # holding it, and take the max of each job over links
     # Return a {job_name: conflict} dict
     job_conflicts = {}
     for link, jobs in link_traffic_pattern.items():
-        link_job_conflicts = cal_link_job_conflicts(
-            jobs, job_time_period, current_time, new_time
-        )  # # the conflict of each job on link: {job_name: conflict}}
+        link_job_conflicts = {job_name: 0 for job_name in jobs.keys()}
+        link_conflict = 0
+        for pair_key in link_job_pairs[link]:
+            conflict_value = pair_overlaps[pair_key]
+            link_job_conflicts[pair_key[0]] += conflict_value
+            link_job_conflicts[pair_key[3]] += conflict_value
+            link_conflict += conflict_value
+        if link_conflicts is not None:
+            link_conflicts[link] = int(link_conflict)
         for job_name, conflict in link_job_conflicts.items():
             if job_name in job_conflicts:
                 job_conflicts[job_name] = max(job_conflicts[job_name], conflict)
             else:
                 job_conflicts[job_name] = conflict
+
+    if stats is not None:
+        stats["link_pairs"] = stats.get("link_pairs", 0) + sum(
+            len(pair_keys) for pair_keys in link_job_pairs.values()
+        )
+        stats["distinct_pairs"] = stats.get("distinct_pairs", 0) + len(pair_overlaps)
     return job_conflicts
 
 
+def cal_job_conflicts(
+    link_traffic_pattern,
+    job_time_period,
+    current_time,
+    new_time,
+    stats=None,
+    link_conflicts=None,
+    active_jobs=None,
+):
+    # Calculate max conflict of each job on each link
+    # from current_time to new_time
+    # link_traffic_patter: {link: {job_name: pattern}}
+    # The overlap of a job pair sharing several links is calculated only once,
+    # then added to the pair's jobs on every one of those links.
+    # stats: optional {"link_pairs": int, "distinct_pairs": int} dict to accumulate
+    # link_conflicts: optional dict filled with {link: sum of pair overlaps on it}
+    # active_jobs: optional set of jobs alive in [current_time, new_time),
+    # pairs with another job cannot overlap and are skipped
+    # Return a {job_name: conflict} dict
+    link_job_pairs, pair_jobs = collect_job_pairs(link_traffic_pattern, active_jobs)
+    pair_overlaps = {
+        pair_key: cal_overlap(
+            pattern,
+            other_pattern,
+            *job_time_period[job_name],
+            *job_time_period[other_job_name],
+            current_time,
+            new_time,
+        )
+        for pair_key, (
+            job_name,
+            pattern,
+            other_job_name,
+            other_pattern,
+        ) in pair_jobs.items()
+    }
+    return sum_job_conflicts(
+        link_traffic_pattern, link_job_pairs, pair_overlaps, stats, link_conflicts
+    )
+
+
 if __name__ == "__main__":
+    from simulate.network_traffic_management import TrafficPattern
+
     jobs_1 = {
-        "job1": {"intervals": [[0, 2]], "T": 10},
-        "job2": {"intervals": [[1, 3]], "T": 10},
+        "job1": TrafficPattern((0, 2), 10),
+        "job2": TrafficPattern((1, 3), 10),
     }
 
     link_traffic_pattern = {"link1": jobs_1}
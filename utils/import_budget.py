@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import subprocess
+
+import_time_budget = 0.6  # seconds for `import simulate` in a fresh interpreter
+lazy_modules = [
+    "matplotlib",
+    "pulp",
+    "scipy",
+    "asyncio",  # scheduling service
+    "http.server",  # metrics endpoint
+    "tracemalloc",  # memory report
+]  # must not be loaded by `import simulate`
+
+
+def measure_import_time(module: str = "simulate", repeat: int = 3):
+    """
+    Import module in fresh interpreters and return the best wall time (s)
+    together with the lazy modules that got loaded along the way
+    """
+    code = (
+        "import sys, time, json\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "t = time.perf_counter() - t\n"
+        f"print(json.dumps([t, [m for m in {lazy_modules!r} if m in sys.modules]]))"
+    )
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best_time, loaded_modules = float("inf"), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        import_time, loaded_modules = json.loads(output.strip().splitlines()[-1])
+        best_time = min(best_time, import_time)
+    return best_time, loaded_modules
+
+
+def check_import_budget(module: str = "simulate", budget: float = import_time_budget):
+    """
+    Raise AssertionError if importing module exceeds the time budget
+    or eagerly loads a heavy optional dependency
+    """
+    import_time, loaded_modules = measure_import_time(module)
+    print(f"[INFO] import {module}: {import_time:.3f}s (budget {budget:.3f}s)")
+    assert not loaded_modules, f"import {module} eagerly loads {loaded_modules}"
+    assert (
+        import_time <= budget
+    ), f"import {module} takes {import_time:.3f}s, over budget {budget:.3f}s"
+
+
+if __name__ == "__main__":
+    check_import_budget()
@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from typing import Dict
+
+
+class MemoryTracker:
+    """
+    Memory allocated and peak traced memory of each simulation phase,
+    measured with tracemalloc
+    """
+
+    phases: Dict[str, Dict[str, int]]  # {phase: {"calls", "allocated", "peak"}}
+
+    def __init__(self):
+        self.phases = {}
+        self.started = False
+
+    def start(self):
+        # only needed when tracking memory, so import it on first use
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started = True
+
+    def stop(self):
+        import tracemalloc
+
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+
+    @contextmanager
+    def phase(self, name: str):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            after, peak = tracemalloc.get_traced_memory()
+            stats = self.phases.setdefault(
+                name, {"calls": 0, "allocated": 0, "peak": 0}
+            )
+            stats["calls"] += 1
+            stats["allocated"] += after - before
+            stats["peak"] = max(stats["peak"], peak)
+
+    def report(self):
+        """
+        Print net allocated memory and peak traced memory of each phase
+        """
+        import tracemalloc
+
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"[INFO] Memory report (traced memory now {current / 2**20:.1f} MiB):")
+        for name, stats in self.phases.items():
+            print(
+                f"[INFO]   {name}: {stats['calls']} calls, "
+                f"net {stats['allocated'] / 2**20:+.1f} MiB, "
+                f"peak {stats['peak'] / 2**20:.1f} MiB"
+            )
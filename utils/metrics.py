@@ -0,0 +1,344 @@
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def samples(self) -> List[Tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Gauge:
+    """
+    function: read the value at exposition time instead of set()
+    """
+
+    def __init__(
+        self, name: str, help: str, function: Optional[Callable[[], float]] = None
+    ):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self.function = function
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        value = self.value if self.function is None else self.function()
+        return [(self.name, value)]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: List[float]):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> List[Tuple[str, float]]:
+        samples = [
+            (f'{self.name}_bucket{{le="{bound:g}"}}', count)
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', self.count))
+        samples.append((f"{self.name}_sum", self.sum))
+        samples.append((f"{self.name}_count", self.count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms rendered in the Prometheus text format.
+    Updates and rendering hold the same lock, so exposition threads always
+    see a consistent set of values.
+    """
+
+    metrics: Dict[str, object]  # {name: Counter | Gauge | Histogram}
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        assert metric.name not in self.metrics, f"metric {metric.name} exists"
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.register(Counter(name, help))
+
+    def gauge(
+        self, name: str, help: str, function: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, help, function))
+
+    def histogram(self, name: str, help: str, buckets: List[float]) -> Histogram:
+        return self.register(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for metric in self.metrics.values():
+                kind = type(metric).__name__.lower()
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {kind}")
+                for name, value in metric.samples():
+                    value = float(value)
+                    # exact integers, counters of time slots grow large
+                    text = str(int(value)) if value.is_integer() else repr(value)
+                    lines.append(f"{name} {text}")
+        return "\n".join(lines) + "\n"
+
+
+def component_sizes(link_traffic_pattern: dict) -> List[int]:
+    """
+    Number of jobs of each connected component of the job-link graph
+    of a {link: {job_name: pattern}} dict, by union-find over the links
+    """
+    parent = {}
+
+    def find(job_name: str) -> str:
+        root = job_name
+        while parent[root] != root:
+            root = parent[root]
+        while parent[job_name] != root:
+            parent[job_name], job_name = root, parent[job_name]
+        return root
+
+    for jobs in link_traffic_pattern.values():
+        first = None
+        for job_name in jobs:
+            parent.setdefault(job_name, job_name)
+            if first is None:
+                first = find(job_name)
+            else:
+                parent[find(job_name)] = first
+    sizes = {}
+    for job_name in parent:
+        root = find(job_name)
+        sizes[root] = sizes.get(root, 0) + 1
+    return list(sizes.values())
+
+
+class SimulationMetrics:
+    """
+    Live progress of Simulator.run: simulated vs. wall time, queue length,
+    GPU occupancy, running jobs, component sizes, solver latency and an ETA,
+    updated by the simulator once per window and around each solver call.
+    Exposed on a local HTTP endpoint (port, Prometheus text on any path)
+    and/or rewritten every file_interval seconds to file_path, both from
+    background threads so that a stuck solver call stays visible through
+    clustersim_solver_running_seconds.
+    The ETA extrapolates the wall time per ended job over the jobs left.
+    """
+
+    def __init__(
+        self,
+        port: Optional[int] = None,
+        file_path: Optional[str] = None,
+        file_interval: float = 5.0,
+        host: str = "127.0.0.1",
+    ):
+        self.port = port
+        self.host = host
+        self.file_path = file_path
+        self.file_interval = file_interval
+        self.server = None
+        self.writer = None
+        self.stopped = threading.Event()
+        self.start_time = time.perf_counter()
+        self.solve_start = None  # perf_counter of the running solver call
+        self.num_jobs = 0
+        self.num_ended = 0
+
+        registry = self.registry = MetricsRegistry()
+        self.simulated_time = registry.gauge(
+            "clustersim_simulated_time", "Current simulated time (time slots)"
+        )
+        registry.gauge(
+            "clustersim_wall_time_seconds",
+            "Wall time since the run started",
+            self.wall_time,
+        )
+        registry.gauge(
+            "clustersim_simulated_time_per_second",
+            "Simulated time slots per wall second",
+            lambda: self.simulated_time.value / max(self.wall_time(), 1e-9),
+        )
+        self.windows = registry.counter(
+            "clustersim_windows_total", "Time windows simulated"
+        )
+        self.deployed = registry.counter(
+            "clustersim_jobs_deployed_total", "Jobs deployed"
+        )
+        self.released = registry.counter(
+            "clustersim_jobs_released_total", "Jobs released"
+        )
+        self.penalty = registry.counter(
+            "clustersim_penalty_total", "Conflict penalty accounted (time slots)"
+        )
+        self.queue_length = registry.gauge(
+            "clustersim_queue_length", "Arrived jobs waiting for GPUs"
+        )
+        self.waiting = registry.gauge("clustersim_waiting_jobs", "Jobs not arrived yet")
+        self.running = registry.gauge("clustersim_running_jobs", "Running jobs")
+        self.gpu_occupation = registry.gauge(
+            "clustersim_gpu_occupation_ratio", "Fraction of GPUs in use"
+        )
+        self.max_component = registry.gauge(
+            "clustersim_max_component_jobs", "Jobs in the largest component"
+        )
+        self.component_size = registry.histogram(
+            "clustersim_component_jobs",
+            "Jobs per connected component of the job-link graph, per window",
+            [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024],
+        )
+        self.solver_latency = registry.histogram(
+            "clustersim_solver_latency_seconds",
+            "Wall time of each solver call",
+            [0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300],
+        )
+        registry.gauge(
+            "clustersim_solver_running_seconds",
+            "Wall time of the solver call in progress, 0 if none",
+            lambda: (
+                0
+                if self.solve_start is None
+                else time.perf_counter() - self.solve_start
+            ),
+        )
+        registry.gauge(
+            "clustersim_progress_ratio",
+            "Fraction of jobs ended",
+            lambda: self.num_ended / self.num_jobs if self.num_jobs else 0,
+        )
+        registry.gauge("clustersim_eta_seconds", "Estimated wall time left", self.eta)
+
+    def wall_time(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def eta(self) -> float:
+        if self.num_ended == 0:
+            return -1  # unknown
+        return self.wall_time() * (self.num_jobs - self.num_ended) / self.num_ended
+
+    def start(self, num_jobs: int):
+        self.start_time = time.perf_counter()
+        self.num_jobs = num_jobs
+        self.stopped.clear()
+        if self.port is not None and self.server is None:
+            # only needed when exposing metrics, so import it on first use
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = registry.render().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass  # keep the simulator output clean
+
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.port = self.server.server_address[1]
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"[INFO] Metrics on http://{self.host}:{self.port}/metrics.")
+        if self.file_path is not None and self.writer is None:
+            self.writer = threading.Thread(target=self.write_periodically, daemon=True)
+            self.writer.start()
+
+    def write(self):
+        """
+        Rewrite file_path atomically
+        """
+        file_dir = os.path.dirname(self.file_path)
+        if file_dir and not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.registry.render())
+        os.replace(tmp_path, self.file_path)
+
+    def write_periodically(self):
+        while not self.stopped.wait(self.file_interval):
+            self.write()
+
+    def solve_started(self):
+        self.solve_start = time.perf_counter()
+
+    def solve_finished(self):
+        with self.registry.lock:
+            self.solver_latency.observe(time.perf_counter() - self.solve_start)
+            self.solve_start = None
+
+    def account(self, job_conflicts: Dict[str, int]):
+        with self.registry.lock:
+            self.penalty.inc(sum(job_conflicts.values()))
+
+    def observe_window(
+        self,
+        current_time: int,
+        num_deployed: int,
+        num_released: int,
+        num_ended: int,
+        queue_length: int,
+        num_waiting: int,
+        num_running: int,
+        gpu_occupation: float,
+        component_sizes: List[int],
+    ):
+        with self.registry.lock:
+            self.windows.inc()
+            self.simulated_time.set(current_time)
+            self.deployed.inc(num_deployed)
+            self.released.inc(num_released)
+            self.num_ended = num_ended
+            self.queue_length.set(queue_length)
+            self.waiting.set(num_waiting)
+            self.running.set(num_running)
+            self.gpu_occupation.set(gpu_occupation)
+            self.max_component.set(max(component_sizes, default=0))
+            for size in component_sizes:
+                self.component_size.observe(size)
+
+    def close(self):
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+        if self.file_path is not None:
+            self.write()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        print(
+            f"[INFO] Metrics: {self.windows.value:.0f} windows, "
+            f"{self.released.value:.0f} jobs released in {self.wall_time():.1f}s, "
+            f"{self.solver_latency.count} solver calls "
+            f"({self.solver_latency.sum:.2f}s)."
+        )
@@ -1,8 +1,26 @@
 import os
 import subprocess
 
+_scipstp_semaphore = None  # caps concurrent scipstp processes across workers
 
-def run_scipstp(scipstp_path, stp_file, sol_file):
+
+def set_scipstp_semaphore(semaphore):
+    """
+    Share a multiprocessing semaphore limiting how many scipstp processes
+    may run at the same time. Pass None to remove the limit.
+    """
+    global _scipstp_semaphore
+    _scipstp_semaphore = semaphore
+
+
+def get_scipstp_semaphore():
+    """
+    Semaphore set by set_scipstp_semaphore, None if unlimited
+    """
+    return _scipstp_semaphore
+
+
+def run_scipstp(scipstp_path, stp_file, sol_file, time_limit=None):
     """
     Runs the scipstp command on a single .stp file and writes the solution to the specified file.
 
@@ -10,6 +28,11 @@ def run_scipstp(scipstp_path, stp_file, sol_file):
     scipstp_path (str): The full path to the scipstp executable.
     stp_file (str): The full path to the .stp file.
     sol_file (str): The full path where the solution file will be stored.
+    time_limit (float): Seconds SCIP may solve before writing its best solution,
+        the process is killed if it is still running 5 seconds later.
+
+    Returns:
+    bool: False if the process was killed.
     """
     # Ensure the directory for the solution file exists
     os.makedirs(os.path.dirname(sol_file), exist_ok=True)
@@ -20,6 +43,7 @@ def run_scipstp(scipstp_path, stp_file, sol_file):
         scipstp_executable,
         "-c",
         "set stp reduction 0",
+        *(["-c", f"set limits time {time_limit}"] if time_limit is not None else []),
         "-c",
         f"read {stp_file}",
         "-c",
@@ -32,5 +56,24 @@ def run_scipstp(scipstp_path, stp_file, sol_file):
 
     # Run the scipstp command
     # print(f"[INFO] Solving STP: Problem file located at '{stp_file}'...")
-    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timeout = time_limit + 5 if time_limit is not None else None
+    try:
+        if _scipstp_semaphore is None:
+            subprocess.run(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+            )
+        else:
+            with _scipstp_semaphore:
+                subprocess.run(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=timeout,
+                )
+    except subprocess.TimeoutExpired:
+        return False
     # print(f"[INFO] STP Solving Complete: Solution file saved at '{stp_file}'.")
+    return True
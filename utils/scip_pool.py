@@ -0,0 +1,258 @@
+import os
+import time
+import queue
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .run_stp_solver import get_scipstp_semaphore
+
+solution_written_marker = "written solution information to file"
+
+
+def _read_lines(stream, lines: queue.Queue):
+    for line in stream:
+        lines.put(line)
+    lines.put(None)  # EOF, the process exited
+
+
+class ScipSession:
+    """
+    A long-lived interactive scipstp process, driven over stdin.
+    Parameters are set once at start, so each solve only sends
+    read / optimize / write solution and waits for the solution message.
+    """
+
+    def __init__(self, command: List[str], time_limit: Optional[float] = None):
+        self.command = command
+        self.time_limit = time_limit
+        self.process = None
+        self.lines = None
+        self.start()
+
+    def start(self) -> bool:
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self.lines = queue.Queue()
+        threading.Thread(
+            target=_read_lines, args=(self.process.stdout, self.lines), daemon=True
+        ).start()
+        commands = ["set stp reduction 0"]
+        if self.time_limit is not None:
+            # let SCIP stop by itself and write its best solution
+            commands.append(f"set limits time {self.time_limit}")
+        return self.send(commands) and self.wait_for("stp/reduction = 0", 30)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def health_check(self, timeout: float = 10) -> bool:
+        """
+        Round trip of a parameter command
+        """
+        return (
+            self.is_alive()
+            and self.send(["set stp reduction 0"])
+            and self.wait_for("stp/reduction = 0", timeout)
+        )
+
+    def send(self, commands: List[str]) -> bool:
+        try:
+            self.process.stdin.write("".join(f"{command}\n" for command in commands))
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError):
+            return False
+
+    def wait_for(self, marker: str, timeout: float) -> Optional[bool]:
+        """
+        Read output until a line contains marker.
+        Return True if found, False on EOF and None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if line is None:
+                return False
+            if marker in line:
+                return True
+
+    def solve(
+        self,
+        stp_file: str,
+        sol_file: str,
+        timeout: float,
+        time_limit: Optional[float] = None,
+    ) -> Optional[bool]:
+        """
+        Return True on success, False if the process died and None on timeout.
+        time_limit: SCIP time limit of this solve only, instead of the session's
+        """
+        commands = [f"read {stp_file}", "optimize", f"write solution {sol_file}"]
+        if time_limit is not None:
+            default_limit = 1e20 if self.time_limit is None else self.time_limit
+            commands = [
+                f"set limits time {time_limit}",
+                *commands,
+                f"set limits time {default_limit}",
+            ]
+        if not self.send(commands):
+            return False
+        return self.wait_for(solution_written_marker, timeout)
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def restart(self) -> bool:
+        self.kill()
+        return self.start()
+
+    def close(self):
+        if self.is_alive():
+            self.send(["quit"])
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self.kill()
+
+
+class ScipSessionPool:
+    """
+    Pool of warm scipstp sessions replacing one run_scipstp process per
+    component. Sessions crashing during a solve are restarted and the solve is
+    retried once; sessions exceeding timeout (SCIP's own time limit) by more
+    than grace seconds are killed and restarted, and the solve is reported as
+    failed so that the caller can fall back. Each solve_many batch, i.e. each
+    window, starts with a health check restarting unresponsive sessions.
+    command: defaults to scipstp in scipstp_path
+    """
+
+    sessions: List[ScipSession]
+    stats: Dict[str, int]
+
+    def __init__(
+        self,
+        scipstp_path: str = "",
+        num_sessions: int = 1,
+        timeout: float = 60,
+        command: Optional[List[str]] = None,
+        grace: float = 5,
+    ):
+        if command is None:
+            command = [os.path.join(scipstp_path, "scipstp")]
+        self.timeout = timeout
+        self.grace = grace
+        self.sessions = [
+            ScipSession(command, time_limit=timeout) for _ in range(num_sessions)
+        ]
+        self.idle_sessions = queue.Queue()
+        for session in self.sessions:
+            self.idle_sessions.put(session)
+        self.stats = {
+            "solves": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "unhealthy": 0,
+        }
+        self.stats_lock = threading.Lock()
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def solve(
+        self, stp_file: str, sol_file: str, time_limit: Optional[float] = None
+    ) -> bool:
+        """
+        Solve a single .stp file, return whether sol_file was written.
+        time_limit: seconds for this solve if shorter than timeout
+        """
+        os.makedirs(os.path.dirname(sol_file), exist_ok=True)
+        if time_limit is not None and time_limit >= self.timeout:
+            time_limit = None
+        session = self.idle_sessions.get()
+        try:
+            for _ in range(2):
+                if not session.is_alive():
+                    session.restart()
+                    self.count("restarts")
+                semaphore = get_scipstp_semaphore()
+                wait = (self.timeout if time_limit is None else time_limit) + self.grace
+                if semaphore is None:
+                    result = session.solve(stp_file, sol_file, wait, time_limit)
+                else:
+                    with semaphore:
+                        result = session.solve(stp_file, sol_file, wait, time_limit)
+                if result:
+                    self.count("solves")
+                    return True
+                # the process may not be reaped yet after a crash, restart anyway
+                session.restart()
+                self.count("restarts")
+                if result is None:
+                    self.count("timeouts")
+                    break
+            self.count("failures")
+            return False
+        finally:
+            self.idle_sessions.put(session)
+
+    def solve_many(self, files: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Solve (stp_file, sol_file) pairs concurrently on the sessions,
+        after a health check of all of them
+        """
+        self.health_check()
+        if len(self.sessions) == 1 or len(files) <= 1:
+            return [self.solve(stp_file, sol_file) for stp_file, sol_file in files]
+        with ThreadPoolExecutor(max_workers=len(self.sessions)) as executor:
+            return list(
+                executor.map(lambda paths: self.solve(*paths), files),
+            )
+
+    def health_check(self) -> List[bool]:
+        """
+        Check idle sessions, restarting the unresponsive ones
+        """
+        healthy = []
+        for _ in range(len(self.sessions)):
+            session = self.idle_sessions.get()
+            try:
+                if not session.health_check():
+                    session.restart()
+                    self.count("unhealthy")
+                    self.count("restarts")
+                    healthy.append(False)
+                else:
+                    healthy.append(True)
+            finally:
+                self.idle_sessions.put(session)
+        return healthy
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+    def report(self):
+        print(
+            f"[INFO] SCIP session pool: {self.stats['solves']} solves, "
+            f"{self.stats['failures']} failures, {self.stats['timeouts']} timeouts, "
+            f"{self.stats['unhealthy']} unhealthy, {self.stats['restarts']} restarts."
+        )
@@ -0,0 +1,169 @@
+from itertools import combinations
+from .cal_job_conflicts import cal_overlap
+from typing import Dict, Tuple
+
+
+class ShiftEvaluator:
+    """
+    Predict cal_job_conflicts of a window after a set of time shifts,
+    without changing any state.
+    The pairs sharing a link and the conflicts without shifts are computed
+    once; a candidate only recomputes the pairs with a shifted job, and pair
+    overlaps are memoized on the (shifted) time periods, so candidates
+    revisiting the same shift of a job reuse them.
+    """
+
+    def __init__(
+        self,
+        link_traffic_pattern,
+        job_time_period,
+        job_traffic_pattern,
+        current_time: int,
+        new_time: int,
+        version: int = 0,
+        max_cached_overlaps: int = 1000000,
+    ):
+        self.version = version  # version of the TrafficManager state
+        self.job_time_period = dict(job_time_period)
+        self.job_T = {
+            job_name: pattern.T for job_name, pattern in job_traffic_pattern.items()
+        }
+        self.current_time = current_time
+        self.new_time = new_time
+        self.max_cached_overlaps = max_cached_overlaps
+        self.overlap_cache = {}  # {(pair_key, period, other_period): overlap}
+
+        # pairs as in cal_job_conflicts, keyed by job names and patterns
+        self.pair_jobs = (
+            {}
+        )  # {pair_key: (job_name, pattern, other_job_name, other_pattern)}
+        self.pair_links = {}  # {pair_key: [link, ...]}
+        self.job_pairs = {}  # {job_name: [pair_key, ...]}
+        self.job_links = {}  # {job_name: [link, ...]}
+        for link, jobs in link_traffic_pattern.items():
+            for job_name in jobs:
+                self.job_links.setdefault(job_name, []).append(link)
+            for (job_name, pattern), (other_job_name, other_pattern) in combinations(
+                jobs.items(), 2
+            ):
+                if other_job_name < job_name:
+                    job_name, pattern, other_job_name, other_pattern = (
+                        other_job_name,
+                        other_pattern,
+                        job_name,
+                        pattern,
+                    )
+                pair_key = (
+                    job_name,
+                    tuple(pattern.interval),
+                    pattern.T,
+                    other_job_name,
+                    tuple(other_pattern.interval),
+                    other_pattern.T,
+                )
+                if pair_key not in self.pair_jobs:
+                    self.pair_jobs[pair_key] = (
+                        job_name,
+                        pattern,
+                        other_job_name,
+                        other_pattern,
+                    )
+                    self.job_pairs.setdefault(job_name, []).append(pair_key)
+                    self.job_pairs.setdefault(other_job_name, []).append(pair_key)
+                self.pair_links.setdefault(pair_key, []).append(link)
+
+        # conflicts without shifts
+        self.base_overlap = {
+            pair_key: self.overlap(
+                pair_key,
+                self.job_time_period[pair_key[0]],
+                self.job_time_period[pair_key[3]],
+            )
+            for pair_key in self.pair_jobs
+        }
+        self.base_link_job_conflicts = {
+            link: {job_name: 0 for job_name in jobs}
+            for link, jobs in link_traffic_pattern.items()
+        }
+        for pair_key, overlap in self.base_overlap.items():
+            for link in self.pair_links[pair_key]:
+                self.base_link_job_conflicts[link][pair_key[0]] += overlap
+                self.base_link_job_conflicts[link][pair_key[3]] += overlap
+        self.base_job_conflicts = {
+            job_name: max(
+                self.base_link_job_conflicts[link][job_name] for link in links
+            )
+            for job_name, links in self.job_links.items()
+        }
+        self.base_total = sum(self.base_job_conflicts.values())
+
+    def overlap(
+        self, pair_key, period: Tuple[int, int], other_period: Tuple[int, int]
+    ) -> int:
+        key = (pair_key, period, other_period)
+        if key not in self.overlap_cache:
+            if len(self.overlap_cache) >= self.max_cached_overlaps:
+                self.overlap_cache = {}
+            job_name, pattern, other_job_name, other_pattern = self.pair_jobs[pair_key]
+            self.overlap_cache[key] = int(
+                cal_overlap(
+                    pattern,
+                    other_pattern,
+                    *period,
+                    *other_period,
+                    self.current_time,
+                    self.new_time,
+                )
+            )
+        return self.overlap_cache[key]
+
+    def shifted_period(self, job_name: str, time_shifts: Dict[str, int]):
+        start_time, end_time = self.job_time_period[job_name]
+        delay = time_shifts.get(job_name, 0) % self.job_T[job_name]
+        return (start_time + delay, end_time + delay)
+
+    def evaluate(self, time_shifts: Dict[str, int]) -> Tuple[Dict[str, int], int]:
+        """
+        Return ({job_name: conflict}, total conflict) if time_shifts were
+        applied with update_job_time_periods before update_traffic
+        """
+        shifted_jobs = {
+            job_name
+            for job_name, delay in time_shifts.items()
+            if job_name in self.job_links and delay % self.job_T[job_name] != 0
+        }
+        if not shifted_jobs:
+            return dict(self.base_job_conflicts), self.base_total
+        affected_pairs = {
+            pair_key
+            for job_name in shifted_jobs
+            for pair_key in self.job_pairs.get(job_name, ())
+        }
+        link_job_delta = {}  # {link: {job_name: change of conflict}}
+        for pair_key in affected_pairs:
+            delta = (
+                self.overlap(
+                    pair_key,
+                    self.shifted_period(pair_key[0], time_shifts),
+                    self.shifted_period(pair_key[3], time_shifts),
+                )
+                - self.base_overlap[pair_key]
+            )
+            if delta == 0:
+                continue
+            for link in self.pair_links[pair_key]:
+                job_delta = link_job_delta.setdefault(link, {})
+                job_delta[pair_key[0]] = job_delta.get(pair_key[0], 0) + delta
+                job_delta[pair_key[3]] = job_delta.get(pair_key[3], 0) + delta
+        affected_jobs = set().union(*link_job_delta.values())
+        job_conflicts = dict(self.base_job_conflicts)
+        total = self.base_total
+        for job_name in affected_jobs:
+            conflict = max(
+                self.base_link_job_conflicts[link][job_name]
+                + link_job_delta.get(link, {}).get(job_name, 0)
+                for link in self.job_links[job_name]
+            )
+            total += conflict - job_conflicts[job_name]
+            job_conflicts[job_name] = conflict
+        return job_conflicts, total